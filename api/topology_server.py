@@ -0,0 +1,482 @@
+"""
+Live Topology Server
+
+This module serves the topology pages of several networks from one
+long-running ASGI app and keeps them current. Each network is polled in the
+background on a schedule. Every poll goes through update_topology_html(), so
+the page files on disk stay in sync, and the resulting delta is pushed to the
+browsers viewing that network over Server-Sent Events, or to other clients over
+a WebSocket, instead of each of them polling.
+
+Routes:
+
+- ``GET /``: index of the served networks
+- ``GET /networks``: status of every network as JSON
+- ``GET /networks/{network_id}``: redirect to the network's page
+- ``GET /networks/{network_id}/topology``: topology JSON, tagged with its version
+- ``GET /networks/{network_id}/events``: Server-Sent Events stream of updates
+- ``WS /networks/{network_id}/ws``: the same updates over a WebSocket
+- ``GET /networks/{network_id}/tiles``: tiling of a large network's layout
+- ``GET /networks/{network_id}/tiles/{z}/{x}/{y}``: nodes and edges of one tile
+- ``GET /pages/...``: page, data, cluster and vis.js files
+
+Networks above LIVE_TILED_THRESHOLD nodes are served as tiles (see
+utilities.topology_tiles), so their pages only fetch what is in view.
+
+Responses are gzip-compressed, page files are revalidated by ETag, and the
+vendored vis.js files and versioned tiles are cached by the browser. Run it
+from the command line:
+
+    python -m api.topology_server L_123 L_456 --interval 60 --port 8050
+"""
+
+import argparse
+import asyncio
+import gzip
+import html
+import json
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+import webbrowser
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import HTMLResponse, RedirectResponse, Response, StreamingResponse
+from fastapi.staticfiles import StaticFiles
+
+from modules.meraki.meraki_api import get_network_topology
+from utilities.topology_tiles import TopologyTiles
+from utilities.topology_visualizer import VIS_VERSION, topology_page_updates, update_topology_html
+
+# Seconds between polls of each network
+LIVE_POLL_INTERVAL = int(os.getenv('MERAKI_LIVE_POLL_INTERVAL', '60'))
+
+# Networks polled at the same time
+LIVE_MAX_CONCURRENT_POLLS = 4
+
+# Networks with more nodes than this are served as tiles
+LIVE_TILED_THRESHOLD = int(os.getenv('MERAKI_LIVE_TILED_THRESHOLD', '5000'))
+
+# Updates buffered per browser before it is told to reload instead
+SUBSCRIBER_QUEUE_SIZE = 32
+
+# Seconds between keep-alive comments on idle event streams
+KEEPALIVE_INTERVAL = 15
+
+# Seconds a request for a network's page waits for its first poll
+FIRST_POLL_TIMEOUT = 60
+
+# Where the served pages are written
+LIVE_TOPOLOGY_DIR = Path(os.path.expanduser("~")) / ".meraki_clu" / "live_topologies"
+
+
+class NetworkFeed:
+    """The latest topology of one served network and the clients following it"""
+
+    def __init__(self, network_id):
+        self.network_id = network_id
+        self.name = None
+        self.version = None
+        self.topology_json = None
+        self.tiles = None
+        self.updates_json = None
+        self.updated = None
+        self.error = None
+        self.polls = 0
+        self.subscribers = set()
+        self.ready = asyncio.Event()
+        # Set when a client asks for the network before its first poll is due
+        self.wanted = asyncio.Event()
+
+    def status(self):
+        """The feed's state for the /networks listing"""
+        return {'id': self.network_id, 'name': self.name, 'version': self.version, 'updated': self.updated,
+                'error': self.error, 'polls': self.polls, 'subscribers': len(self.subscribers)}
+
+
+class TopologyService:
+    """
+    Polls networks in the background and fans their updates out to subscribers.
+
+    Fetching and rendering run in worker threads, so the event loop stays free
+    to serve pages and streams while a poll is in progress.
+    """
+
+    def __init__(self, api_key, network_ids, interval=None, output_dir=None,
+                 max_concurrent=LIVE_MAX_CONCURRENT_POLLS, fetch=None):
+        """
+        Initialize the service.
+
+        Args:
+            api_key (str): Meraki API key
+            network_ids (list): IDs of the networks to serve
+            interval (float, optional): Seconds between polls of each network
+                (default: LIVE_POLL_INTERVAL)
+            output_dir (str, optional): Directory for the pages (default: LIVE_TOPOLOGY_DIR)
+            max_concurrent (int): Networks polled at the same time
+            fetch (callable, optional): Called with a network ID to get its
+                topology (default: get_network_topology(), bypassing the
+                response cache so every poll sees the network as it is now)
+        """
+        self.api_key = api_key
+        self.interval = interval or LIVE_POLL_INTERVAL
+        self.output_dir = Path(output_dir or LIVE_TOPOLOGY_DIR)
+        self.max_concurrent = max_concurrent
+        self.feeds = {network_id: NetworkFeed(network_id) for network_id in network_ids}
+        self._fetch = fetch or (lambda network_id: get_network_topology(self.api_key, network_id, use_cache=False))
+        self._semaphore = None
+        self._tasks = []
+
+    def page_path(self, network_id):
+        """Path of a network's page"""
+        return self.output_dir / f"{network_id}.html"
+
+    @staticmethod
+    def events_url(network_id):
+        """URL of a network's event stream"""
+        return f"/networks/{network_id}/events"
+
+    @staticmethod
+    def tiles_url(network_id):
+        """URL of a network's tiles"""
+        return f"/networks/{network_id}/tiles"
+
+    async def start(self):
+        """Start polling every network"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        count = len(self.feeds)
+        for i, network_id in enumerate(self.feeds):
+            # Spread the polls over the interval so the networks aren't all fetched at once
+            self._tasks.append(asyncio.create_task(self._run(network_id, self.interval * i / count)))
+
+    async def stop(self):
+        """Stop polling and end the open streams"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        for feed in self.feeds.values():
+            for queue in list(feed.subscribers):
+                self._offer(queue, None)
+
+    async def _run(self, network_id, offset):
+        # Wait for this network's turn, unless a page asks for it sooner
+        try:
+            await asyncio.wait_for(self.feeds[network_id].wanted.wait(), offset)
+        except asyncio.TimeoutError:
+            pass
+        await self.poll(network_id)
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.poll(network_id)
+
+    async def poll(self, network_id):
+        """
+        Fetch a network, update its page and push the changes.
+
+        Args:
+            network_id (str): Network ID
+
+        Returns:
+            dict: Summary of the changes (see update_topology_html()), or None
+            if the page was written from scratch or the poll failed
+        """
+        feed = self.feeds[network_id]
+        started = time.perf_counter()
+        try:
+            async with self._semaphore:
+                topology = await asyncio.to_thread(self._fetch, network_id)
+                # Tiles replace client clusters as the way large networks are kept light
+                tiled = len(topology.get('nodes', [])) > LIVE_TILED_THRESHOLD
+                path, changes = await asyncio.to_thread(
+                    update_topology_html, topology, topology.get('network_name'), self.page_path(network_id),
+                    None if tiled else 'auto', False, self.events_url(network_id),
+                    self.tiles_url(network_id) if tiled else None)
+                updates = await asyncio.to_thread(topology_page_updates, path)
+                tiles = feed.tiles
+                if tiled and (tiles is None or tiles.version != updates['version']):
+                    tiles = await asyncio.to_thread(TopologyTiles.from_topology, topology, None, updates['version'])
+        except Exception as e:
+            feed.error = str(e)
+            logging.warning(f"Could not poll the topology of network {network_id}: {str(e)}")
+            return None
+        finally:
+            feed.polls += 1
+
+        feed.error = None
+        feed.name = topology.get('network_name') or network_id
+        feed.updated = time.time()
+        feed.tiles = tiles if tiled else None
+        if updates['version'] != feed.version:
+            feed.version = updates['version']
+            feed.topology_json = json.dumps(topology, separators=(',', ':'), default=str).encode('utf-8')
+            feed.updates_json = json.dumps(updates, separators=(',', ':'))
+            if changes is None or changes['rewritten']:
+                # Open pages don't have the new base, so this tells them to reload
+                message = {'version': feed.version, 'deltas': []}
+            else:
+                message = {'version': feed.version, 'deltas': updates['deltas'][-1:]}
+            self._publish(feed, json.dumps(message, separators=(',', ':')))
+        feed.ready.set()
+        logging.debug(f"Polled network {network_id} in {time.perf_counter() - started:.2f}s: {changes}")
+        return changes
+
+    def subscribe(self, network_id):
+        """
+        Follow a network's updates.
+
+        Returns:
+            asyncio.Queue: Receives each update as a JSON string, then None when
+            the service stops
+        """
+        queue = asyncio.Queue(SUBSCRIBER_QUEUE_SIZE)
+        self.feeds[network_id].subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, network_id, queue):
+        """Stop following a network's updates"""
+        self.feeds[network_id].subscribers.discard(queue)
+
+    def _publish(self, feed, message):
+        # The message is serialized once however many clients follow the network
+        for queue in list(feed.subscribers):
+            if not self._offer(queue, message):
+                # A client that fell behind reloads the page instead of replaying every delta
+                while not queue.empty():
+                    queue.get_nowait()
+                self._offer(queue, json.dumps({'version': feed.version, 'deltas': []}))
+
+    @staticmethod
+    def _offer(queue, message):
+        try:
+            queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+
+def create_topology_app(service):
+    """
+    Create the ASGI app serving a TopologyService.
+
+    Args:
+        service (TopologyService): The networks to serve
+
+    Returns:
+        FastAPI: The app; polling starts and stops with it
+    """
+    @asynccontextmanager
+    async def lifespan(app):
+        await service.start()
+        try:
+            yield
+        finally:
+            await service.stop()
+
+    app = FastAPI(title="Meraki Live Topology", lifespan=lifespan)
+    # Event streams are left uncompressed by the middleware, so updates aren't held back
+    app.add_middleware(GZipMiddleware, minimum_size=1024)
+    os.makedirs(service.output_dir, exist_ok=True)
+    app.mount('/pages', StaticFiles(directory=service.output_dir), name='pages')
+
+    @app.middleware('http')
+    async def cache_headers(request: Request, call_next):
+        response = await call_next(request)
+        if request.url.path.startswith(f"/pages/vendor/vis-{VIS_VERSION}/"):
+            response.headers['Cache-Control'] = 'public, max-age=604800, immutable'
+        elif request.url.path.startswith('/pages/'):
+            # Page files change in place, so browsers revalidate them by ETag
+            response.headers['Cache-Control'] = 'no-cache'
+        return response
+
+    def feed_for(network_id):
+        feed = service.feeds.get(network_id)
+        if feed is None:
+            raise HTTPException(status_code=404, detail=f"Network {network_id} is not served")
+        return feed
+
+    async def wait_ready(feed):
+        feed.wanted.set()
+        try:
+            await asyncio.wait_for(feed.ready.wait(), FIRST_POLL_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=503, detail=feed.error or "The network hasn't been polled yet",
+                                headers={'Retry-After': '5'})
+
+    @app.get('/', response_class=HTMLResponse)
+    async def index():
+        rows = ''.join(
+            f"<li><a href=\"/networks/{html.escape(feed.network_id)}\">{html.escape(feed.name or feed.network_id)}"
+            f"</a>{' - ' + html.escape(feed.error) if feed.error else ''}</li>"
+            for feed in service.feeds.values())
+        return f"<!DOCTYPE html><html><head><title>Network Topologies</title></head>" \
+               f"<body><h1>Network Topologies</h1><ul>{rows}</ul></body></html>"
+
+    @app.get('/networks')
+    async def networks():
+        return [feed.status() for feed in service.feeds.values()]
+
+    @app.get('/networks/{network_id}')
+    async def network_page(network_id: str):
+        feed = feed_for(network_id)
+        await wait_ready(feed)
+        return RedirectResponse(f"/pages/{network_id}.html")
+
+    @app.get('/networks/{network_id}/topology')
+    async def network_topology(network_id: str, request: Request):
+        feed = feed_for(network_id)
+        await wait_ready(feed)
+        etag = f'"{network_id}-{feed.version}"'
+        headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+        if request.headers.get('if-none-match') == etag:
+            return Response(status_code=304, headers=headers)
+        return Response(feed.topology_json, media_type='application/json', headers=headers)
+
+    def tiles_for(feed):
+        if feed.tiles is None:
+            raise HTTPException(status_code=404, detail=f"Network {feed.network_id} is not tiled")
+        return feed.tiles
+
+    @app.get('/networks/{network_id}/tiles')
+    async def network_tiles(network_id: str):
+        feed = feed_for(network_id)
+        await wait_ready(feed)
+        return Response(json.dumps(tiles_for(feed).meta()), media_type='application/json',
+                        headers={'Cache-Control': 'no-cache'})
+
+    @app.get('/networks/{network_id}/tiles/{zoom}/{x}/{y}')
+    async def network_tile(network_id: str, zoom: int, x: int, y: int, request: Request, v: int = None):
+        feed = feed_for(network_id)
+        await wait_ready(feed)
+        tiles = tiles_for(feed)
+        try:
+            payload = await asyncio.to_thread(tiles.tile_gzip, zoom, x, y)
+        except ValueError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+        # A tile URL carrying the current version never changes
+        headers = {'ETag': f'"{network_id}-{tiles.version}-{zoom}-{x}-{y}"',
+                   'Cache-Control': 'public, max-age=86400, immutable' if v == tiles.version else 'no-cache'}
+        if request.headers.get('if-none-match') == headers['ETag']:
+            return Response(status_code=304, headers=headers)
+        if 'gzip' in request.headers.get('accept-encoding', ''):
+            headers['Content-Encoding'] = 'gzip'
+        else:
+            payload = gzip.decompress(payload)
+        return Response(payload, media_type='application/json', headers=headers)
+
+    @app.get('/networks/{network_id}/events')
+    async def network_events(network_id: str):
+        feed = feed_for(network_id)
+
+        async def stream():
+            queue = service.subscribe(network_id)
+            try:
+                # Bring a page that loaded before the latest poll up to date
+                if feed.updates_json:
+                    yield f"data: {feed.updates_json}\n\n"
+                while True:
+                    try:
+                        message = await asyncio.wait_for(queue.get(), KEEPALIVE_INTERVAL)
+                    except asyncio.TimeoutError:
+                        yield ": keepalive\n\n"
+                        continue
+                    if message is None:
+                        break
+                    yield f"data: {message}\n\n"
+            finally:
+                service.unsubscribe(network_id, queue)
+
+        return StreamingResponse(stream(), media_type='text/event-stream',
+                                 headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+    @app.websocket('/networks/{network_id}/ws')
+    async def network_websocket(websocket: WebSocket, network_id: str):
+        if network_id not in service.feeds:
+            await websocket.close(code=4404)
+            return
+        feed = service.feeds[network_id]
+        await websocket.accept()
+        queue = service.subscribe(network_id)
+        # Nothing is expected from the client; reading notices when it goes away
+        receiver = asyncio.create_task(websocket.receive_text())
+        try:
+            if feed.updates_json:
+                await websocket.send_text(feed.updates_json)
+            while True:
+                getter = asyncio.create_task(queue.get())
+                done, _ = await asyncio.wait({getter, receiver}, return_when=asyncio.FIRST_COMPLETED)
+                if receiver in done:
+                    getter.cancel()
+                    receiver.result()
+                    receiver = asyncio.create_task(websocket.receive_text())
+                    continue
+                message = getter.result()
+                if message is None:
+                    await websocket.close()
+                    break
+                await websocket.send_text(message)
+        except WebSocketDisconnect:
+            pass
+        finally:
+            receiver.cancel()
+            service.unsubscribe(network_id, queue)
+
+    return app
+
+
+def serve_topology(api_key, network_ids, host='127.0.0.1', port=8050, interval=None, open_browser=True):
+    """
+    Serve live topologies until interrupted.
+
+    Args:
+        api_key (str): Meraki API key
+        network_ids (list): IDs of the networks to serve
+        host (str): Address to listen on
+        port (int): Port to listen on
+        interval (float, optional): Seconds between polls of each network
+        open_browser (bool): Open the first network's page once the server is up
+    """
+    try:
+        import uvicorn
+    except ImportError:
+        subprocess.check_call([sys.executable, "-m", "pip", "install", "uvicorn"])
+        import uvicorn
+
+    app = create_topology_app(TopologyService(api_key, network_ids, interval))
+    if open_browser and network_ids:
+        url = f"http://{'localhost' if host in ('0.0.0.0', '127.0.0.1') else host}:{port}"
+        url += f"/networks/{network_ids[0]}" if len(network_ids) == 1 else "/"
+        # The network route waits for the first poll, so the browser can be opened right away
+        timer = threading.Timer(1.0, webbrowser.open, [url])
+        timer.daemon = True
+        timer.start()
+    uvicorn.run(app, host=host, port=port, log_level='warning')
+
+
+def main():
+    """Serve live topologies from the command line"""
+    parser = argparse.ArgumentParser(description='Serve live Meraki network topologies')
+    parser.add_argument('network_ids', nargs='+', help='Network IDs to serve')
+    parser.add_argument('--host', default='127.0.0.1', help='Address to listen on')
+    parser.add_argument('--port', type=int, default=8050, help='Port to listen on')
+    parser.add_argument('--interval', type=float, default=LIVE_POLL_INTERVAL,
+                        help='Seconds between polls of each network')
+    parser.add_argument('--no-browser', action='store_true', help="Don't open a browser")
+    parser.add_argument('--api-key', default=os.getenv('MERAKI_DASHBOARD_API_KEY'),
+                        help='Meraki API key (default: MERAKI_DASHBOARD_API_KEY)')
+    args = parser.parse_args()
+    if not args.api_key:
+        parser.error('an API key is required (--api-key or MERAKI_DASHBOARD_API_KEY)')
+    serve_topology(args.api_key, args.network_ids, args.host, args.port, args.interval, not args.no_browser)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -524,8 +524,14 @@ def initialize_api_key():
     """Initialize and manage the Meraki API key"""
     parser = argparse.ArgumentParser(description='Outset Solutions - Meraki Management Utility')
     parser.add_argument('--set-key', help='Set the Meraki API key')
+    parser.add_argument('--record', metavar='CASSETTE', help='Record every Meraki API response to a cassette file')
+    parser.add_argument('--replay', metavar='CASSETTE', help='Serve Meraki API responses from a cassette file, offline')
     args = parser.parse_args()
 
+    if args.record or args.replay:
+        from modules.meraki.meraki_cassette import use_cassette
+        use_cassette(args.record or args.replay, 'record' if args.record else 'replay')
+
     # Initialize Fernet for encryption
     from api import meraki_api_manager
     # Use a default password for encryption - in a production environment, this should be more secure
@@ -547,6 +553,10 @@ def initialize_api_key():
     if api_key:
         return api_key
 
+    # Replayed responses don't depend on the key
+    if args.replay:
+        return 'cassette-replay'
+
     # If no key is found, show instructions
     print("\nNo API key found. Please set your Meraki API key using one of these methods:")
     print("\n1. Run the program with the --set-key option:")
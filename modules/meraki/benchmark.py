@@ -0,0 +1,311 @@
+"""
+Meraki API Layer Benchmark
+
+This module measures how fast the request layer pulls data. Each scenario drives
+make_meraki_request or one of the meraki_api getters against a fresh local
+mock Dashboard API server (see mock_server). The suite sweeps concurrency,
+payload size, simulated round-trip time and throttling rate, and reports per run:
+
+- operations and requests per second
+- p50/p95/p99 operation latency
+- connections opened
+- bytes transferred
+- retries and 429s
+
+Results are written as JSON so runs can be compared across commits:
+
+    python -m modules.meraki.benchmark --concurrency 1 8 32 --latency 0 0.05 --output before.json
+    python -m modules.meraki.benchmark --concurrency 1 8 32 --latency 0 0.05 --compare before.json
+"""
+
+import argparse
+import itertools
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from modules.meraki import meraki_api
+from modules.meraki.meraki_cache import configure_cache
+from modules.meraki.meraki_client import close_clients, get_client
+from modules.meraki.meraki_ratelimit import configure_rate_limiter
+from modules.meraki.mock_server import MockDashboardServer, MockServerProcess
+
+API_KEY = 'benchmark-api-key'
+NETWORKS = 200
+DEVICES_PER_NETWORK = 10
+
+
+def _organization(server):
+    return server.dashboard.organizations[0]
+
+
+def _networks(server, count):
+    org = _organization(server)
+    return [org.network_id(n) for n in range(min(count, org.network_count))]
+
+
+def _switches(server, count):
+    org = _organization(server)
+    serials = []
+    for n in range(org.network_count):
+        serials.extend(org.serial(d) for d in org.devices_with_role(n, 'switch'))
+        if len(serials) >= count:
+            break
+    return serials[:count]
+
+
+# Scenario name -> (description, targets(server, operations), call(api_key, target))
+SCENARIOS = {
+    'organizations': (
+        "make_meraki_request('/organizations'), the smallest request",
+        lambda server, operations: [None] * operations,
+        lambda api_key, target: meraki_api.make_meraki_request(api_key, '/organizations', use_cache=False)
+    ),
+    'network_devices': (
+        'get_network_devices() for many networks',
+        _networks,
+        lambda api_key, network_id: meraki_api.get_network_devices(api_key, network_id)
+    ),
+    'network_clients': (
+        'get_network_clients() for many networks, paginated',
+        _networks,
+        lambda api_key, network_id: meraki_api.get_network_clients(api_key, network_id)
+    ),
+    'switch_ports': (
+        'get_switch_ports() for many switches',
+        _switches,
+        lambda api_key, serial: meraki_api.get_switch_ports(api_key, serial)
+    ),
+    'device_statuses': (
+        'get_organization_devices_statuses() for the whole organization',
+        lambda server, operations: [_organization(server).id] * max(1, operations // 50),
+        lambda api_key, org_id: meraki_api.get_organization_devices_statuses(api_key, org_id)
+    ),
+}
+
+
+def percentile(values, fraction):
+    """
+    Nearest-rank percentile.
+
+    Args:
+        values (list): Sorted samples
+        fraction (float): Percentile as a fraction, e.g. 0.95
+
+    Returns:
+        float: The percentile, or 0.0 for no samples
+    """
+    if not values:
+        return 0.0
+    rank = max(0, min(len(values) - 1, int(round(fraction * len(values) + 0.5)) - 1))
+    return values[rank]
+
+
+def run_scenario(scenario, concurrency=1, latency=0.0, throttle_rate=0.0, clients_per_network=100,
+                 operations=100, rate_limit=None, cache=False, in_process=False):
+    """
+    Run one benchmark configuration against a fresh mock server.
+
+    Args:
+        scenario (str): Key of SCENARIOS
+        concurrency (int): Worker threads issuing operations
+        latency (float): Simulated round-trip time in seconds added by the server
+        throttle_rate (float): Fraction of requests the server answers 429
+        clients_per_network (int): Payload size knob for client listings
+        operations (int): Number of getter calls
+        rate_limit (float, optional): Client-side requests per second per organization
+            (default: effectively unlimited, so the HTTP layer itself is measured)
+        cache (bool): Keep the response cache and request coalescing enabled
+        in_process (bool): Run the mock server on a thread of this process
+            instead of a child process (cheaper to start, but it competes for the GIL)
+
+    Returns:
+        dict: Configuration and measurements
+    """
+    description, targets_for, call = SCENARIOS[scenario]
+    server_class = MockDashboardServer if in_process else MockServerProcess
+    server = server_class(networks=NETWORKS, devices=NETWORKS * DEVICES_PER_NETWORK,
+                          clients=NETWORKS * clients_per_network, latency=latency,
+                          throttle_rate=throttle_rate, retry_after=1).start()
+    previous_base_url = os.environ.get('MERAKI_BASE_URL')
+    os.environ['MERAKI_BASE_URL'] = server.base_url
+    close_clients()
+    configure_cache(enabled=cache)
+    configure_rate_limiter(rate=rate_limit or 1000000, capacity=rate_limit or 1000000)
+    try:
+        client = get_client(API_KEY, pool_size=max(concurrency, 1))
+        # Without the cache, identical operations (every /organizations call) would
+        # share one in-flight request and undercount the requests sent
+        client.singleflight.enabled = cache
+        targets = targets_for(server, operations)
+        samples = []
+        errors = 0
+
+        def timed(target):
+            started = time.perf_counter()
+            try:
+                call(API_KEY, target)
+                return time.perf_counter() - started, None
+            except Exception as e:
+                return time.perf_counter() - started, e
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+            for elapsed, error in executor.map(timed, targets):
+                samples.append(elapsed)
+                if error is not None:
+                    errors += 1
+        duration = time.perf_counter() - started
+
+        stats = client.connection_stats()
+        server_stats = server.stats
+        samples.sort()
+        return {
+            'scenario': scenario,
+            'description': description,
+            'concurrency': concurrency,
+            'latency': latency,
+            'throttle_rate': throttle_rate,
+            'clients_per_network': clients_per_network,
+            'cache': cache,
+            'operations': len(samples),
+            'duration': round(duration, 4),
+            'operations_per_sec': round(len(samples) / duration, 2) if duration else 0.0,
+            'requests': server_stats['requests'],
+            'requests_per_sec': round(server_stats['requests'] / duration, 2) if duration else 0.0,
+            'latency_ms': {
+                'p50': round(percentile(samples, 0.50) * 1000, 3),
+                'p95': round(percentile(samples, 0.95) * 1000, 3),
+                'p99': round(percentile(samples, 0.99) * 1000, 3),
+                'mean': round(sum(samples) / len(samples) * 1000, 3) if samples else 0.0,
+                'max': round(samples[-1] * 1000, 3) if samples else 0.0
+            },
+            'connections_opened': stats['connections_opened'],
+            'bytes_transferred': server_stats['bytes_sent'],
+            'retries': stats['retries'],
+            'throttled': stats['throttled'],
+            'errors': errors
+        }
+    finally:
+        close_clients()
+        server.stop()
+        if previous_base_url is None:
+            os.environ.pop('MERAKI_BASE_URL', None)
+        else:
+            os.environ['MERAKI_BASE_URL'] = previous_base_url
+
+
+def run_suite(scenarios, concurrency_levels, latencies, throttle_rates, payload_sizes, operations=100,
+              rate_limit=None, cache=False, in_process=False, progress=None):
+    """
+    Run every combination of the sweep parameters.
+
+    Args:
+        scenarios (list): SCENARIOS keys
+        concurrency_levels (list): Worker counts
+        latencies (list): Simulated round-trip times in seconds
+        throttle_rates (list): Fractions of requests answered 429
+        payload_sizes (list): Clients per network
+        operations (int): Getter calls per run
+        rate_limit (float, optional): Client-side requests per second per organization
+        cache (bool): Keep the response cache enabled
+        in_process (bool): Run the mock server in this process
+        progress (callable, optional): Called with each result as it completes
+
+    Returns:
+        dict: Environment metadata and the list of results
+    """
+    results = []
+    for scenario, concurrency, latency, throttle_rate, clients in itertools.product(
+            scenarios, concurrency_levels, latencies, throttle_rates, payload_sizes):
+        result = run_scenario(scenario, concurrency, latency, throttle_rate, clients, operations, rate_limit, cache,
+                              in_process)
+        results.append(result)
+        if progress:
+            progress(result)
+    return {'meta': environment(), 'results': results}
+
+
+def environment():
+    """Describe the machine and commit a benchmark ran on"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        'commit': commit or None,
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count()
+    }
+
+
+def _run_key(result):
+    return (result['scenario'], result['concurrency'], result['latency'], result['throttle_rate'],
+            result['clients_per_network'], result.get('cache', False))
+
+
+def format_result(result, baseline=None):
+    """One summary line for a result, with the change against a baseline run if given"""
+    line = (f"{result['scenario']:<16} c={result['concurrency']:<3} rtt={result['latency'] * 1000:>4.0f}ms "
+            f"429={result['throttle_rate']:<5} clients={result['clients_per_network']:<5} "
+            f"{result['requests_per_sec']:>8.1f} req/s  {result['operations_per_sec']:>8.1f} op/s  "
+            f"p50={result['latency_ms']['p50']:>8.1f}ms p95={result['latency_ms']['p95']:>8.1f}ms "
+            f"p99={result['latency_ms']['p99']:>8.1f}ms conns={result['connections_opened']:<3} "
+            f"bytes={result['bytes_transferred']:<10} retries={result['retries'] + result['throttled']}")
+    if baseline:
+        speedup = result['operations_per_sec'] / baseline['operations_per_sec'] if baseline['operations_per_sec'] else 0
+        line += f"  ({speedup:.2f}x op/s vs baseline)"
+    return line
+
+
+def main():
+    """Run the benchmark suite from the command line"""
+    parser = argparse.ArgumentParser(description='Benchmark the Meraki API layer against the local mock server')
+    parser.add_argument('--scenarios', nargs='+', default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument('--concurrency', nargs='+', type=int, default=[1, 8])
+    parser.add_argument('--latency', nargs='+', type=float, default=[0.0, 0.02],
+                        help='Simulated round-trip times in seconds')
+    parser.add_argument('--throttle-rate', nargs='+', type=float, default=[0.0],
+                        help='Fractions of requests answered 429')
+    parser.add_argument('--clients', nargs='+', type=int, default=[100],
+                        help='Clients per network (payload size)')
+    parser.add_argument('--operations', type=int, default=100, help='Getter calls per run')
+    parser.add_argument('--rate-limit', type=float, default=None,
+                        help='Client-side requests per second per organization (default: unlimited)')
+    parser.add_argument('--cache', action='store_true', help='Keep the response cache enabled')
+    parser.add_argument('--in-process', action='store_true',
+                        help='Run the mock server on a thread instead of a child process')
+    parser.add_argument('--output', help='JSON file for the results (default: benchmark-<commit>-<time>.json)')
+    parser.add_argument('--compare', help='Earlier results file to compare against')
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = {_run_key(result): result for result in json.load(f)['results']}
+
+    report = run_suite(args.scenarios, args.concurrency, args.latency, args.throttle_rate, args.clients,
+                       args.operations, args.rate_limit, args.cache, args.in_process,
+                       progress=lambda result: print(format_result(result, baseline.get(_run_key(result))),
+                                                     flush=True))
+
+    output = args.output or (f"benchmark-{report['meta']['commit'] or 'local'}-"
+                             f"{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results saved to {output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
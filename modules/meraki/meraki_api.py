@@ -59,6 +59,11 @@ import base64
 
 # Import our new device types module
 from modules.meraki.device_types import get_device_type, supports_uplink, get_device_type_from_serial
+from modules.meraki.meraki_client import get_client
+from modules.meraki.meraki_cache import get_negative_cache, get_response_cache
+from modules.meraki.meraki_bulk import TOPOLOGY_DEADLINE, fetch_concurrently, fetch_for_networks
+from modules.meraki.topology_builder import build_network_topology
+from modules.meraki.topology_graph import TopologyGraph
 
 # Configure logging
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -67,25 +72,14 @@ logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %
 import urllib3
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
-# Base URL for Meraki API
-BASE_URL = "https://api.meraki.com/api/v1"
-
 def get_organizations(api_key):
     """Get a list of organizations accessible by the user"""
-    headers = {
-        "X-Cisco-Meraki-API-Key": api_key,
-        "Content-Type": "application/json"
-    }
-    return make_meraki_request(api_key, "/organizations", headers)
+    return make_meraki_request(api_key, "/organizations")
 
 def get_organization_networks(api_key, org_id):
     """Get list of networks for an organization"""
-    params = {"perPage": 5000}  # Get all networks in one request
-    headers = {
-        "X-Cisco-Meraki-API-Key": api_key,
-        "Content-Type": "application/json"
-    }
-    return make_meraki_request(api_key, f"/organizations/{org_id}/networks", headers, params)
+    params = {"perPage": 5000}  # Follow the Link header for orgs with more networks
+    return make_meraki_request(api_key, f"/organizations/{org_id}/networks", params=params, total_pages='all')
 
 def get_organization_summary(api_key, organization_id):
     """Get summary information about an organization"""
@@ -93,7 +87,7 @@ def get_organization_summary(api_key, organization_id):
 
 def get_organization_inventory(api_key, organization_id):
     """Get inventory information for an organization"""
-    return make_meraki_request(api_key, f"/organizations/{organization_id}/inventory/devices")
+    return make_meraki_request(api_key, f"/organizations/{organization_id}/inventory/devices", total_pages='all')
 
 def get_organization_licenses(api_key, organization_id):
     """Get license information for an organization"""
@@ -103,6 +97,12 @@ def get_organization_devices_statuses(api_key, organization_id):
     """Get device status information for an organization"""
     return make_meraki_request(api_key, f"/organizations/{organization_id}/devices/statuses")
 
+def get_organization_vpn_statuses(api_key, organization_id):
+    """Get the site-to-site VPN status and peers of every appliance network in an organization"""
+    params = {"perPage": 300}
+    return make_meraki_request(api_key, f"/organizations/{organization_id}/appliance/vpn/statuses", params=params,
+                               total_pages='all')
+
 # ==================================================
 # EXPORT device list in a beautiful table format
 # ==================================================
@@ -199,8 +199,8 @@ def select_organization(api_key):
 # GET a list of Networks in an Organization
 # ==================================================
 def get_meraki_networks(api_key, organization_id, per_page=5000):
-    params = {"perPage": per_page}  # Get all networks in one request
-    return make_meraki_request(api_key, f"/organizations/{organization_id}/networks", params=params)
+    params = {"perPage": per_page}  # Follow the Link header for orgs with more networks
+    return make_meraki_request(api_key, f"/organizations/{organization_id}/networks", params=params, total_pages='all')
 
 # ==================================================
 # SELECT a Network in an Organization
@@ -359,10 +359,14 @@ def select_mx_network(api_key, organization_id):
     networks = get_meraki_networks(api_key, organization_id)
     if networks:
         mx_networks = []
+        # Fetch every network's devices in parallel instead of one network at a time
+        network_devices = fetch_for_networks(api_key, "/networks/{network_id}/devices",
+                                             [network['id'] for network in networks])
         print("\nAvailable Networks with MX:")
         idx = 1
         for network in networks:
-            if any(device['model'].startswith('MX') for device in get_meraki_switches(api_key, network['id'])):
+            devices = network_devices.get(network['id'], {}).get('data') or []
+            if any((device.get('model') or '').startswith('MX') for device in devices):
                 print(f"{idx}. {network['name']}")
                 mx_networks.append(network)
                 idx += 1
@@ -407,9 +411,92 @@ def get_organization_policy_objects(api_key, organization_id):
 def get_organization_policy_objects_groups(api_key, organization_id):
     return make_meraki_request(api_key, f"/organizations/{organization_id}/policyObjects/groups")
 
+# ==============================================================
+# DERIVE a status from a last-seen / last-reported timestamp
+# ==============================================================
+def status_from_timestamp(timestamp):
+    """
+    Derive an online/dormant/offline status from a last-seen timestamp
+
+    Args:
+        timestamp (str or datetime): Timestamp as returned by the Meraki API
+
+    Returns:
+        str: 'online' (< 5 minutes), 'dormant' (< 1 hour) or 'offline'
+    """
+    from datetime import datetime, timezone
+    if isinstance(timestamp, str):
+        if 'T' in timestamp:
+            # ISO format with 'T' separator
+            timestamp_dt = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+        else:
+            # Try alternative formats without 'T'
+            try:
+                timestamp_dt = datetime.strptime(timestamp, "%Y-%m-%d %H:%M:%S.%f").replace(tzinfo=timezone.utc)
+            except ValueError:
+                try:
+                    timestamp_dt = datetime.strptime(timestamp, "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc)
+                except ValueError:
+                    # Fallback to fromisoformat which is more flexible
+                    timestamp_dt = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+    else:
+        timestamp_dt = timestamp
+    # Ensure timezone-aware datetime (handle naive datetimes)
+    if isinstance(timestamp_dt, datetime) and timestamp_dt.tzinfo is None:
+        timestamp_dt = timestamp_dt.replace(tzinfo=timezone.utc)
+
+    now = datetime.now(timezone.utc)
+    time_diff = abs((now - timestamp_dt).total_seconds())  # Use abs to handle clock skew
+    if time_diff < 300:  # 5 minutes
+        return 'online'
+    elif time_diff < 3600:  # 1 hour
+        return 'dormant'
+    return 'offline'
+
+def enrich_device_status(device):
+    """Fill in a missing or unknown device status from lastReportedAt"""
+    if not device.get('status') or device.get('status') == 'unknown':
+        last_reported = device.get('lastReportedAt')
+        if last_reported:
+            try:
+                device['status'] = status_from_timestamp(last_reported)
+            except Exception as e:
+                logging.debug(f"Could not determine status from lastReportedAt: {str(e)}")
+                device['status'] = 'unknown'
+    return device
+
+def enrich_client_status(client):
+    """Fill in a missing client status from lastSeen"""
+    if not client.get('status'):
+        last_seen = client.get('lastSeen')
+        if last_seen:
+            try:
+                client['status'] = status_from_timestamp(last_seen)
+            except Exception:
+                client['status'] = 'unknown'
+    return client
+
 # ==============================================================
 # FETCH Organization Devices Statuses
 # ==============================================================
+def iter_organization_devices_statuses(api_key, organization_id, per_page=1000, max_records=None, stream=False):
+    """
+    Stream device statuses for an organization page by page
+
+    Args:
+        api_key (str): Meraki API key
+        organization_id (str): Organization ID
+        per_page (int): Number of entries per page
+        max_records (int, optional): Stop after this many devices
+        stream (bool): Decode each page incrementally as it downloads
+
+    Yields:
+        dict: Device status dictionary with enhanced information
+    """
+    for device in iter_meraki_records(api_key, f"/organizations/{organization_id}/devices/statuses",
+                                      per_page=per_page, max_records=max_records, stream=stream):
+        yield enrich_device_status(device)
+
 def get_organization_devices_statuses(api_key, organization_id):
     """
     Get device status information for an organization with enhanced data retrieval
@@ -422,53 +509,7 @@ def get_organization_devices_statuses(api_key, organization_id):
         list: List of device status dictionaries with enhanced information
     """
     try:
-        devices_statuses = make_meraki_request(api_key, f"/organizations/{organization_id}/devices/statuses")
-        if devices_statuses:
-            # Enrich device status data
-            for device in devices_statuses:
-                # Ensure status is properly set
-                if not device.get('status') or device.get('status') == 'unknown':
-                    # Try to determine status from lastReportedAt
-                    last_reported = device.get('lastReportedAt')
-                    if last_reported:
-                        try:
-                            from datetime import datetime, timezone
-                            if isinstance(last_reported, str):
-                                if 'T' in last_reported:
-                                    # ISO format with 'T' separator
-                                    last_reported_dt = datetime.fromisoformat(last_reported.replace('Z', '+00:00'))
-                                else:
-                                    # Try alternative formats without 'T'
-                                    try:
-                                        last_reported_dt = datetime.strptime(last_reported, "%Y-%m-%d %H:%M:%S.%f").replace(tzinfo=timezone.utc)
-                                    except ValueError:
-                                        try:
-                                            last_reported_dt = datetime.strptime(last_reported, "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc)
-                                        except ValueError:
-                                            # Fallback to fromisoformat which is more flexible
-                                            last_reported_dt = datetime.fromisoformat(last_reported.replace('Z', '+00:00'))
-                                # Ensure timezone-aware datetime (handle naive datetimes)
-                                if last_reported_dt.tzinfo is None:
-                                    last_reported_dt = last_reported_dt.replace(tzinfo=timezone.utc)
-                            else:
-                                last_reported_dt = last_reported
-                                # Ensure timezone-aware datetime if it's a datetime object
-                                if isinstance(last_reported_dt, datetime) and last_reported_dt.tzinfo is None:
-                                    last_reported_dt = last_reported_dt.replace(tzinfo=timezone.utc)
-                            
-                            now = datetime.now(timezone.utc)
-                            time_diff = abs((now - last_reported_dt).total_seconds())  # Use abs to handle clock skew
-                            
-                            if time_diff < 300:  # 5 minutes
-                                device['status'] = 'online'
-                            elif time_diff < 3600:  # 1 hour
-                                device['status'] = 'dormant'
-                            else:
-                                device['status'] = 'offline'
-                        except Exception as e:
-                            logging.debug(f"Could not determine status from lastReportedAt: {str(e)}")
-                            device['status'] = 'unknown'
-        return devices_statuses or []
+        return list(iter_organization_devices_statuses(api_key, organization_id))
     except Exception as e:
         logging.error(f"Error getting organization device statuses: {str(e)}")
         return []
@@ -494,15 +535,15 @@ def get_meraki_organization_details(api_key, organization_id):
 
 def get_meraki_organization_inventory(api_key, organization_id):
     """Get inventory for a specific organization"""
-    return make_meraki_request(api_key, f"/organizations/{organization_id}/inventory/devices")
+    return make_meraki_request(api_key, f"/organizations/{organization_id}/inventory/devices", total_pages='all')
 
 def get_meraki_organization_devices(api_key, organization_id):
     """Get all devices in an organization"""
-    return make_meraki_request(api_key, f"/organizations/{organization_id}/devices")
+    return make_meraki_request(api_key, f"/organizations/{organization_id}/devices", total_pages='all')
 
 def get_meraki_organization_networks(api_key, organization_id):
     """Get all networks in an organization"""
-    return make_meraki_request(api_key, f"/organizations/{organization_id}/networks")
+    return make_meraki_request(api_key, f"/organizations/{organization_id}/networks", total_pages='all')
 
 def get_meraki_organization_admins(api_key, organization_id):
     """Get all admins in an organization"""
@@ -513,7 +554,7 @@ def get_meraki_organization_licenses(api_key, organization_id):
     return make_meraki_request(api_key, f"/organizations/{organization_id}/licenses")
 
 def get_organization_inventory(api_key, organization_id):
-    return make_meraki_request(api_key, f"/organizations/{organization_id}/inventory/devices")
+    return make_meraki_request(api_key, f"/organizations/{organization_id}/inventory/devices", total_pages='all')
 
 def get_organization_licenses(api_key, organization_id):
     return make_meraki_request(api_key, f"/organizations/{organization_id}/licenses")
@@ -527,7 +568,30 @@ def get_organization_summary(api_key, organization_id):
 def get_network_health(api_key, network_id):
     return make_meraki_request(api_key, f"/networks/{network_id}/health")
 
-def get_network_clients(api_key, network_id, timespan=10800):
+def iter_network_clients(api_key, network_id, timespan=10800, per_page=1000, starting_after=None,
+                         max_records=None, stream=False, use_cache=True):
+    """
+    Stream clients connected to a network page by page
+
+    Args:
+        api_key (str): Meraki API key
+        network_id (str): Network ID
+        timespan (int): Timespan in seconds for which clients are fetched (default: 10800 = 3 hours)
+        per_page (int): Number of entries per page
+        starting_after (str, optional): Pagination cursor to resume from
+        max_records (int, optional): Stop after this many clients
+        stream (bool): Decode each page incrementally as it downloads
+        use_cache (bool): Whether to read and populate the response cache
+
+    Yields:
+        dict: Client device with enhanced information
+    """
+    for client in iter_meraki_records(api_key, f"/networks/{network_id}/clients", params={"timespan": timespan},
+                                      per_page=per_page, starting_after=starting_after, max_records=max_records,
+                                      stream=stream, use_cache=use_cache):
+        yield enrich_client_status(client)
+
+def get_network_clients(api_key, network_id, timespan=10800, use_cache=True):
     """
     Get clients connected to a network with enhanced parameters for better data retrieval
     
@@ -535,61 +599,13 @@ def get_network_clients(api_key, network_id, timespan=10800):
         api_key (str): Meraki API key
         network_id (str): Network ID
         timespan (int): Timespan in seconds for which clients are fetched (default: 10800 = 3 hours)
+        use_cache (bool): Whether to read and populate the response cache
         
     Returns:
         list: List of client devices with enhanced information
     """
-    # Use longer timespan and include more parameters for better data
-    params = {
-        "perPage": 1000, 
-        "timespan": timespan,
-        "startingAfter": None,  # For pagination if needed
-    }
     try:
-        clients = make_meraki_request(api_key, f"/networks/{network_id}/clients", params=params)
-        if clients:
-            # Enrich client data with better field mapping
-            for client in clients:
-                # Ensure status is properly set
-                if not client.get('status'):
-                    # Determine status based on lastSeen if status is missing
-                    last_seen = client.get('lastSeen')
-                    if last_seen:
-                        try:
-                            from datetime import datetime, timezone
-                            if isinstance(last_seen, str):
-                                if 'T' in last_seen:
-                                    # ISO format with 'T' separator
-                                    last_seen_dt = datetime.fromisoformat(last_seen.replace('Z', '+00:00'))
-                                else:
-                                    # Try alternative formats without 'T'
-                                    try:
-                                        last_seen_dt = datetime.strptime(last_seen, "%Y-%m-%d %H:%M:%S.%f").replace(tzinfo=timezone.utc)
-                                    except ValueError:
-                                        try:
-                                            last_seen_dt = datetime.strptime(last_seen, "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc)
-                                        except ValueError:
-                                            # Fallback to fromisoformat which is more flexible
-                                            last_seen_dt = datetime.fromisoformat(last_seen.replace('Z', '+00:00'))
-                                # Ensure timezone-aware datetime (handle naive datetimes)
-                                if last_seen_dt.tzinfo is None:
-                                    last_seen_dt = last_seen_dt.replace(tzinfo=timezone.utc)
-                            else:
-                                last_seen_dt = last_seen
-                                # Ensure timezone-aware datetime if it's a datetime object
-                                if isinstance(last_seen_dt, datetime) and last_seen_dt.tzinfo is None:
-                                    last_seen_dt = last_seen_dt.replace(tzinfo=timezone.utc)
-                            now = datetime.now(timezone.utc)
-                            time_diff = abs((now - last_seen_dt).total_seconds())  # Use abs to handle clock skew
-                            if time_diff < 300:  # 5 minutes
-                                client['status'] = 'online'
-                            elif time_diff < 3600:  # 1 hour
-                                client['status'] = 'dormant'
-                            else:
-                                client['status'] = 'offline'
-                        except Exception:
-                            client['status'] = 'unknown'
-        return clients or []
+        return list(iter_network_clients(api_key, network_id, timespan=timespan, use_cache=use_cache))
     except Exception as e:
         logging.error(f"Error getting network clients: {str(e)}")
         return []
@@ -609,7 +625,7 @@ def get_device_clients(api_key, serial, timespan=10800):
     """
     params = {"perPage": 1000, "timespan": timespan}
     try:
-        return make_meraki_request(api_key, f"/devices/{serial}/clients", params=params) or []
+        return make_meraki_request(api_key, f"/devices/{serial}/clients", params=params, total_pages='all') or []
     except Exception as e:
         logging.warning(f"Could not get device clients for {serial}: {str(e)}")
         return []
@@ -617,13 +633,9 @@ def get_device_clients(api_key, serial, timespan=10800):
 # ==================================================
 # GET Network Topology
 # ==================================================
-def get_network_devices(api_key, network_id):
+def get_network_devices(api_key, network_id, use_cache=True):
     """Get all devices in a network"""
-    headers = {
-        "X-Cisco-Meraki-API-Key": api_key,
-        "Content-Type": "application/json"
-    }
-    return make_meraki_request(api_key, f"/networks/{network_id}/devices", headers)
+    return make_meraki_request(api_key, f"/networks/{network_id}/devices", use_cache=use_cache)
 
 def get_network_name(api_key, network_id):
     """
@@ -753,181 +765,48 @@ def get_device_uplink(api_key, serial):
         logging.warning(f"Could not get device uplink: {str(e)}")
         return []
 
-def get_network_topology(api_key, network_id):
+def get_network_topology(api_key, network_id, deadline=None, as_graph=False, use_cache=True):
     """
     Get network topology data using the dedicated Meraki topology endpoint
-    
+
+    Devices, clients, topology links and the network name are fetched
+    concurrently, so the wait is that of the slowest call rather than their sum.
+
     Args:
         api_key (str): Meraki API key
         network_id (str): Network ID
+        deadline (float, optional): Seconds to wait for the calls before building
+            the topology from whatever arrived (default: TOPOLOGY_DEADLINE)
+        as_graph (bool): Return a TopologyGraph instead of the dict
+        use_cache (bool): Whether devices, clients and links may come from the
+            response cache; pass False to see the network as it is now
         
     Returns:
-        dict: Network topology data with nodes and links
+        dict: Network topology data with nodes and links. Sources that failed or
+        missed the deadline are listed under 'partial'; a network without
+        linkLayer support isn't partial, its links are built from device data.
+        With as_graph, the same as a TopologyGraph, with 'partial' in its metadata.
     """
-    # Get network devices
-    devices = get_network_devices(api_key, network_id)
-    
-    # Get network clients with a reasonable timespan (last 3 hours)
-    clients = get_network_clients(api_key, network_id, timespan=10800)
-    
-    # Get topology links directly from Meraki API
-    try:
-        topology_links = make_meraki_request(api_key, f"/networks/{network_id}/topology/linkLayer")
-    except Exception as e:
-        logging.warning(f"Could not get topology links from API, building manually: {str(e)}")
-        topology_links = []
-    
-    # Initialize topology data
-    topology_data = {
-        'network_name': get_network_name(api_key, network_id),
-        'nodes': [],
-        'links': []
-    }
-    
-    # Add devices as nodes
-    device_map = {}  # Map serial numbers to node indices
-    for i, device in enumerate(devices):
-        device_type = 'unknown'
-        if 'model' in device and device['model'] is not None:
-            model = device['model'].lower()
-            if 'mx' in model:
-                device_type = 'security_appliance'
-            elif 'ms' in model:
-                device_type = 'switch'
-            elif 'mr' in model:
-                device_type = 'wireless'
-            elif 'mv' in model:
-                device_type = 'camera'
-        
-        node = {
-            'id': device.get('serial', f"device_{i}"),
-            'label': device.get('name', 'Unknown Device'),
-            'type': device_type,
-            'model': device.get('model', 'Unknown'),
-            'ip': device.get('lanIp', 'No IP'),
-            'mac': device.get('mac', 'No MAC'),
-            'serial': device.get('serial', 'No Serial'),
-            'firmware': device.get('firmware', 'Unknown'),
-            'status': device.get('status', 'unknown')
-        }
-        
-        topology_data['nodes'].append(node)
-        device_map[device.get('serial')] = len(topology_data['nodes']) - 1
-    
-    # Add clients as nodes
-    for i, node in enumerate(topology_data['nodes']):
-        if node['type'] == 'client':
-            # Determine client type based on available information
-            client_type = 'unknown'
-            if 'deviceTypePrediction' in node and node['deviceTypePrediction'] is not None:
-                client_type = node['deviceTypePrediction'].lower()
-            elif 'manufacturer' in node and node['manufacturer'] is not None:
-                manufacturer = node['manufacturer'].lower()
-                if any(mobile in manufacturer for mobile in ['apple', 'samsung', 'lg', 'motorola', 'xiaomi']):
-                    client_type = 'mobile'
-                elif any(pc in manufacturer for pc in ['dell', 'hp', 'lenovo', 'microsoft', 'asus']):
-                    client_type = 'desktop'
-        
-            # Get the connection details
-            connection_details = {
-                'type': node.get('recentDeviceConnection', 'Unknown'),
-                'vlan': node.get('vlan', 'Unknown'),
-                'port': node.get('switchport', 'Unknown'),
-                'last_seen': node.get('lastSeen', 'Unknown')
-            }
-        
-            node = {
-                'id': node.get('id', f"client_{i}"),
-                'label': node.get('description', node.get('mac', 'Unknown Client')),
-                'type': 'client',
-                'client_type': client_type,
-                'ip': node.get('ip', 'No IP'),
-                'mac': node.get('mac', 'No MAC'),
-                'vlan': node.get('vlan', 'Unknown'),
-                'connection': connection_details,
-                'usage': node.get('usage', {})
-            }
-        
-            topology_data['nodes'].append(node)
-    
-    # Add links from the topology endpoint if available
-    if topology_links:
-        for link in topology_links:
-            source_serial = link.get('source', {}).get('serial')
-            dest_serial = link.get('destination', {}).get('serial')
-            
-            if source_serial in device_map and dest_serial in device_map:
-                topology_data['links'].append({
-                    'source': device_map[source_serial],
-                    'target': device_map[dest_serial],
-                    'type': link.get('linkType', 'unknown'),
-                    'status': link.get('status', 'unknown')
-                })
-    else:
-        # Fallback: build links based on device relationships
-        # Connect switches to security appliances
-        security_appliances = [i for i, node in enumerate(topology_data['nodes']) 
-                            if node['type'] == 'security_appliance']
-        switches = [i for i, node in enumerate(topology_data['nodes']) 
-                    if node['type'] == 'switch']
-        
-        # Connect all switches to the first security appliance if available
-        if security_appliances and switches:
-            for switch in switches:
-                topology_data['links'].append({
-                    'source': security_appliances[0],
-                    'target': switch,
-                    'type': 'wired',
-                    'status': 'active'
-                })
-        
-        # Connect switches to each other in a chain
-        for i in range(len(switches) - 1):
-            topology_data['links'].append({
-                'source': switches[i],
-                'target': switches[i + 1],
-                'type': 'wired',
-                'status': 'active'
-            })
-    
-    # Connect clients to their parent devices
-    for i, node in enumerate(topology_data['nodes']):
-        if node['type'] == 'client':
-            # Find the device this client is connected to
-            connected_to = None
-            
-            # For wireless clients
-            if node.get('connection', {}).get('type') == 'wireless':
-                # Find wireless APs
-                wireless_aps = [j for j, d in enumerate(topology_data['nodes']) 
-                                if d['type'] == 'wireless']
-                if wireless_aps:
-                    # Connect to the first AP (could be improved with actual connection data)
-                    connected_to = wireless_aps[0]
-            
-            # For wired clients
-            elif node.get('connection', {}).get('type') == 'wired':
-                # Try to find the switch with matching port
-                client_port = node.get('connection', {}).get('port')
-                client_vlan = node.get('connection', {}).get('vlan')
-                
-                for j, device in enumerate(topology_data['nodes']):
-                    if device['type'] == 'switch':
-                        # In a real implementation, you would check if this switch has the port
-                        # the client is connected to. For now, connect to any switch.
-                        connected_to = j
-                        break
-            
-            # If we found a device to connect to
-            if connected_to is not None:
-                topology_data['links'].append({
-                    'source': connected_to,
-                    'target': i,
-                    'type': node.get('connection', {}).get('type', 'unknown'),
-                    'status': 'active'
-                })
+    results = fetch_concurrently({
+        'devices': lambda: get_network_devices(api_key, network_id, use_cache=use_cache),
+        # Get network clients with a reasonable timespan (last 3 hours)
+        'clients': lambda: get_network_clients(api_key, network_id, timespan=10800, use_cache=use_cache),
+        # Get topology links directly from Meraki API
+        'links': lambda: get_network_topology_links(api_key, network_id, use_cache=use_cache),
+        'network_name': lambda: get_network_name(api_key, network_id)
+    }, deadline=TOPOLOGY_DEADLINE if deadline is None else deadline)
+
+    devices = results['devices']['data'] or []
+    clients = results['clients']['data'] or []
+    topology_links = results['links']['data'] or []
+    if results['links']['error']:
+        logging.warning(f"Could not get topology links from API, building manually: {results['links']['error']}")
     
-    return topology_data
+    topology_data = build_network_topology(devices, clients, topology_links,
+                                           results['network_name']['data'] or "Unknown Network")
+    topology_data['partial'] = [name for name, result in results.items() if result['error']]
+    topology_data['network_id'] = network_id
+    return TopologyGraph.from_topology(topology_data) if as_graph else topology_data
 
 def get_detailed_network_topology(api_key, network_id):
     """
@@ -984,27 +863,41 @@ def get_network(api_key, network_id):
 # ==================================================
 # GET Network Topology Links
 # ==================================================
-def get_network_topology_links(api_key, network_id):
+def get_network_topology_links(api_key, network_id, use_cache=True):
     """
     Get topology links for a network
     
     Args:
         api_key (str): Meraki API key
         network_id (str): Network ID
+        use_cache (bool): Whether to read and populate the response cache
         
     Returns:
-        list: List of topology links
+        list: List of topology links, or None if the network doesn't support
+        the linkLayer endpoint and links have to be built from device data
     """
     endpoint = f"/networks/{network_id}/topology/linkLayer"
-    return make_meraki_request(api_key, endpoint)
+    try:
+        return make_meraki_request(api_key, endpoint, use_cache=use_cache)
+    except requests.exceptions.HTTPError as e:
+        # Not every network supports linkLayer; that is expected, not a failure
+        if getattr(e.response, 'status_code', None) == 404:
+            logging.debug(f"Network {network_id} has no linkLayer topology, links will be built manually")
+            return None
+        raise
 
 # ==================================================
 # Helper function for making Meraki API requests
 # ==================================================
-def make_meraki_request(api_key, endpoint, headers=None, params=None, max_retries=3, retry_delay=1, timeout=30):
+def make_meraki_request(api_key, endpoint, headers=None, params=None, max_retries=3, retry_delay=1, timeout=30,
+                        total_pages=1, use_cache=True):
     """
     Make a request to the Meraki API with enhanced error handling and SSL verification
-    
+
+    Requests go through the shared pooled client for the API key, so consecutive
+    calls reuse keep-alive connections and the cached SSL context. Responses are
+    served from the shared response cache while fresh.
+
     Args:
         api_key (str): Meraki API key
         endpoint (str): The API endpoint URL
@@ -1013,150 +906,119 @@ def make_meraki_request(api_key, endpoint, headers=None, params=None, max_retrie
         max_retries (int): Maximum number of retry attempts
         retry_delay (int): Delay between retries in seconds
         timeout (int): Request timeout in seconds
-        
+        total_pages (int or str): Number of pages to follow via the Link header,
+            or 'all' (default: 1, a single request)
+        use_cache (bool): Whether to read and populate the response cache
+
     Returns:
         dict: JSON response from the API
     """
-    import time
-    import platform
-    import os
-    import ssl
-    import certifi
-    import logging
-    import urllib3
-    import requests
-    from requests.adapters import HTTPAdapter
-    from urllib3.poolmanager import PoolManager
-    from urllib3.util.retry import Retry
-
-    # Disable insecure request warnings when verification is disabled
-    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-
-    class TLSAdapter(HTTPAdapter):
-        """Custom adapter for handling TLS in proxy environments"""
-        def __init__(self, **kwargs):
-            self.ssl_context = ssl.create_default_context()
-            if platform.system() == 'Windows':
-                self.ssl_context.check_hostname = False
-                self.ssl_context.verify_mode = ssl.CERT_NONE
-            else:
-                self.ssl_context.load_verify_locations(certifi.where())
-            super().__init__(**kwargs)
+    client = get_client(api_key)
+    if total_pages == 1:
+        return client.get(endpoint, headers=headers, params=params, max_retries=max_retries,
+                          retry_delay=retry_delay, timeout=timeout, use_cache=use_cache)
+    return list(client.iter_records(endpoint, headers=headers, params=params, total_pages=total_pages,
+                                    max_retries=max_retries, retry_delay=retry_delay, timeout=timeout,
+                                    use_cache=use_cache))
+
+def invalidate_meraki_cache(endpoint_prefix=None):
+    """
+    Drop cached Meraki responses, e.g. after changing configuration
 
-        def init_poolmanager(self, *args, **kwargs):
-            kwargs['ssl_context'] = self.ssl_context
-            return super().init_poolmanager(*args, **kwargs)
+    Args:
+        endpoint_prefix (str, optional): Only drop endpoints starting with this path,
+            e.g. "/networks/N_123"; None drops everything
 
-    # Ensure endpoint starts with a slash
-    if not endpoint.startswith('/'):
-        endpoint = '/' + endpoint
-    
-    # Create default headers if not provided
-    if headers is None:
-        headers = {
-            "X-Cisco-Meraki-API-Key": api_key,
-            "Content-Type": "application/json"
-        }
-    
-    # Special handling for known endpoints that might return 404 for some devices
-    is_uplink_endpoint = '/uplink' in endpoint
-    is_topology_linklayer_endpoint = '/topology/linkLayer' in endpoint
-    
-    # Clear any conflicting environment variables
-    if 'REQUESTS_CA_BUNDLE' in os.environ:
-        del os.environ['REQUESTS_CA_BUNDLE']
-    if 'SSL_CERT_FILE' in os.environ:
-        del os.environ['SSL_CERT_FILE']
-    
-    # For Windows environments with proxies (like Zscaler), we'll use a more direct approach
-    is_windows = platform.system() == 'Windows'
-    
-    # Configure session with our custom adapter for Windows
-    session = requests.Session()
-    if is_windows:
-        # Use our custom TLS adapter for Windows environments
-        adapter = TLSAdapter()
-        session.mount('https://', adapter)
-        verify = False  # Start with verification disabled on Windows
-        logging.info("Using Windows-specific SSL configuration")
-    else:
-        # For non-Windows, try to use system certificates first
-        verify = certifi.where()
-    
-    # Make the request with retries
-    for attempt in range(max_retries):
-        try:
-            url = f"{BASE_URL}{endpoint}"
-            logging.info(f"Making request to {url} with timeout {timeout}s")
-            
-            # Use session for the request
-            response = session.get(url, headers=headers, params=params, verify=verify, timeout=timeout)
-            
-            # Handle 404 errors for uplink endpoint specially
-            if response.status_code == 404 and is_uplink_endpoint:
-                device_serial = endpoint.split('/')[-2]  # Extract device serial from URL
-                logging.warning(f"Device {device_serial} does not support uplink information")
-                return []  # Return empty list for uplink endpoint
-            
-            # Handle 404 errors for topology/linkLayer endpoint specially (not available for all networks)
-            # Don't retry 404s for this endpoint - it's expected for some network types
-            if response.status_code == 404 and is_topology_linklayer_endpoint:
-                logging.debug("Topology linkLayer endpoint not available for this network, will use fallback method")
-                # Raise immediately to skip retries - this will be caught by get_network_topology
-                response.raise_for_status()  # This will raise HTTPError with 404
-            
-            # Check for successful response
-            response.raise_for_status()
-            
-            # Return JSON response
-            return response.json()
-            
-        except requests.exceptions.SSLError as e:
-            logging.error(f"SSL error: {str(e)}")
-            
-            # If we're already not verifying, or this is the last attempt, try one more approach
-            if not verify and attempt == max_retries - 1:
-                try:
-                    # Last resort: Try with requests directly and completely disable verification
-                    logging.warning("Trying final fallback method for SSL verification")
-                    response = requests.get(url, headers=headers, params=params, verify=False, timeout=timeout)
-                    response.raise_for_status()
-                    return response.json()
-                except Exception as inner_e:
-                    logging.error(f"Final fallback request failed: {str(inner_e)}")
-                    raise
-            
-            # Try again without SSL verification
-            logging.warning("SSL verification failed, retrying without verification")
-            verify = False
-            
-        except requests.exceptions.HTTPError as e:
-            # Special handling for 404 on topology/linkLayer endpoint - don't retry
-            if is_topology_linklayer_endpoint and e.response is not None and e.response.status_code == 404:
-                logging.debug("Topology linkLayer endpoint not available, skipping retries")
-                raise  # Re-raise immediately without retrying
-            # For other HTTP errors, fall through to RequestException handling below
-            # (HTTPError is a subclass of RequestException)
-            
-        except requests.exceptions.RequestException as e:
-            # Skip retries for 404 on topology/linkLayer (caught as RequestException)
-            if is_topology_linklayer_endpoint and "404" in str(e):
-                logging.debug("Topology linkLayer endpoint not available, skipping retries")
-                raise  # Re-raise immediately without retrying
-                
-            logging.error(f"Request failed: {str(e)}")
-            
-            # If this is the last attempt, re-raise
-            if attempt == max_retries - 1:
-                # Special handling for 404 on uplink endpoint
-                if is_uplink_endpoint and "404" in str(e):
-                    device_serial = endpoint.split('/')[-2]  # Extract device serial from URL
-                    logging.warning(f"Device {device_serial} does not support uplink information")
-                    return []  # Return empty list for uplink endpoint
-                raise
-            
-            # Wait before retrying
-            time.sleep(retry_delay * (2 ** attempt))  # Exponential backoff
+    Returns:
+        int: Number of in-memory entries dropped
+    """
+    return get_response_cache().invalidate(endpoint_prefix)
+
+def get_meraki_negative_cache_entries():
+    """
+    List per-device and per-network endpoints remembered as unsupported (404)
+
+    Returns:
+        list: Dictionaries with template, id, base URL, recorded time and seconds until expiry
+    """
+    return get_negative_cache().entries()
+
+def clear_meraki_negative_cache(template=None, item_id=None):
+    """
+    Forget remembered 404s so the endpoints are requested again
+
+    Args:
+        template (str, optional): Only forget this endpoint template, e.g. "/devices/{serial}/uplink"
+        item_id (str, optional): Only forget this serial or network ID
+
+    Returns:
+        int: Number of entries forgotten
+    """
+    return get_negative_cache().clear(template, item_id)
+
+def get_meraki_cache_stats():
+    """
+    Get hit/miss counters and memory usage of the response cache
+
+    Returns:
+        dict: Cache summary
+    """
+    return get_response_cache().summary()
+
+def iter_meraki_pages(api_key, endpoint, params=None, per_page=None, starting_after=None, ending_before=None,
+                      total_pages='all', max_records=None, **kwargs):
+    """
+    Stream the pages of a paginated Meraki endpoint as they arrive
+
+    Args:
+        api_key (str): Meraki API key
+        endpoint (str): The API endpoint URL
+        params (dict): Query parameters for the first page
+        per_page (int, optional): Number of entries per page
+        starting_after (str, optional): Cursor to start after
+        ending_before (str, optional): Cursor to end before
+        total_pages (int or str): Maximum number of pages, or 'all'
+        max_records (int, optional): Stop after this many records
+
+    Yields:
+        list: One page of records at a time
+    """
+    return get_client(api_key).iter_pages(endpoint, params=params, per_page=per_page,
+                                          starting_after=starting_after, ending_before=ending_before,
+                                          total_pages=total_pages, max_records=max_records, **kwargs)
+
+def iter_meraki_records(api_key, endpoint, params=None, per_page=None, starting_after=None, ending_before=None,
+                        total_pages='all', max_records=None, stream=False, use_cache=True, **kwargs):
+    """
+    Stream the individual records of a paginated Meraki endpoint
+
+    With stream=True each page is requested gzip-compressed and decoded
+    incrementally as it downloads, so memory stays flat however large the
+    organization is. Streamed pages are not cached.
+
+    Args:
+        api_key (str): Meraki API key
+        endpoint (str): The API endpoint URL
+        params (dict): Query parameters for the first page
+        per_page (int, optional): Number of entries per page
+        starting_after (str, optional): Cursor to start after
+        ending_before (str, optional): Cursor to end before
+        total_pages (int or str): Maximum number of pages, or 'all'
+        max_records (int, optional): Stop after this many records
+        stream (bool): Decode pages incrementally instead of buffering them
+        use_cache (bool): Whether to read and populate the response cache
+
+    Yields:
+        dict: One record at a time
+    """
+    client = get_client(api_key)
+    if stream:
+        return client.iter_stream(endpoint, params=params, per_page=per_page,
+                                  starting_after=starting_after, ending_before=ending_before,
+                                  total_pages=total_pages, max_records=max_records, **kwargs)
+    return client.iter_records(endpoint, params=params, per_page=per_page,
+                               starting_after=starting_after, ending_before=ending_before,
+                               total_pages=total_pages, max_records=max_records, use_cache=use_cache, **kwargs)
 
 # Secure API key management functions
 def generate_key():
@@ -0,0 +1,557 @@
+"""
+Meraki Async API Module
+
+This module provides an asyncio-native client for the Meraki Dashboard API built
+on aiohttp, together with async counterparts of the ``get_*`` functions in
+meraki_api. It shares the retry, pagination and rate limit semantics of the
+synchronous client, and draws from the same process-wide rate limit buckets, so
+sync and async callers never exceed the organization budget together.
+
+Example:
+    async def sweep(api_key, network_ids):
+        return await asyncio.gather(*(get_network_devices(api_key, n) for n in network_ids))
+"""
+
+import asyncio
+import json
+import logging
+import platform
+import threading
+import time
+import weakref
+
+import aiohttp
+from multidict import CIMultiDict, CIMultiDictProxy
+from yarl import URL
+
+from modules.meraki.meraki_client import (
+    DEFAULT_POOL_SIZE, DEFAULT_TIMEOUT, MAX_RETRIES, RETRY_DELAY, MAX_THROTTLE_RETRIES,
+    endpoint_path, get_base_url, get_ssl_context
+)
+from modules.meraki.meraki_cache import CacheEntry, cache_key, get_negative_cache, get_response_cache
+from modules.meraki.meraki_cassette import CassetteMiss, get_cassette, interaction_key
+from modules.meraki.meraki_singleflight import AsyncSingleFlight
+from modules.meraki.meraki_ratelimit import get_rate_limiter, parse_retry_after
+
+# One client per API key per event loop, since aiohttp sessions are bound to a loop
+_clients = weakref.WeakKeyDictionary()
+_clients_lock = threading.Lock()
+
+
+class AsyncResponse:
+    """Fully read response, usable after the connection is released"""
+
+    def __init__(self, status, headers, url, links, body, reason=None, request_info=None):
+        self.status = status
+        self.headers = headers
+        self.url = url
+        self.links = links
+        self.body = body
+        self.reason = reason
+        self.request_info = request_info
+
+    def raise_for_status(self):
+        """Raise ClientResponseError for 4xx and 5xx statuses"""
+        if self.status >= 400:
+            request_info = self.request_info or aiohttp.RequestInfo(URL(self.url), 'GET',
+                                                                    CIMultiDictProxy(CIMultiDict()), URL(self.url))
+            raise aiohttp.ClientResponseError(request_info, (), status=self.status, message=self.reason or '',
+                                              headers=self.headers)
+
+    def json(self):
+        """Decode the body as JSON"""
+        return json.loads(self.body) if self.body else None
+
+
+class AsyncMerakiClient:
+    """
+    Pooled, keep-alive asyncio client for the Meraki Dashboard API.
+    """
+
+    def __init__(self, api_key, base_url=None, pool_size=DEFAULT_POOL_SIZE, timeout=DEFAULT_TIMEOUT):
+        """
+        Initialize the client.
+
+        Args:
+            api_key (str): Meraki API key
+            base_url (str, optional): Dashboard API base URL (default: get_base_url())
+            pool_size (int): Maximum number of concurrent connections
+            timeout (int): Default request timeout in seconds
+        """
+        self.api_key = api_key
+        self.base_url = (base_url or get_base_url()).rstrip('/')
+        self.pool_size = pool_size
+        self.timeout = timeout
+        # Start with verification disabled on Windows, matching the sync client
+        self.verify = platform.system() != 'Windows'
+        self.rate_limiter = get_rate_limiter()
+        self.cache = get_response_cache()
+        self.negative_cache = get_negative_cache()
+        self.singleflight = AsyncSingleFlight()
+        self.cassette = get_cassette()
+        self.stats = {'requests': 0, 'retries': 0, 'errors': 0, 'throttled': 0}
+        self._session = None
+
+    @property
+    def default_headers(self):
+        """Headers sent with every request"""
+        return {
+            "X-Cisco-Meraki-API-Key": self.api_key,
+            "Content-Type": "application/json"
+        }
+
+    @property
+    def session(self):
+        """The client's aiohttp session, created on first use"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=60)
+            self._session = aiohttp.ClientSession(connector=connector, headers=self.default_headers)
+        return self._session
+
+    async def _send(self, url, endpoint, headers, params, timeout):
+        """
+        Send one request under the shared rate limit, waiting out 429 responses.
+
+        Returns:
+            AsyncResponse: The first non-429 response. Error statuses, including a
+            429 once MAX_THROTTLE_RETRIES is exhausted, raise ClientResponseError.
+        """
+        for attempt in range(MAX_THROTTLE_RETRIES + 1):
+            await self.rate_limiter.acquire_async(self.api_key, endpoint)
+            self.stats['requests'] += 1
+            if self.cassette is not None and not self.cassette.recording:
+                recorded = self.cassette.replay(interaction_key('GET', url, params, headers))
+                response = AsyncResponse(recorded.status, CIMultiDictProxy(CIMultiDict(recorded.headers)),
+                                         url, recorded.links, recorded.body, recorded.reason)
+            else:
+                started = time.perf_counter()
+                async with self.session.get(url, headers=headers, params=params, ssl=get_ssl_context(self.verify),
+                                            timeout=aiohttp.ClientTimeout(total=timeout)) as raw:
+                    body = await raw.read()
+                    response = AsyncResponse(raw.status, raw.headers, str(raw.url),
+                                             {str(rel): str(link.get('url')) for rel, link in raw.links.items()},
+                                             body, raw.reason, raw.request_info)
+                if self.cassette is not None:
+                    self.cassette.record(interaction_key('GET', response.url, headers=headers), raw.status,
+                                         raw.reason, raw.headers, body, time.perf_counter() - started)
+            if response.status == 429 and attempt < MAX_THROTTLE_RETRIES:
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            else:
+                response.raise_for_status()
+                return response
+            self.stats['throttled'] += 1
+            self.rate_limiter.throttle(self.api_key, endpoint, retry_after)
+
+    async def request(self, endpoint, headers=None, params=None, max_retries=MAX_RETRIES,
+                      retry_delay=RETRY_DELAY, timeout=None):
+        """
+        Send a GET request with retries and the Meraki-specific 404 handling.
+
+        Args:
+            endpoint (str): The API endpoint path, or an absolute pagination URL
+            headers (dict): Optional extra request headers
+            params (dict): Query parameters
+            max_retries (int): Maximum number of retry attempts
+            retry_delay (int): Base delay between retries in seconds
+            timeout (int): Request timeout in seconds
+
+        Returns:
+            AsyncResponse: The successful response, or None when the device
+            does not support the uplink endpoint
+        """
+        url = endpoint if endpoint.startswith(('http://', 'https://')) else None
+        endpoint = endpoint_path(endpoint, self.base_url)
+        if url is None:
+            url = f"{self.base_url}{endpoint}"
+        if timeout is None:
+            timeout = self.timeout
+        if params:
+            # aiohttp only accepts str/int/float query values
+            params = {key: str(value).lower() if isinstance(value, bool) else value
+                      for key, value in params.items() if value is not None}
+
+        # Special handling for known endpoints that might return 404 for some devices
+        is_uplink_endpoint = '/uplink' in endpoint
+        is_topology_linklayer_endpoint = '/topology/linkLayer' in endpoint
+
+        # Skip endpoints already known to 404 for this device or network
+        if self.negative_cache.contains(endpoint, self.api_key, self.base_url):
+            logging.debug(f"Skipping {endpoint}, known to be unsupported")
+            if is_uplink_endpoint:
+                return None
+            request_info = aiohttp.RequestInfo(URL(url), 'GET', CIMultiDictProxy(CIMultiDict()), URL(url))
+            raise aiohttp.ClientResponseError(request_info, (), status=404, message="Not Found (remembered)")
+
+        for attempt in range(max_retries):
+            try:
+                logging.info(f"Making async request to {url} with timeout {timeout}s")
+                return await self._send(url, endpoint, headers, params, timeout)
+
+            except CassetteMiss:
+                self.stats['errors'] += 1
+                raise
+
+            except aiohttp.ClientSSLError as e:
+                logging.error(f"SSL error: {str(e)}")
+                self.stats['errors'] += 1
+                if not self.verify and attempt == max_retries - 1:
+                    raise
+                logging.warning("SSL verification failed, retrying without verification")
+                self.verify = False
+                self.stats['retries'] += 1
+
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                self.stats['errors'] += 1
+                status_code = getattr(e, 'status', None)
+
+                if status_code == 404 and is_uplink_endpoint:
+                    device_serial = endpoint.split('/')[-2]
+                    logging.warning(f"Device {device_serial} does not support uplink information")
+                    self.negative_cache.add(endpoint, self.api_key, self.base_url)
+                    return None
+
+                # Skip retries for 404 on topology/linkLayer
+                if status_code == 404 and is_topology_linklayer_endpoint:
+                    logging.debug("Topology linkLayer endpoint not available, skipping retries")
+                    self.negative_cache.add(endpoint, self.api_key, self.base_url)
+                    raise
+
+                logging.error(f"Async request failed: {str(e) or type(e).__name__}")
+                if attempt == max_retries - 1:
+                    raise
+
+                self.stats['retries'] += 1
+                await asyncio.sleep(retry_delay * (2 ** attempt))  # Exponential backoff
+
+    async def fetch(self, endpoint, headers=None, params=None, use_cache=True, **kwargs):
+        """
+        Fetch one response body, serving it from the shared response cache when fresh.
+
+        Expired entries with validators are revalidated with a conditional
+        request, as in MerakiHTTPClient.fetch().
+        Concurrent identical fetches on the loop are coalesced into one request.
+
+        Args:
+            endpoint (str): The API endpoint path, or an absolute pagination URL
+            headers (dict): Optional extra request headers
+            params (dict): Query parameters
+            use_cache (bool): Whether to read and populate the response cache
+            **kwargs: Retry and timeout options passed to request()
+
+        Returns:
+            CacheEntry: Raw body and pagination links, or None when the device
+            does not support the uplink endpoint
+        """
+        path = endpoint_path(endpoint, self.base_url)
+        key = cache_key(self.api_key, endpoint, params, self.base_url)
+        if use_cache:
+            entry = self.cache.get(key)
+            if entry is not None:
+                return entry
+        if headers:
+            # Custom headers may change the response, so don't share the call
+            return await self._download(key, path, endpoint, headers, params, use_cache, **kwargs)
+        return await self.singleflight.do(
+            key, lambda: self._download(key, path, endpoint, None, params, use_cache, **kwargs))
+
+    async def _download(self, key, path, endpoint, headers, params, use_cache, **kwargs):
+        """Request a response body, revalidating an expired cache entry when possible"""
+        stale = None
+        if use_cache:
+            # Revalidate an expired copy instead of downloading it again
+            stale = self.cache.lookup(key, allow_stale=True)
+            if stale is not None and stale.conditional_headers():
+                headers = {**(headers or {}), **stale.conditional_headers()}
+            else:
+                stale = None
+
+        response = await self.request(endpoint, headers=headers, params=params, **kwargs)
+        if response is None:
+            return None
+        if response.status == 304 and stale is not None:
+            return self.cache.revalidated(key, stale)
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        entry = None
+        if use_cache:
+            entry = self.cache.put(key, path, response.body, response.links, etag=etag, last_modified=last_modified)
+        return entry or CacheEntry(path, response.body, response.links, etag=etag, last_modified=last_modified)
+
+    async def get(self, endpoint, headers=None, params=None, use_cache=True, **kwargs):
+        """
+        Make a GET request and decode the JSON body.
+
+        Args:
+            endpoint (str): The API endpoint path
+            headers (dict): Optional extra request headers
+            params (dict): Query parameters
+            use_cache (bool): Whether to read and populate the response cache
+            **kwargs: Retry and timeout options passed to request()
+
+        Returns:
+            dict: JSON response from the API
+        """
+        entry = await self.fetch(endpoint, headers=headers, params=params, use_cache=use_cache, **kwargs)
+        if entry is None:
+            return []  # Return empty list for uplink endpoint
+        data = entry.json()
+        self.rate_limiter.learn(endpoint_path(endpoint, self.base_url), data)
+        return data
+
+    async def iter_pages(self, endpoint, headers=None, params=None, per_page=None, starting_after=None,
+                         ending_before=None, total_pages='all', max_records=None, use_cache=True, **kwargs):
+        """
+        Iterate over the pages of a paginated endpoint as they arrive.
+
+        Follows the same Link header and cursor rules as
+        MerakiHTTPClient.iter_pages().
+
+        Yields:
+            list: One decoded page at a time (a non-list body is yielded once)
+        """
+        params = dict(params or {})
+        if per_page is not None:
+            params['perPage'] = per_page
+        if starting_after is not None:
+            params['startingAfter'] = starting_after
+        if ending_before is not None:
+            params['endingBefore'] = ending_before
+        direction = 'prev' if ending_before is not None and starting_after is None else 'next'
+        if total_pages in ('all', -1, None):
+            total_pages = None
+
+        target = endpoint
+        pages = 0
+        records = 0
+        while target:
+            entry = await self.fetch(target, headers=headers, params=params, use_cache=use_cache, **kwargs)
+            if entry is None:
+                return
+            page = entry.json()
+            pages += 1
+            self.rate_limiter.learn(endpoint_path(endpoint, self.base_url), page)
+
+            if not isinstance(page, list):
+                yield page
+                return
+
+            if max_records is not None and records + len(page) >= max_records:
+                yield page[:max_records - records]
+                return
+            records += len(page)
+            yield page
+
+            if total_pages is not None and pages >= total_pages:
+                return
+
+            # The Link URL already carries the cursor and the original query
+            target = entry.links.get(direction)
+            params = None
+
+    async def iter_records(self, endpoint, **kwargs):
+        """
+        Iterate over the individual records of a paginated endpoint.
+
+        Yields:
+            dict: One record at a time
+        """
+        async for page in self.iter_pages(endpoint, **kwargs):
+            if isinstance(page, list):
+                for record in page:
+                    yield record
+            else:
+                yield page
+
+    async def get_all(self, endpoint, **kwargs):
+        """Collect every record of a paginated endpoint into a list"""
+        return [record async for record in self.iter_records(endpoint, **kwargs)]
+
+    async def close(self):
+        """Close the session and release pooled connections"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        if self.cassette is not None and self.cassette.recording:
+            self.cassette.save()
+
+
+def get_async_client(api_key, pool_size=None):
+    """
+    Get the shared async client for an API key on the running event loop.
+
+    Args:
+        api_key (str): Meraki API key
+        pool_size (int, optional): Connection limit if the client is created now
+
+    Returns:
+        AsyncMerakiClient: Client for the API key
+    """
+    loop = asyncio.get_running_loop()
+    with _clients_lock:
+        loop_clients = _clients.setdefault(loop, {})
+        client = loop_clients.get(api_key)
+        if (client is None or client.base_url != get_base_url().rstrip('/')
+                or client.cassette is not get_cassette()):
+            client = AsyncMerakiClient(api_key, pool_size=pool_size or DEFAULT_POOL_SIZE)
+            loop_clients[api_key] = client
+        return client
+
+
+async def close_async_clients():
+    """Close every async client bound to the running event loop"""
+    loop = asyncio.get_running_loop()
+    with _clients_lock:
+        clients = list(_clients.pop(loop, {}).values())
+    for client in clients:
+        await client.close()
+
+
+async def make_meraki_request_async(api_key, endpoint, params=None, total_pages=1, **kwargs):
+    """
+    Async counterpart of meraki_api.make_meraki_request
+
+    Args:
+        api_key (str): Meraki API key
+        endpoint (str): The API endpoint URL
+        params (dict): Query parameters
+        total_pages (int or str): Number of pages to follow, or 'all'
+
+    Returns:
+        dict: JSON response from the API
+    """
+    client = get_async_client(api_key)
+    if total_pages == 1:
+        return await client.get(endpoint, params=params, **kwargs)
+    return await client.get_all(endpoint, params=params, total_pages=total_pages, **kwargs)
+
+
+# ==================================================
+# ASYNC counterparts of the meraki_api getters
+# ==================================================
+async def get_organizations(api_key):
+    """Get a list of organizations accessible by the user"""
+    return await make_meraki_request_async(api_key, "/organizations")
+
+
+async def get_organization_networks(api_key, org_id):
+    """Get every network of an organization"""
+    return await make_meraki_request_async(api_key, f"/organizations/{org_id}/networks",
+                                           params={"perPage": 5000}, total_pages='all')
+
+
+async def get_organization_devices(api_key, organization_id):
+    """Get every device of an organization"""
+    return await make_meraki_request_async(api_key, f"/organizations/{organization_id}/devices", total_pages='all')
+
+
+async def get_organization_devices_statuses(api_key, organization_id):
+    """
+    Get device status information for an organization with enhanced data retrieval
+
+    Args:
+        api_key (str): Meraki API key
+        organization_id (str): Organization ID
+
+    Returns:
+        list: List of device status dictionaries with enhanced information
+    """
+    from modules.meraki.meraki_api import enrich_device_status
+    try:
+        statuses = await make_meraki_request_async(api_key, f"/organizations/{organization_id}/devices/statuses",
+                                                   params={"perPage": 1000}, total_pages='all')
+        return [enrich_device_status(device) for device in statuses or []]
+    except Exception as e:
+        logging.error(f"Error getting organization device statuses: {str(e)}")
+        return []
+
+
+async def get_network(api_key, network_id):
+    """Get details for a specific network"""
+    return await make_meraki_request_async(api_key, f"/networks/{network_id}")
+
+
+async def get_network_name(api_key, network_id):
+    """Get the name of a network, or 'Unknown Network' if not found"""
+    try:
+        network = await get_network(api_key, network_id)
+        return network.get('name', "Unknown Network")
+    except Exception as e:
+        logging.error(f"Error getting network name: {str(e)}")
+        return "Unknown Network"
+
+
+async def get_network_devices(api_key, network_id):
+    """Get all devices in a network"""
+    return await make_meraki_request_async(api_key, f"/networks/{network_id}/devices")
+
+
+async def get_network_clients(api_key, network_id, timespan=10800):
+    """
+    Get clients connected to a network with enhanced parameters for better data retrieval
+
+    Args:
+        api_key (str): Meraki API key
+        network_id (str): Network ID
+        timespan (int): Timespan in seconds for which clients are fetched (default: 10800 = 3 hours)
+
+    Returns:
+        list: List of client devices with enhanced information
+    """
+    from modules.meraki.meraki_api import enrich_client_status
+    try:
+        clients = await make_meraki_request_async(api_key, f"/networks/{network_id}/clients",
+                                                  params={"perPage": 1000, "timespan": timespan}, total_pages='all')
+        return [enrich_client_status(client) for client in clients or []]
+    except Exception as e:
+        logging.error(f"Error getting network clients: {str(e)}")
+        return []
+
+
+async def get_device_clients(api_key, serial, timespan=10800):
+    """Get clients connected to a specific device"""
+    try:
+        return await make_meraki_request_async(api_key, f"/devices/{serial}/clients",
+                                               params={"perPage": 1000, "timespan": timespan},
+                                               total_pages='all') or []
+    except Exception as e:
+        logging.warning(f"Could not get device clients for {serial}: {str(e)}")
+        return []
+
+
+async def get_device_uplink(api_key, serial):
+    """Get device uplink information as a list of uplink interface dictionaries"""
+    try:
+        uplink_data = await make_meraki_request_async(api_key, f"/devices/{serial}/uplink")
+        if isinstance(uplink_data, list):
+            return uplink_data
+        elif isinstance(uplink_data, dict):
+            return [uplink_data] if uplink_data else []
+        return []
+    except Exception as e:
+        logging.warning(f"Could not get device uplink: {str(e)}")
+        return []
+
+
+async def get_switch_ports(api_key, serial):
+    """Get switch port statuses, or an empty list on failure"""
+    try:
+        return await make_meraki_request_async(api_key, f"/devices/{serial}/switch/ports/statuses")
+    except Exception as e:
+        logging.warning(f"Could not get switch port information for {serial}: {str(e)}")
+        return []
+
+
+async def get_switch_ports_config(api_key, serial):
+    """Get switch port configuration"""
+    return await make_meraki_request_async(api_key, f"/devices/{serial}/switch/ports")
+
+
+async def get_switch_ports_statuses_with_timespan(api_key, serial, timespan=1800):
+    """Get switch port statuses over a timespan"""
+    return await make_meraki_request_async(api_key, f"/devices/{serial}/switch/ports/statuses",
+                                           params={"timespan": timespan})
+
+
+async def get_network_topology_links(api_key, network_id):
+    """Get link layer topology links for a network"""
+    return await make_meraki_request_async(api_key, f"/networks/{network_id}/topology/linkLayer")
@@ -0,0 +1,225 @@
+"""
+Meraki Bulk Fan-out Module
+
+This module runs the same per-device or per-network request for many serials or
+network IDs with bounded parallelism. Requests go through the shared pooled
+client and the process-wide rate limiter, so a bulk run uses the whole
+organization budget without tripping throttling. Failures are reported per
+item instead of aborting the run.
+
+fetch_concurrently() does the same for a handful of unrelated calls, such as the
+devices, clients and links that make up a topology, under an overall deadline.
+
+Example:
+    results = fetch_for_devices(api_key, "/devices/{serial}/switch/ports/statuses", serials, concurrency=10)
+    for serial, result in results.items():
+        if result['error']:
+            print(f"{serial}: {result['error']}")
+"""
+
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+
+from modules.meraki.meraki_client import get_client
+
+# Seconds topology builders wait for their API calls before using partial results
+TOPOLOGY_DEADLINE = float(os.getenv('MERAKI_TOPOLOGY_DEADLINE', '60'))
+
+
+def _result(data=None, error=None):
+    return {'data': data, 'error': error}
+
+
+def fetch_many(api_key, endpoint_template, ids, placeholder, concurrency=None, params=None,
+               total_pages=1, on_result=None):
+    """
+    Fetch an endpoint for many IDs in parallel.
+
+    Args:
+        api_key (str): Meraki API key
+        endpoint_template (str or callable): Endpoint path with a ``{placeholder}``
+            field, e.g. "/devices/{serial}/uplink", or a getter called as
+            ``getter(api_key, id)`` such as meraki_api.get_device_uplink
+        ids (list): IDs to substitute into the template
+        placeholder (str): Name of the template field
+        concurrency (int, optional): Maximum parallel requests (default: the client's pool size)
+        params (dict, optional): Query parameters sent with every request
+        total_pages (int or str): Pages to follow per request, or 'all'
+        on_result (callable, optional): Called as ``on_result(id, result)`` as each item completes
+
+    Returns:
+        dict: ``{id: {'data': ..., 'error': None or str}}`` in input order
+    """
+    ids = list(dict.fromkeys(i for i in ids if i))
+    if not ids:
+        return {}
+    client = get_client(api_key)
+    if concurrency is None:
+        concurrency = client.pool_size
+    concurrency = max(1, min(concurrency, len(ids)))
+
+    def fetch(item_id):
+        if callable(endpoint_template):
+            return endpoint_template(api_key, item_id)
+        endpoint = endpoint_template.format(**{placeholder: item_id})
+        if total_pages == 1:
+            return client.get(endpoint, params=params)
+        return list(client.iter_records(endpoint, params=params, total_pages=total_pages))
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='meraki-bulk') as executor:
+        futures = {executor.submit(fetch, item_id): item_id for item_id in ids}
+        for future in as_completed(futures):
+            item_id = futures[future]
+            try:
+                result = _result(data=future.result())
+            except Exception as e:
+                logging.warning(f"Bulk request failed for {item_id}: {str(e)}")
+                result = _result(error=str(e))
+            results[item_id] = result
+            if on_result:
+                on_result(item_id, result)
+
+    return {item_id: results[item_id] for item_id in ids}
+
+
+def fetch_concurrently(calls, deadline=None):
+    """
+    Run independent calls in parallel and collect what finished before a deadline.
+
+    Calls still running at the deadline are abandoned: their results are
+    dropped and their threads are left to finish in the background.
+
+    Args:
+        calls (dict): ``{name: callable}`` taking no arguments
+        deadline (float, optional): Seconds to wait for all calls (default: no limit)
+
+    Returns:
+        dict: ``{name: {'data': ..., 'error': None or str}}`` in input order, with
+        error "timed out" for calls that missed the deadline
+    """
+    if not calls:
+        return {}
+    started = time.perf_counter()
+    executor = ThreadPoolExecutor(max_workers=len(calls), thread_name_prefix='meraki-gather')
+    futures = {name: executor.submit(call) for name, call in calls.items()}
+    wait(futures.values(), timeout=deadline)
+    executor.shutdown(wait=False, cancel_futures=True)
+
+    results = {}
+    for name, future in futures.items():
+        if not future.done():
+            logging.warning(f"{name} did not finish within {deadline}s, continuing without it")
+            results[name] = _result(error='timed out')
+            continue
+        try:
+            results[name] = _result(data=future.result())
+        except Exception as e:
+            logging.warning(f"{name} failed: {str(e)}")
+            results[name] = _result(error=str(e))
+    logging.debug(f"Gathered {', '.join(calls)} in {time.perf_counter() - started:.2f}s")
+    return results
+
+
+def fetch_for_devices(api_key, endpoint_template, serials, concurrency=None, params=None,
+                      total_pages=1, on_result=None):
+    """
+    Fetch a per-device endpoint for many serials in parallel.
+
+    Args:
+        api_key (str): Meraki API key
+        endpoint_template (str or callable): Endpoint path containing ``{serial}``,
+            or a getter called as ``getter(api_key, serial)``
+        serials (list): Device serial numbers
+        concurrency (int, optional): Maximum parallel requests
+        params (dict, optional): Query parameters sent with every request
+        total_pages (int or str): Pages to follow per request, or 'all'
+        on_result (callable, optional): Called as ``on_result(serial, result)`` as each item completes
+
+    Returns:
+        dict: ``{serial: {'data': ..., 'error': None or str}}``
+    """
+    return fetch_many(api_key, endpoint_template, serials, 'serial', concurrency=concurrency,
+                      params=params, total_pages=total_pages, on_result=on_result)
+
+
+def fetch_for_networks(api_key, endpoint_template, network_ids, concurrency=None, params=None,
+                       total_pages=1, on_result=None):
+    """
+    Fetch a per-network endpoint for many network IDs in parallel.
+
+    Args:
+        api_key (str): Meraki API key
+        endpoint_template (str or callable): Endpoint path containing ``{network_id}``,
+            or a getter called as ``getter(api_key, network_id)``
+        network_ids (list): Network IDs
+        concurrency (int, optional): Maximum parallel requests
+        params (dict, optional): Query parameters sent with every request
+        total_pages (int or str): Pages to follow per request, or 'all'
+        on_result (callable, optional): Called as ``on_result(network_id, result)`` as each item completes
+
+    Returns:
+        dict: ``{network_id: {'data': ..., 'error': None or str}}``
+    """
+    return fetch_many(api_key, endpoint_template, network_ids, 'network_id', concurrency=concurrency,
+                      params=params, total_pages=total_pages, on_result=on_result)
+
+
+async def fetch_many_async(api_key, endpoint_template, ids, placeholder, concurrency=None, params=None,
+                           total_pages=1):
+    """
+    Async counterpart of fetch_many() running on the current event loop.
+
+    Args:
+        api_key (str): Meraki API key
+        endpoint_template (str or callable): Endpoint path with a ``{placeholder}``
+            field, or a coroutine function called as ``getter(api_key, id)``
+        ids (list): IDs to substitute into the template
+        placeholder (str): Name of the template field
+        concurrency (int, optional): Maximum requests in flight
+        params (dict, optional): Query parameters sent with every request
+        total_pages (int or str): Pages to follow per request, or 'all'
+
+    Returns:
+        dict: ``{id: {'data': ..., 'error': None or str}}`` in input order
+    """
+    from modules.meraki.meraki_async import get_async_client
+
+    ids = list(dict.fromkeys(i for i in ids if i))
+    if not ids:
+        return {}
+    client = get_async_client(api_key)
+    semaphore = asyncio.Semaphore(max(1, concurrency or client.pool_size))
+
+    async def fetch(item_id):
+        async with semaphore:
+            try:
+                if callable(endpoint_template):
+                    return _result(data=await endpoint_template(api_key, item_id))
+                endpoint = endpoint_template.format(**{placeholder: item_id})
+                if total_pages == 1:
+                    return _result(data=await client.get(endpoint, params=params))
+                return _result(data=await client.get_all(endpoint, params=params, total_pages=total_pages))
+            except Exception as e:
+                logging.warning(f"Bulk request failed for {item_id}: {str(e)}")
+                return _result(error=str(e))
+
+    results = await asyncio.gather(*(fetch(item_id) for item_id in ids))
+    return dict(zip(ids, results))
+
+
+async def fetch_for_devices_async(api_key, endpoint_template, serials, concurrency=None, params=None,
+                                  total_pages=1):
+    """Async counterpart of fetch_for_devices()"""
+    return await fetch_many_async(api_key, endpoint_template, serials, 'serial', concurrency=concurrency,
+                                  params=params, total_pages=total_pages)
+
+
+async def fetch_for_networks_async(api_key, endpoint_template, network_ids, concurrency=None, params=None,
+                                   total_pages=1):
+    """Async counterpart of fetch_for_networks()"""
+    return await fetch_many_async(api_key, endpoint_template, network_ids, 'network_id',
+                                  concurrency=concurrency, params=params, total_pages=total_pages)
@@ -0,0 +1,666 @@
+"""
+Meraki Response Cache Module
+
+This module provides the response cache used by the Meraki request layer. It has
+two tiers:
+
+- an in-memory LRU bounded by a byte budget
+- an optional SQLite-backed disk tier that survives restarts
+
+Entries hold the raw response body rather than decoded JSON, so every hit
+decodes a fresh copy that callers are free to modify. Time-to-live is chosen per
+endpoint class: organization and network metadata change rarely and are kept for
+a long time, while clients and statuses expire quickly.
+
+Expired entries are kept together with their ``ETag`` and ``Last-Modified``
+validators. They are refreshed with a conditional request, and a 304 Not
+Modified reply renews the entry without downloading the body again.
+
+A separate negative cache remembers per-device and per-network endpoints that
+answered 404 Not Found, such as the uplink of a device without uplinks, so
+later sweeps skip them without a network round trip. It is persisted across runs
+and can be inspected or cleared with:
+
+    python -m modules.meraki.meraki_cache --negative [--clear-negative]
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+
+# Default memory budget and disk tier location, overridable through the environment
+DEFAULT_MAX_BYTES = int(os.getenv('MERAKI_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+DEFAULT_DISK_PATH = os.path.join(str(Path.home()), '.meraki_clu', 'response_cache.db')
+DEFAULT_NEGATIVE_PATH = os.path.join(str(Path.home()), '.meraki_clu', 'negative_cache.json')
+DEFAULT_NEGATIVE_TTL = float(os.getenv('MERAKI_NEGATIVE_TTL', str(24 * 60 * 60)))  # 0 disables
+
+# Time-to-live in seconds per endpoint class (0 disables caching for the class)
+ENDPOINT_TTLS = {
+    'metadata': 900,
+    'topology': 300,
+    'status': 60,
+    'default': 60
+}
+
+# Endpoint classes, matched in order against the endpoint path
+ENDPOINT_CLASSES = [
+    (re.compile(r'/(clients|statuses|uplink|uplinks|readings|alerts|health|traffic|latencyStats)(/|$)'), 'status'),
+    (re.compile(r'/topology(/|$)'), 'topology'),
+    (re.compile(r'^/organizations(/[^/]+)?$'), 'metadata'),
+    (re.compile(r'^/organizations/[^/]+/(networks|devices|inventory/devices|licenses|admins|policyObjects(/groups)?)$'),
+     'metadata'),
+    (re.compile(r'^/networks/[^/]+$'), 'metadata'),
+    (re.compile(r'^/networks/[^/]+/(devices|appliance/vlans|appliance/staticRoutes|appliance/firewall/\w+|wireless/ssids)$'),
+     'metadata'),
+    (re.compile(r'^/devices/[^/]+(/switch/ports)?$'), 'metadata'),
+]
+
+# Endpoints whose 404s mean "not supported by this device or network", as template and pattern
+NEGATIVE_ENDPOINTS = [
+    ('/devices/{serial}/uplink', re.compile(r'^/devices/([^/]+)/uplink$')),
+    ('/networks/{network_id}/topology/linkLayer', re.compile(r'^/networks/([^/]+)/topology/linkLayer$')),
+]
+
+
+def endpoint_class(endpoint):
+    """
+    Get the cache class of an endpoint.
+
+    Args:
+        endpoint (str): API endpoint path
+
+    Returns:
+        str: One of the ENDPOINT_TTLS keys
+    """
+    for pattern, name in ENDPOINT_CLASSES:
+        if pattern.search(endpoint):
+            return name
+    return 'default'
+
+
+def endpoint_ttl(endpoint):
+    """Time-to-live in seconds for responses from an endpoint"""
+    return ENDPOINT_TTLS.get(endpoint_class(endpoint), ENDPOINT_TTLS['default'])
+
+
+def api_key_hash(api_key):
+    """
+    Hash an API key so it can be part of a persisted cache key.
+
+    Args:
+        api_key (str): Meraki API key
+
+    Returns:
+        str: Truncated SHA-256 hex digest
+    """
+    return hashlib.sha256(api_key.encode()).hexdigest()[:16]
+
+
+def cache_key(api_key, endpoint, params=None, base_url=''):
+    """
+    Build the cache key for a request.
+
+    The API key is hashed so it is never written to the disk tier. The base URL
+    keeps responses from the mock server or another Dashboard host apart from
+    live ones.
+
+    Args:
+        api_key (str): Meraki API key
+        endpoint (str): API endpoint path or absolute pagination URL
+        params (dict, optional): Query parameters
+        base_url (str): Dashboard API base URL the request is sent to
+
+    Returns:
+        str: Cache key
+    """
+    query = ''
+    if params:
+        query = json.dumps({k: v for k, v in params.items() if v is not None}, sort_keys=True, default=str)
+    return f"{api_key_hash(api_key)} {base_url} {endpoint} {query}"
+
+
+class CacheEntry:
+    """Cached response body with its pagination links, validators and expiry"""
+
+    __slots__ = ('endpoint', 'body', 'links', 'expires', 'stored', 'etag', 'last_modified')
+
+    def __init__(self, endpoint, body, links=None, expires=0.0, stored=None, etag=None, last_modified=None):
+        self.endpoint = endpoint
+        self.body = body
+        self.links = links or {}
+        self.expires = expires
+        self.stored = stored if stored is not None else time.time()
+        self.etag = etag
+        self.last_modified = last_modified
+
+    @property
+    def size(self):
+        """Approximate memory footprint in bytes"""
+        return len(self.body) + len(self.endpoint) + 128
+
+    def fresh(self, now=None):
+        """Whether the entry has not yet expired"""
+        return (now or time.time()) < self.expires
+
+    def json(self):
+        """Decode a fresh copy of the body"""
+        return json.loads(self.body) if self.body else None
+
+    def conditional_headers(self):
+        """
+        Get the headers that revalidate this entry.
+
+        Returns:
+            dict: If-None-Match and/or If-Modified-Since, empty without validators
+        """
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+    def meta(self):
+        """Serialize the links and validators for the disk tier"""
+        return json.dumps({'links': self.links, 'etag': self.etag, 'last_modified': self.last_modified})
+
+
+class ResponseCache:
+    """
+    Two-tier response cache with per-endpoint TTLs and hit/miss counters.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, disk_path=None):
+        """
+        Initialize the cache.
+
+        Args:
+            max_bytes (int): Memory tier budget in bytes
+            disk_path (str, optional): SQLite file for the disk tier; None disables it
+        """
+        self.max_bytes = max_bytes
+        self.disk_path = disk_path
+        self.enabled = True
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self._db = None
+        self.stats = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0, 'invalidations': 0,
+                      'revalidated': 0, 'bytes_saved': 0}
+        if disk_path:
+            self._open_disk(disk_path)
+
+    def _open_disk(self, disk_path):
+        try:
+            os.makedirs(os.path.dirname(disk_path) or '.', exist_ok=True)
+            self._db = sqlite3.connect(disk_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, endpoint TEXT, body BLOB, meta TEXT, expires REAL, stored REAL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS responses_endpoint ON responses (endpoint)")
+            self._db.commit()
+        except sqlite3.Error as e:
+            logging.warning(f"Could not open response cache at {disk_path}, using memory only: {str(e)}")
+            self._db = None
+
+    def _count(self, key, amount=1):
+        with self._lock:
+            self.stats[key] += amount
+
+    def _remember(self, key, entry):
+        """Insert into the memory tier and evict least recently used entries over budget"""
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old.size
+            if entry.size > self.max_bytes:
+                return
+            self._entries[key] = entry
+            self._bytes += entry.size
+            while self._bytes > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+                self.stats['evictions'] += 1
+
+    def lookup(self, key, allow_stale=False):
+        """
+        Find an entry without counting a hit or miss.
+
+        Args:
+            key (str): Cache key
+            allow_stale (bool): Return expired entries too
+
+        Returns:
+            CacheEntry: The entry, or None
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                if allow_stale or entry.fresh(now):
+                    return entry
+        if self._db is None:
+            return None
+        with self._lock:
+            row = self._db.execute(
+                "SELECT endpoint, body, meta, expires, stored FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        endpoint, body, meta, expires, stored = row
+        meta = json.loads(meta or '{}')
+        entry = CacheEntry(endpoint, bytes(body), meta.get('links'), expires, stored,
+                           meta.get('etag'), meta.get('last_modified'))
+        if not allow_stale and not entry.fresh(now):
+            return None
+        self._remember(key, entry)
+        return entry
+
+    def get(self, key):
+        """
+        Get a fresh entry and count the hit or miss.
+
+        Args:
+            key (str): Cache key
+
+        Returns:
+            CacheEntry: The entry, or None on a miss
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            in_memory = key in self._entries and self._entries[key].fresh()
+        entry = self.lookup(key)
+        if entry is None:
+            self._count('misses')
+        else:
+            self._count('hits' if in_memory else 'disk_hits')
+        return entry
+
+    def put(self, key, endpoint, body, links=None, ttl=None, etag=None, last_modified=None):
+        """
+        Store a response body.
+
+        Args:
+            key (str): Cache key
+            endpoint (str): API endpoint path, used for invalidation
+            body (bytes): Raw response body
+            links (dict, optional): Pagination links keyed by relation
+            ttl (float, optional): Time-to-live in seconds (default: by endpoint class)
+            etag (str, optional): ETag response header
+            last_modified (str, optional): Last-Modified response header
+
+        Returns:
+            CacheEntry: The stored entry, or None if the endpoint isn't cached
+        """
+        if not self.enabled:
+            return None
+        if ttl is None:
+            ttl = endpoint_ttl(endpoint)
+        if ttl <= 0:
+            return None
+        entry = CacheEntry(endpoint, body, links, time.time() + ttl, etag=etag, last_modified=last_modified)
+        self._remember(key, entry)
+        self._count('stores')
+        if self._db is not None:
+            try:
+                with self._lock:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO responses (key, endpoint, body, meta, expires, stored) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        (key, endpoint, sqlite3.Binary(body), entry.meta(), entry.expires, entry.stored)
+                    )
+                    self._db.commit()
+            except sqlite3.Error as e:
+                logging.warning(f"Could not write response cache entry: {str(e)}")
+        return entry
+
+    def revalidated(self, key, entry, ttl=None):
+        """
+        Renew an expired entry after the API answered 304 Not Modified.
+
+        Args:
+            key (str): Cache key
+            entry (CacheEntry): The stale entry that was revalidated
+            ttl (float, optional): Time-to-live in seconds (default: by endpoint class)
+
+        Returns:
+            CacheEntry: The renewed entry
+        """
+        if ttl is None:
+            ttl = endpoint_ttl(entry.endpoint)
+        entry.expires = time.time() + ttl
+        self._remember(key, entry)
+        with self._lock:
+            self.stats['revalidated'] += 1
+            self.stats['bytes_saved'] += len(entry.body)
+            if self._db is not None:
+                try:
+                    self._db.execute("UPDATE responses SET expires = ? WHERE key = ?", (entry.expires, key))
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    logging.warning(f"Could not update response cache entry: {str(e)}")
+        return entry
+
+    def invalidate(self, endpoint_prefix=None):
+        """
+        Drop cached responses.
+
+        Args:
+            endpoint_prefix (str, optional): Only drop endpoints starting with this
+                path, e.g. "/networks/N_123"; None drops everything
+
+        Returns:
+            int: Number of memory entries dropped
+        """
+        with self._lock:
+            if endpoint_prefix is None:
+                dropped = len(self._entries)
+                self._entries.clear()
+                self._bytes = 0
+            else:
+                keys = [k for k, e in self._entries.items() if e.endpoint.startswith(endpoint_prefix)]
+                for k in keys:
+                    self._bytes -= self._entries.pop(k).size
+                dropped = len(keys)
+            self.stats['invalidations'] += dropped
+            if self._db is not None:
+                if endpoint_prefix is None:
+                    self._db.execute("DELETE FROM responses")
+                else:
+                    escaped = endpoint_prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+                    self._db.execute("DELETE FROM responses WHERE endpoint LIKE ? ESCAPE '\\'", (escaped + '%',))
+                self._db.commit()
+        return dropped
+
+    def clear(self):
+        """Drop every cached response"""
+        self.invalidate()
+
+    def summary(self):
+        """
+        Get cache counters and usage.
+
+        Returns:
+            dict: Hit/miss counters, hit ratio, revalidations and bytes saved by
+            304 replies, entry count and bytes used
+        """
+        with self._lock:
+            summary = dict(self.stats)
+            summary['entries'] = len(self._entries)
+            summary['bytes'] = self._bytes
+            summary['max_bytes'] = self.max_bytes
+        lookups = summary['hits'] + summary['disk_hits'] + summary['misses']
+        # A revalidated entry was counted as a miss but served without a download
+        served = summary['hits'] + summary['disk_hits'] + summary['revalidated']
+        summary['hit_ratio'] = round(served / lookups, 3) if lookups else 0.0
+        summary['disk_path'] = self.disk_path if self._db is not None else None
+        return summary
+
+
+class NegativeCache:
+    """
+    Persistent record of endpoints known to return 404 for a device or network.
+
+    Entries are keyed by endpoint template plus the serial or network ID, e.g.
+    ("/devices/{serial}/uplink", "Q2XX-XXXX-XXXX"), scoped to the base URL and
+    a hash of the API key that saw the 404, and expire after a TTL so firmware
+    upgrades and new hardware are picked up again.
+    """
+
+    def __init__(self, path=None, ttl=DEFAULT_NEGATIVE_TTL):
+        """
+        Initialize the cache, loading entries saved by earlier runs.
+
+        Args:
+            path (str, optional): JSON file the entries are persisted to; None keeps them in memory
+            ttl (float): Seconds a 404 is remembered (0 disables the cache)
+        """
+        self.path = path
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.stats = {'skipped': 0, 'recorded': 0}
+        self._load()
+
+    @staticmethod
+    def match(endpoint):
+        """
+        Map an endpoint to its negative cache key.
+
+        Args:
+            endpoint (str): API endpoint path
+
+        Returns:
+            tuple: (template, id), or None if 404s from the endpoint aren't remembered
+        """
+        for template, pattern in NEGATIVE_ENDPOINTS:
+            found = pattern.match(endpoint)
+            if found:
+                return template, found.group(1)
+        return None
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as f:
+                saved = json.load(f)
+            now = time.time()
+            for entry in saved:
+                # Entries saved before 404s were scoped can't be told apart, so they're dropped
+                if 'base_url' not in entry:
+                    continue
+                if entry['expires'] > now:
+                    key = (entry['template'], entry['id'], entry['base_url'], entry['key_hash'])
+                    self._entries[key] = (entry['recorded'], entry['expires'])
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logging.warning(f"Could not load negative cache from {self.path}: {str(e)}")
+
+    def _save(self):
+        if not self.path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            temp_path = self.path + '.tmp'
+            with open(temp_path, 'w') as f:
+                json.dump([{'template': template, 'id': item_id, 'base_url': base_url, 'key_hash': key_hash,
+                            'recorded': recorded, 'expires': expires}
+                           for (template, item_id, base_url, key_hash), (recorded, expires)
+                           in self._entries.items()], f)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            logging.warning(f"Could not save negative cache to {self.path}: {str(e)}")
+
+    def _key(self, endpoint, api_key, base_url):
+        match = self.match(endpoint)
+        if match is None or self.ttl <= 0:
+            return None
+        return match + (base_url, api_key_hash(api_key))
+
+    def contains(self, endpoint, api_key, base_url):
+        """
+        Check whether an endpoint is known to return 404, counting a skip if so.
+
+        Args:
+            endpoint (str): API endpoint path
+            api_key (str): Meraki API key the request is made with
+            base_url (str): Dashboard API base URL the request is sent to
+
+        Returns:
+            bool: True if the request can be skipped
+        """
+        key = self._key(endpoint, api_key, base_url)
+        if key is None:
+            return False
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False
+            if entry[1] <= time.time():
+                del self._entries[key]
+                return False
+            self.stats['skipped'] += 1
+        return True
+
+    def add(self, endpoint, api_key, base_url):
+        """
+        Remember that an endpoint returned 404.
+
+        Args:
+            endpoint (str): API endpoint path
+            api_key (str): Meraki API key the request was made with
+            base_url (str): Dashboard API base URL the request was sent to
+        """
+        key = self._key(endpoint, api_key, base_url)
+        if key is None:
+            return
+        now = time.time()
+        with self._lock:
+            self._entries[key] = (now, now + self.ttl)
+            self.stats['recorded'] += 1
+            self._save()
+
+    def entries(self):
+        """
+        List the remembered 404s.
+
+        Returns:
+            list: Dictionaries with template, id, base URL, recorded time and seconds until expiry
+        """
+        now = time.time()
+        with self._lock:
+            return [
+                {'template': template, 'id': item_id, 'base_url': base_url,
+                 'recorded': datetime.fromtimestamp(recorded).isoformat(timespec='seconds'),
+                 'expires_in': int(expires - now)}
+                for (template, item_id, base_url, _), (recorded, expires) in sorted(self._entries.items())
+                if expires > now
+            ]
+
+    def clear(self, template=None, item_id=None):
+        """
+        Forget remembered 404s.
+
+        Args:
+            template (str, optional): Only forget entries for this endpoint template
+            item_id (str, optional): Only forget entries for this serial or network ID
+
+        Returns:
+            int: Number of entries forgotten
+        """
+        with self._lock:
+            keys = [key for key in self._entries
+                    if (template is None or key[0] == template) and (item_id is None or key[1] == item_id)]
+            for key in keys:
+                del self._entries[key]
+            self._save()
+        return len(keys)
+
+
+_response_cache = None
+_response_cache_lock = threading.Lock()
+_negative_cache = None
+
+
+def get_response_cache():
+    """
+    Get the process-wide response cache, creating it on first use.
+
+    The disk tier is enabled when MERAKI_CACHE_DISK is set, either to a file path
+    or to "1" for the default location.
+
+    Returns:
+        ResponseCache: Shared cache
+    """
+    global _response_cache
+    if _response_cache is None:
+        with _response_cache_lock:
+            if _response_cache is None:
+                disk_setting = os.getenv('MERAKI_CACHE_DISK', '')
+                disk_path = None
+                if disk_setting.lower() in ('1', 'true', 'yes'):
+                    disk_path = DEFAULT_DISK_PATH
+                elif disk_setting:
+                    disk_path = disk_setting
+                _response_cache = ResponseCache(disk_path=disk_path)
+    return _response_cache
+
+
+def configure_cache(max_bytes=None, disk_path=None, enabled=True):
+    """
+    Replace the process-wide response cache.
+
+    Args:
+        max_bytes (int, optional): Memory tier budget in bytes
+        disk_path (str, optional): SQLite file for the disk tier
+        enabled (bool): Whether responses are cached at all
+
+    Returns:
+        ResponseCache: The new shared cache
+    """
+    global _response_cache
+    with _response_cache_lock:
+        _response_cache = ResponseCache(max_bytes=max_bytes or DEFAULT_MAX_BYTES, disk_path=disk_path)
+        _response_cache.enabled = enabled
+    return _response_cache
+
+
+def get_negative_cache():
+    """
+    Get the process-wide negative cache, creating it on first use.
+
+    Entries are persisted to ~/.meraki_clu/negative_cache.json unless
+    MERAKI_NEGATIVE_CACHE points elsewhere; set it to "0" to keep them in memory.
+
+    Returns:
+        NegativeCache: Shared negative cache
+    """
+    global _negative_cache
+    if _negative_cache is None:
+        with _response_cache_lock:
+            if _negative_cache is None:
+                setting = os.getenv('MERAKI_NEGATIVE_CACHE', '')
+                if setting.lower() in ('0', 'false', 'no'):
+                    path = None
+                elif setting and setting.lower() not in ('1', 'true', 'yes'):
+                    path = setting
+                else:
+                    path = DEFAULT_NEGATIVE_PATH
+                _negative_cache = NegativeCache(path=path)
+    return _negative_cache
+
+
+def main():
+    """Inspect or clear the persistent caches from the command line"""
+    parser = argparse.ArgumentParser(description='Inspect the Meraki response caches')
+    parser.add_argument('--negative', action='store_true', help='List endpoints remembered as unsupported (404)')
+    parser.add_argument('--clear-negative', action='store_true', help='Forget every remembered 404')
+    parser.add_argument('--clear', action='store_true', help='Drop every cached response, including the disk tier')
+    args = parser.parse_args()
+
+    if args.clear_negative:
+        print(f"Forgot {get_negative_cache().clear()} remembered 404s")
+    if args.clear:
+        cache = get_response_cache()
+        cache.clear()
+        print(f"Cleared response cache ({cache.disk_path or 'memory only'})")
+    if args.negative or not (args.clear_negative or args.clear):
+        for entry in get_negative_cache().entries():
+            print(f"{entry['template']:<45} {entry['id']:<20} {entry['base_url']} recorded {entry['recorded']}, "
+                  f"expires in {entry['expires_in']}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,389 @@
+"""
+Meraki HTTP Cassette Module
+
+This module records Dashboard API responses to a cassette file and replays them
+without any network access. Each interaction is keyed by method, URL path, query
+parameters and any conditional request headers. The host is not part of the key, so a cassette recorded against
+the live API also replays through the mock server base URL. The cassette keeps:
+
+- the status code
+- the response headers, including pagination ``Link`` headers
+- the decoded body
+- how long the request took
+
+Cassettes are gzip-compressed JSON. Recording one from a real organization lets
+menu flows such as topology generation be profiled offline on production-shaped
+data, reproduces slowdowns deterministically, and lets the CLI run against a
+snapshot when the API is unreachable.
+
+Set MERAKI_CASSETTE to the cassette path and MERAKI_CASSETTE_MODE to "record" or
+"replay" (the default), or call use_cassette(). A cassette's contents can be
+listed with:
+
+    python -m modules.meraki.meraki_cassette path/to/cassette.json.gz
+"""
+
+import argparse
+import atexit
+import base64
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from urllib.parse import parse_qsl, urlencode, urlparse
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+CASSETTE_VERSION = 1
+
+# Response headers that describe the wire encoding rather than the stored body
+_DROPPED_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding', 'connection', 'keep-alive',
+                    'set-cookie'}
+
+
+# Request headers that change the response, so a 304 is only replayed to a revalidation
+_CONDITIONAL_HEADERS = ('If-None-Match', 'If-Modified-Since')
+
+
+class CassetteMiss(requests.exceptions.ConnectionError):
+    """Raised in replay mode for a request the cassette has no response for"""
+
+
+def interaction_key(method, url, params=None, headers=None):
+    """
+    Build the cassette key of a request.
+
+    Args:
+        method (str): HTTP method
+        url (str): Request URL, possibly with a query string
+        params (dict, optional): Query parameters not yet in the URL
+        headers (Mapping, optional): Request headers; only conditional ones are part of the key
+
+    Returns:
+        str: Key such as "GET /api/v1/networks/N_1/clients?perPage=1000", with
+        e.g. ' If-None-Match: "abc"' appended for a conditional request
+    """
+    parsed = urlparse(url)
+    query = parse_qsl(parsed.query, keep_blank_values=True)
+    for name, value in (params or {}).items():
+        if value is None:
+            continue
+        for item in (value if isinstance(value, (list, tuple)) else [value]):
+            query.append((name, str(item).lower() if isinstance(item, bool) else str(item)))
+    key = f"{method.upper()} {parsed.path}"
+    if query:
+        key += '?' + urlencode(sorted(query))
+    if headers:
+        headers = CaseInsensitiveDict(headers)
+        for name in _CONDITIONAL_HEADERS:
+            if headers.get(name):
+                key += f" {name}: {headers[name]}"
+    return key
+
+
+class RecordedResponse:
+    """One recorded response"""
+
+    __slots__ = ('status', 'reason', 'headers', 'body', 'elapsed')
+
+    def __init__(self, status, reason, headers, body, elapsed=0.0):
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.body = body
+        self.elapsed = elapsed
+
+    @property
+    def links(self):
+        """Pagination links from the Link header, as {rel: url}"""
+        header = {name.lower(): value for name, value in self.headers.items()}.get('link')
+        if not header:
+            return {}
+        return {link['rel']: link['url'] for link in requests.utils.parse_header_links(header) if 'rel' in link}
+
+    def to_dict(self):
+        """Serialize for the cassette file"""
+        data = {'status': self.status, 'reason': self.reason, 'headers': self.headers,
+                'elapsed': round(self.elapsed, 4)}
+        try:
+            data['body'] = self.body.decode('utf-8')
+        except UnicodeDecodeError:
+            data['body_b64'] = base64.b64encode(self.body).decode('ascii')
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        """Deserialize from the cassette file"""
+        if 'body_b64' in data:
+            body = base64.b64decode(data['body_b64'])
+        else:
+            body = data.get('body', '').encode('utf-8')
+        return cls(data['status'], data.get('reason', ''), data.get('headers', {}), body, data.get('elapsed', 0.0))
+
+
+class Cassette:
+    """
+    Recorded API interactions, in record or replay mode.
+
+    A key requested several times while recording keeps every response in order.
+    Replay serves them in the same order and repeats the last one once they run
+    out, so retries and cache refreshes stay deterministic.
+    """
+
+    def __init__(self, path, mode='replay', replay_latency=False):
+        """
+        Initialize the cassette.
+
+        Args:
+            path (str): Cassette file (gzip-compressed JSON)
+            mode (str): "record" to capture responses, "replay" to serve them
+            replay_latency (bool): Sleep for each response's recorded duration
+                when replaying, to reproduce the original timing
+        """
+        if mode not in ('record', 'replay'):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.replay_latency = replay_latency
+        self.interactions = {}
+        self.stats = {'recorded': 0, 'replayed': 0, 'misses': 0}
+        self._positions = {}
+        self._recorded_keys = set()
+        self._lock = threading.Lock()
+        self._dirty = False
+        if mode == 'replay' or os.path.exists(path):
+            self.load()
+
+    @property
+    def recording(self):
+        """Whether responses are being captured"""
+        return self.mode == 'record'
+
+    def load(self):
+        """Read the cassette file; a missing file is an error only in replay mode"""
+        try:
+            with gzip.open(self.path, 'rt', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            if self.mode == 'replay':
+                raise
+            return
+        self.interactions = {key: [RecordedResponse.from_dict(item) for item in responses]
+                             for key, responses in data.get('interactions', {}).items()}
+        logging.info(f"Loaded {len(self.interactions)} interactions from cassette {self.path}")
+
+    def save(self):
+        """Write the cassette file if anything was recorded since the last save"""
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {
+                'version': CASSETTE_VERSION,
+                'recorded': datetime.now().isoformat(timespec='seconds'),
+                'interactions': {key: [response.to_dict() for response in responses]
+                                 for key, responses in self.interactions.items()}
+            }
+            self._dirty = False
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        temporary = f"{self.path}.{os.getpid()}.tmp"
+        with gzip.open(temporary, 'wt', encoding='utf-8', compresslevel=6) as f:
+            json.dump(data, f, separators=(',', ':'))
+        os.replace(temporary, self.path)
+        logging.info(f"Saved {len(data['interactions'])} interactions to cassette {self.path}")
+
+    def record(self, key, status, reason, headers, body, elapsed=0.0):
+        """
+        Capture one response.
+
+        Args:
+            key (str): interaction_key() of the request
+            status (int): Status code
+            reason (str): Reason phrase
+            headers (Mapping): Response headers
+            body (bytes): Decoded response body
+            elapsed (float): Request duration in seconds
+        """
+        headers = {name: value for name, value in headers.items() if name.lower() not in _DROPPED_HEADERS}
+        response = RecordedResponse(status, reason or '', headers, body or b'', elapsed)
+        with self._lock:
+            if key not in self._recorded_keys:
+                # Re-recording over an existing cassette replaces the old responses
+                self._recorded_keys.add(key)
+                self.interactions[key] = []
+            self.interactions[key].append(response)
+            self.stats['recorded'] += 1
+            self._dirty = True
+
+    def replay(self, key):
+        """
+        Get the next recorded response for a request.
+
+        Args:
+            key (str): interaction_key() of the request
+
+        Returns:
+            RecordedResponse: The recorded response
+
+        Raises:
+            CassetteMiss: If the cassette has no response for the key
+        """
+        with self._lock:
+            responses = self.interactions.get(key)
+            if not responses:
+                self.stats['misses'] += 1
+                raise CassetteMiss(f"No recorded response for {key} in cassette {self.path}")
+            position = self._positions.get(key, 0)
+            self._positions[key] = position + 1
+            self.stats['replayed'] += 1
+            response = responses[min(position, len(responses) - 1)]
+        if self.replay_latency and response.elapsed:
+            time.sleep(response.elapsed)
+        return response
+
+    def adapter(self, transport):
+        """
+        Wrap a requests transport adapter with this cassette.
+
+        Args:
+            transport (requests.adapters.BaseAdapter): Adapter used when recording
+
+        Returns:
+            CassetteAdapter: Adapter to mount on sessions
+        """
+        return CassetteAdapter(self, transport)
+
+    def summary(self):
+        """
+        Describe the cassette contents.
+
+        Returns:
+            list: One dict per key with the number of responses, statuses and size
+        """
+        with self._lock:
+            items = list(self.interactions.items())
+        return [{'key': key, 'responses': len(responses),
+                 'statuses': sorted({response.status for response in responses}),
+                 'bytes': sum(len(response.body) for response in responses)}
+                for key, responses in sorted(items)]
+
+
+class CassetteAdapter(BaseAdapter):
+    """requests adapter that records through, or replays from, a cassette"""
+
+    def __init__(self, cassette, transport):
+        super().__init__()
+        self.cassette = cassette
+        self.transport = transport
+
+    @property
+    def poolmanager(self):
+        """The wrapped transport's pool, for connection statistics"""
+        return self.transport.poolmanager
+
+    def send(self, request, stream=False, **kwargs):
+        key = interaction_key(request.method, request.url, headers=request.headers)
+        if not self.cassette.recording:
+            return self._build_response(request, self.cassette.replay(key))
+
+        started = time.perf_counter()
+        response = self.transport.send(request, stream=stream, **kwargs)
+        body = response.content  # Read the whole body so it can be captured
+        self.cassette.record(key, response.status_code, response.reason, response.headers, body,
+                             time.perf_counter() - started)
+        return response
+
+    @staticmethod
+    def _build_response(request, recorded):
+        response = requests.Response()
+        response.status_code = recorded.status
+        response.reason = recorded.reason
+        response.headers = CaseInsensitiveDict(recorded.headers)
+        response.url = request.url
+        response.request = request
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response._content = recorded.body
+        response._content_consumed = True
+        return response
+
+    def close(self):
+        self.transport.close()
+
+
+_cassette = None
+_cassette_lock = threading.Lock()
+_cassette_loaded = False
+
+
+def get_cassette():
+    """
+    Get the process-wide cassette configured through the environment.
+
+    Returns:
+        Cassette: The cassette named by MERAKI_CASSETTE, or None when record and
+        replay are off
+    """
+    global _cassette, _cassette_loaded
+    if not _cassette_loaded:
+        with _cassette_lock:
+            if not _cassette_loaded:
+                path = os.getenv('MERAKI_CASSETTE')
+                if path:
+                    _cassette = _open_cassette(path, os.getenv('MERAKI_CASSETTE_MODE', 'replay').lower(),
+                                               os.getenv('MERAKI_CASSETTE_LATENCY', '').lower() in ('1', 'true', 'yes'))
+                _cassette_loaded = True
+    return _cassette
+
+
+def use_cassette(path, mode='replay', replay_latency=False):
+    """
+    Replace the process-wide cassette. Clients created afterwards use it.
+
+    Args:
+        path (str): Cassette file, or None to turn record and replay off
+        mode (str): "record" or "replay"
+        replay_latency (bool): Reproduce recorded response times when replaying
+
+    Returns:
+        Cassette: The new cassette, or None
+    """
+    global _cassette, _cassette_loaded
+    with _cassette_lock:
+        if _cassette is not None and _cassette.recording:
+            _cassette.save()
+        _cassette = _open_cassette(path, mode, replay_latency) if path else None
+        _cassette_loaded = True
+    return _cassette
+
+
+def _open_cassette(path, mode, replay_latency):
+    cassette = Cassette(path, mode, replay_latency)
+    if cassette.recording:
+        atexit.register(cassette.save)
+    logging.info(f"Using cassette {path} in {mode} mode")
+    return cassette
+
+
+def main():
+    """List the interactions in a cassette from the command line"""
+    parser = argparse.ArgumentParser(description='List the interactions recorded in a Meraki API cassette')
+    parser.add_argument('path', help='Cassette file')
+    args = parser.parse_args()
+
+    cassette = Cassette(args.path, 'replay')
+    entries = cassette.summary()
+    for entry in entries:
+        statuses = ','.join(str(status) for status in entry['statuses'])
+        print(f"{entry['responses']:>3}x {statuses:<8} {entry['bytes']:>10} B  {entry['key']}")
+    print(f"{len(entries)} requests, {sum(entry['responses'] for entry in entries)} responses, "
+          f"{sum(entry['bytes'] for entry in entries)} bytes of bodies "
+          f"({os.path.getsize(args.path)} bytes compressed)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,628 @@
+"""
+Meraki HTTP Client Module
+
+This module provides a long-lived, thread-safe HTTP client for the Meraki
+Dashboard API. One client is kept per API key and owns a tuned urllib3
+connection pool, so repeated calls reuse warm keep-alive connections instead
+of paying a full TCP and TLS handshake on every request.
+
+The SSL context and the certifi bundle are loaded once per process and shared
+by every client.
+"""
+
+import logging
+import os
+import platform
+import ssl
+import threading
+import time
+from urllib.parse import urlparse
+
+import certifi
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+
+from modules.meraki.meraki_cache import CacheEntry, cache_key, get_negative_cache, get_response_cache
+from modules.meraki.meraki_cassette import CassetteMiss, get_cassette
+from modules.meraki.meraki_singleflight import SingleFlight
+from modules.meraki.meraki_stream import CHUNK_SIZE, iter_json_array
+from modules.meraki.meraki_ratelimit import get_rate_limiter, parse_retry_after
+
+# Disable insecure request warnings when verification is disabled
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+# Base URL for Meraki API (MERAKI_BASE_URL overrides it, e.g. to use the mock server)
+BASE_URL = "https://api.meraki.com/api/v1"
+
+# Default tuning values, overridable through the environment
+DEFAULT_POOL_SIZE = int(os.getenv('MERAKI_POOL_SIZE', '10'))
+DEFAULT_TIMEOUT = 30  # seconds
+MAX_RETRIES = 3
+RETRY_DELAY = 1  # seconds
+MAX_THROTTLE_RETRIES = 5  # 429 responses waited out per attempt
+
+_ssl_contexts = {}
+_ssl_context_lock = threading.Lock()
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_ssl_context(verify=True):
+    """
+    Get a process-wide SSL context, creating it on first use.
+
+    Contexts are cached so the certifi bundle is only parsed once per process.
+
+    Args:
+        verify (bool): Whether the context verifies certificates and hostnames
+
+    Returns:
+        ssl.SSLContext: Shared SSL context
+    """
+    verify = bool(verify)
+    context = _ssl_contexts.get(verify)
+    if context is None:
+        with _ssl_context_lock:
+            context = _ssl_contexts.get(verify)
+            if context is None:
+                context = ssl.create_default_context()
+                if verify:
+                    context.load_verify_locations(certifi.where())
+                else:
+                    context.check_hostname = False
+                    context.verify_mode = ssl.CERT_NONE
+                _ssl_contexts[verify] = context
+    return context
+
+
+def get_base_url():
+    """
+    Get the Dashboard API base URL new clients should use.
+
+    Returns:
+        str: MERAKI_BASE_URL if set, otherwise the public Dashboard API
+    """
+    return os.getenv('MERAKI_BASE_URL') or BASE_URL
+
+
+def endpoint_path(endpoint, base_url=BASE_URL):
+    """
+    Normalize an endpoint or absolute URL to a path relative to the base URL.
+
+    Args:
+        endpoint (str): Endpoint path or absolute URL
+        base_url (str): Dashboard API base URL
+
+    Returns:
+        str: Path such as "/organizations/123/networks"
+    """
+    if endpoint.startswith(('http://', 'https://')):
+        path = urlparse(endpoint).path
+        base_path = urlparse(base_url).path.rstrip('/')
+        if base_path and path.startswith(base_path):
+            path = path[len(base_path):]
+        return path
+    # Ensure endpoint starts with a slash
+    return endpoint if endpoint.startswith('/') else '/' + endpoint
+
+
+class TLSAdapter(HTTPAdapter):
+    """HTTP adapter that pools connections using the shared SSL contexts"""
+
+    def build_connection_pool_key_attributes(self, request, verify, cert=None):
+        host_params, pool_kwargs = super().build_connection_pool_key_attributes(request, verify, cert)
+        # The cached context already holds the CA bundle, so don't reload it per connection
+        pool_kwargs.pop('ca_certs', None)
+        pool_kwargs.pop('ca_cert_dir', None)
+        pool_kwargs['ssl_context'] = get_ssl_context(verify is not False)
+        return host_params, pool_kwargs
+
+
+class MerakiHTTPClient:
+    """
+    Pooled, keep-alive HTTP client for the Meraki Dashboard API.
+
+    A single adapter (and therefore a single urllib3 connection pool) is shared
+    by every thread using the client. Each thread gets its own lightweight
+    ``requests.Session`` mounted on that adapter, so session state such as
+    cookies is never shared across threads.
+    """
+
+    def __init__(self, api_key, base_url=None, pool_size=DEFAULT_POOL_SIZE, timeout=DEFAULT_TIMEOUT):
+        """
+        Initialize the client.
+
+        Args:
+            api_key (str): Meraki API key
+            base_url (str, optional): Dashboard API base URL (default: get_base_url())
+            pool_size (int): Maximum number of pooled connections per host
+            timeout (int): Default request timeout in seconds
+        """
+        self.api_key = api_key
+        self.base_url = (base_url or get_base_url()).rstrip('/')
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.is_windows = platform.system() == 'Windows'
+
+        # Clear any conflicting environment variables
+        if 'REQUESTS_CA_BUNDLE' in os.environ:
+            del os.environ['REQUESTS_CA_BUNDLE']
+        if 'SSL_CERT_FILE' in os.environ:
+            del os.environ['SSL_CERT_FILE']
+
+        # Start with verification disabled on Windows, certifi elsewhere
+        self.verify = False if self.is_windows else certifi.where()
+
+        self._adapter = TLSAdapter(pool_connections=4, pool_maxsize=pool_size, pool_block=True)
+        # With a cassette, requests are recorded through it or replayed from it
+        self.cassette = get_cassette()
+        self._transport = self.cassette.adapter(self._adapter) if self.cassette else self._adapter
+        self._local = threading.local()
+        self._sessions = []
+        self._lock = threading.Lock()
+        self.rate_limiter = get_rate_limiter()
+        self.cache = get_response_cache()
+        self.negative_cache = get_negative_cache()
+        self.singleflight = SingleFlight()
+        self.stats = {'requests': 0, 'retries': 0, 'errors': 0, 'throttled': 0}
+
+    @property
+    def default_headers(self):
+        """Headers sent with every request"""
+        return {
+            "X-Cisco-Meraki-API-Key": self.api_key,
+            "Content-Type": "application/json",
+            "Connection": "keep-alive"
+        }
+
+    @property
+    def session(self):
+        """The calling thread's session, mounted on the shared pool"""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.mount('https://', self._transport)
+            session.mount('http://', self._transport)
+            session.headers.update(self.default_headers)
+            self._local.session = session
+            with self._lock:
+                self._sessions.append(session)
+        return session
+
+    def _count(self, key, amount=1):
+        with self._lock:
+            self.stats[key] += amount
+
+    def connection_stats(self):
+        """
+        Get connection pool statistics.
+
+        Returns:
+            dict: Request counters plus the number of connections opened so far
+        """
+        opened = 0
+        for pool_key in list(self._adapter.poolmanager.pools.keys()):
+            pool = self._adapter.poolmanager.pools.get(pool_key)
+            if pool is not None:
+                opened += pool.num_connections
+        with self._lock:
+            stats = dict(self.stats)
+        stats['connections_opened'] = opened
+        stats['pool_size'] = self.pool_size
+        stats['deduplicated'] = self.singleflight.stats['deduplicated']
+        stats['cache'] = self.cache.summary()
+        return stats
+
+    def endpoint_path(self, endpoint):
+        """Normalize an endpoint or absolute URL to a path relative to the base URL"""
+        return endpoint_path(endpoint, self.base_url)
+
+    def _send(self, session, url, endpoint, **kwargs):
+        """
+        Send one request under the shared rate limit, waiting out 429 responses.
+
+        Args:
+            session (requests.Session): Session to send with
+            url (str): Full request URL
+            endpoint (str): API endpoint path, used to pick the rate limit bucket
+            **kwargs: Arguments passed to session.get()
+
+        Returns:
+            requests.Response: The first non-429 response, or the last 429 once
+            MAX_THROTTLE_RETRIES is exhausted
+        """
+        for attempt in range(MAX_THROTTLE_RETRIES + 1):
+            self.rate_limiter.acquire(self.api_key, endpoint)
+            self._count('requests')
+            response = session.get(url, **kwargs)
+            if response.status_code != 429:
+                return response
+            self._count('throttled')
+            if attempt < MAX_THROTTLE_RETRIES:
+                # Release the connection, or a streamed 429 keeps it out of the pool
+                response.close()
+            self.rate_limiter.throttle(self.api_key, endpoint,
+                                       parse_retry_after(response.headers.get('Retry-After')))
+        return response
+
+    def request(self, endpoint, headers=None, params=None, max_retries=MAX_RETRIES,
+                retry_delay=RETRY_DELAY, timeout=None, stream=False):
+        """
+        Send a GET request with retries and the Meraki-specific 404 handling.
+
+        Args:
+            endpoint (str): The API endpoint path, e.g. "/organizations", or an
+                absolute URL such as a pagination ``Link`` target
+            headers (dict): Optional extra request headers
+            params (dict): Query parameters
+            max_retries (int): Maximum number of retry attempts
+            retry_delay (int): Base delay between retries in seconds
+            timeout (int): Request timeout in seconds
+            stream (bool): Return before the body is downloaded; the caller must
+                close the response
+
+        Returns:
+            requests.Response: The successful response, or None when the device
+            does not support the uplink endpoint
+        """
+        if endpoint.startswith(('http://', 'https://')):
+            url = endpoint
+        else:
+            url = None
+        endpoint = self.endpoint_path(endpoint)
+        if url is None:
+            url = f"{self.base_url}{endpoint}"
+        if timeout is None:
+            timeout = self.timeout
+
+        # Special handling for known endpoints that might return 404 for some devices
+        is_uplink_endpoint = '/uplink' in endpoint
+        is_topology_linklayer_endpoint = '/topology/linkLayer' in endpoint
+
+        # Skip endpoints already known to 404 for this device or network
+        if self.negative_cache.contains(endpoint, self.api_key, self.base_url):
+            logging.debug(f"Skipping {endpoint}, known to be unsupported")
+            if is_uplink_endpoint:
+                return None
+            response = requests.Response()
+            response.status_code = 404
+            response.url = url
+            raise requests.exceptions.HTTPError(f"404 Client Error: Not Found (remembered) for url: {url}",
+                                                response=response)
+
+        session = self.session
+        verify = self.verify
+
+        for attempt in range(max_retries):
+            try:
+                logging.info(f"Making request to {url} with timeout {timeout}s")
+                response = self._send(session, url, endpoint, headers=headers, params=params,
+                                      verify=verify, timeout=timeout, stream=stream)
+
+                # Handle 404 errors for uplink endpoint specially
+                if response.status_code == 404 and is_uplink_endpoint:
+                    device_serial = endpoint.split('/')[-2]  # Extract device serial from URL
+                    logging.warning(f"Device {device_serial} does not support uplink information")
+                    self.negative_cache.add(endpoint, self.api_key, self.base_url)
+                    response.close()
+                    return None
+
+                # Topology linkLayer is not available for all networks, so 404s are not retried
+                if response.status_code == 404 and is_topology_linklayer_endpoint:
+                    logging.debug("Topology linkLayer endpoint not available for this network, will use fallback method")
+                    self.negative_cache.add(endpoint, self.api_key, self.base_url)
+                    response.raise_for_status()
+
+                response.raise_for_status()
+                return response
+
+            except requests.exceptions.SSLError as e:
+                logging.error(f"SSL error: {str(e)}")
+                self._count('errors')
+
+                if not verify and attempt == max_retries - 1:
+                    raise
+
+                # Try again without SSL verification and remember it for this client
+                logging.warning("SSL verification failed, retrying without verification")
+                verify = False
+                self.verify = False
+                self._count('retries')
+
+            except CassetteMiss:
+                self._count('errors')
+                raise
+
+            except requests.exceptions.RequestException as e:
+                self._count('errors')
+                status_code = getattr(getattr(e, 'response', None), 'status_code', None)
+                if stream and getattr(e, 'response', None) is not None:
+                    e.response.close()
+
+                # Skip retries for 404 on topology/linkLayer
+                if is_topology_linklayer_endpoint and (status_code == 404 or "404" in str(e)):
+                    logging.debug("Topology linkLayer endpoint not available, skipping retries")
+                    raise
+
+                logging.error(f"Request failed: {str(e)}")
+
+                # If this is the last attempt, re-raise
+                if attempt == max_retries - 1:
+                    if is_uplink_endpoint and (status_code == 404 or "404" in str(e)):
+                        device_serial = endpoint.split('/')[-2]
+                        logging.warning(f"Device {device_serial} does not support uplink information")
+                        return None
+                    raise
+
+                self._count('retries')
+                time.sleep(retry_delay * (2 ** attempt))  # Exponential backoff
+
+    def fetch(self, endpoint, headers=None, params=None, use_cache=True, **kwargs):
+        """
+        Fetch one response body, serving it from the response cache when fresh.
+
+        An expired entry that carries an ETag or Last-Modified validator is
+        refreshed with a conditional request, and reused on 304 Not Modified.
+        Concurrent identical fetches are coalesced into a single request.
+
+        Args:
+            endpoint (str): The API endpoint path, or an absolute pagination URL
+            headers (dict): Optional extra request headers
+            params (dict): Query parameters
+            use_cache (bool): Whether to read and populate the response cache
+            **kwargs: Retry and timeout options passed to request()
+
+        Returns:
+            CacheEntry: Raw body and pagination links, or None when the device
+            does not support the uplink endpoint
+        """
+        path = self.endpoint_path(endpoint)
+        key = cache_key(self.api_key, endpoint, params, self.base_url)
+        if use_cache:
+            entry = self.cache.get(key)
+            if entry is not None:
+                return entry
+        if headers:
+            # Custom headers may change the response, so don't share the call
+            return self._download(key, path, endpoint, headers, params, use_cache, **kwargs)
+        return self.singleflight.do(
+            key, lambda: self._download(key, path, endpoint, None, params, use_cache, **kwargs))
+
+    def _download(self, key, path, endpoint, headers, params, use_cache, **kwargs):
+        """Request a response body, revalidating an expired cache entry when possible"""
+        stale = None
+        if use_cache:
+            # Revalidate an expired copy instead of downloading it again
+            stale = self.cache.lookup(key, allow_stale=True)
+            if stale is not None and stale.conditional_headers():
+                headers = {**(headers or {}), **stale.conditional_headers()}
+            else:
+                stale = None
+
+        response = self.request(endpoint, headers=headers, params=params, **kwargs)
+        if response is None:
+            return None
+        if response.status_code == 304 and stale is not None:
+            return self.cache.revalidated(key, stale)
+        links = {rel: link['url'] for rel, link in response.links.items() if link.get('url')}
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        entry = None
+        if use_cache:
+            entry = self.cache.put(key, path, response.content, links, etag=etag, last_modified=last_modified)
+        return entry or CacheEntry(path, response.content, links, etag=etag, last_modified=last_modified)
+
+    def get(self, endpoint, headers=None, params=None, use_cache=True, **kwargs):
+        """
+        Make a GET request and decode the JSON body.
+
+        Args:
+            endpoint (str): The API endpoint path, e.g. "/organizations"
+            headers (dict): Optional extra request headers
+            params (dict): Query parameters
+            use_cache (bool): Whether to read and populate the response cache
+            **kwargs: Retry and timeout options passed to request()
+
+        Returns:
+            dict: JSON response from the API
+        """
+        entry = self.fetch(endpoint, headers=headers, params=params, use_cache=use_cache, **kwargs)
+        if entry is None:
+            return []  # Return empty list for uplink endpoint
+        data = entry.json()
+        self.rate_limiter.learn(self.endpoint_path(endpoint), data)
+        return data
+
+    @staticmethod
+    def _page_params(params, per_page, starting_after, ending_before):
+        """Build first-page query parameters and pick the Link relation to follow"""
+        params = dict(params or {})
+        if per_page is not None:
+            params['perPage'] = per_page
+        if starting_after is not None:
+            params['startingAfter'] = starting_after
+        if ending_before is not None:
+            params['endingBefore'] = ending_before
+        direction = 'prev' if ending_before is not None and starting_after is None else 'next'
+        return params, direction
+
+    def iter_pages(self, endpoint, headers=None, params=None, per_page=None, starting_after=None,
+                   ending_before=None, total_pages='all', max_records=None, use_cache=True, **kwargs):
+        """
+        Iterate over the pages of a paginated endpoint as they arrive.
+
+        Pages are followed through the RFC 5988 ``Link`` response header. The
+        ``next`` relation is followed by default; when only ``ending_before`` is
+        given the ``prev`` relation is followed instead, matching the Dashboard
+        API's cursor semantics.
+
+        Args:
+            endpoint (str): The API endpoint path
+            headers (dict): Optional extra request headers
+            params (dict): Query parameters for the first page
+            per_page (int, optional): Number of entries per page
+            starting_after (str, optional): Cursor to start after
+            ending_before (str, optional): Cursor to end before
+            total_pages (int or str): Maximum number of pages, or 'all'
+            max_records (int, optional): Stop after this many records
+            use_cache (bool): Whether to read and populate the response cache
+            **kwargs: Retry and timeout options passed to request()
+
+        Yields:
+            list: One decoded page at a time (a non-list body is yielded once)
+        """
+        params, direction = self._page_params(params, per_page, starting_after, ending_before)
+        if total_pages in ('all', -1, None):
+            total_pages = None
+
+        target = endpoint
+        pages = 0
+        records = 0
+        while target:
+            entry = self.fetch(target, headers=headers, params=params, use_cache=use_cache, **kwargs)
+            if entry is None:
+                return
+            page = entry.json()
+            pages += 1
+            self.rate_limiter.learn(self.endpoint_path(endpoint), page)
+
+            if not isinstance(page, list):
+                yield page
+                return
+
+            if max_records is not None and records + len(page) >= max_records:
+                yield page[:max_records - records]
+                return
+            records += len(page)
+            yield page
+
+            if total_pages is not None and pages >= total_pages:
+                return
+
+            # The Link URL already carries the cursor and the original query
+            target = entry.links.get(direction)
+            params = None
+
+    def iter_records(self, endpoint, **kwargs):
+        """
+        Iterate over the individual records of a paginated endpoint.
+
+        Args:
+            endpoint (str): The API endpoint path
+            **kwargs: Pagination, retry and timeout options passed to iter_pages()
+
+        Yields:
+            dict: One record at a time
+        """
+        for page in self.iter_pages(endpoint, **kwargs):
+            if isinstance(page, list):
+                yield from page
+            else:
+                yield page
+
+    def iter_stream(self, endpoint, headers=None, params=None, per_page=None, starting_after=None,
+                    ending_before=None, total_pages='all', max_records=None, chunk_size=CHUNK_SIZE, **kwargs):
+        """
+        Iterate over the records of a paginated endpoint, decoding each page as it downloads.
+
+        Unlike iter_records(), a page is never held in memory as a whole. Each
+        page is requested gzip-compressed and its JSON array is parsed
+        incrementally, so records reach the caller while the rest of the page
+        is still arriving. Streamed pages bypass the response cache.
+
+        Args:
+            endpoint (str): The API endpoint path
+            headers (dict): Optional extra request headers
+            params (dict): Query parameters for the first page
+            per_page (int, optional): Number of entries per page
+            starting_after (str, optional): Cursor to start after
+            ending_before (str, optional): Cursor to end before
+            total_pages (int or str): Maximum number of pages, or 'all'
+            max_records (int, optional): Stop after this many records
+            chunk_size (int): Bytes read from the connection at a time
+            **kwargs: Retry and timeout options passed to request()
+
+        Yields:
+            dict: One record at a time
+        """
+        params, direction = self._page_params(params, per_page, starting_after, ending_before)
+        if total_pages in ('all', -1, None):
+            total_pages = None
+        headers = {**(headers or {}), 'Accept-Encoding': 'gzip'}
+        path = self.endpoint_path(endpoint)
+
+        target = endpoint
+        pages = 0
+        records = 0
+        while target:
+            response = self.request(target, headers=headers, params=params, stream=True, **kwargs)
+            if response is None:
+                return
+            try:
+                for record in iter_json_array(response.iter_content(chunk_size)):
+                    self.rate_limiter.learn(path, [record])
+                    yield record
+                    records += 1
+                    if max_records is not None and records >= max_records:
+                        return
+                link = response.links.get(direction)
+            finally:
+                response.close()
+            pages += 1
+
+            if total_pages is not None and pages >= total_pages:
+                return
+
+            # The Link URL already carries the cursor and the original query
+            target = link.get('url') if link else None
+            params = None
+
+    def close(self):
+        """Close every thread's session and release pooled connections"""
+        with self._lock:
+            sessions, self._sessions = self._sessions, []
+        for session in sessions:
+            session.close()
+        self._adapter.close()
+        self._local = threading.local()
+        if self.cassette is not None and self.cassette.recording:
+            self.cassette.save()
+
+
+def get_client(api_key, pool_size=None):
+    """
+    Get the shared client for an API key, creating it on first use.
+
+    Args:
+        api_key (str): Meraki API key
+        pool_size (int, optional): Pool size to use if the client is created now,
+            or to resize an existing client to
+
+    The client is recreated if MERAKI_BASE_URL or the cassette changed since it
+    was created.
+
+    Returns:
+        MerakiHTTPClient: Client for the API key
+    """
+    with _clients_lock:
+        client = _clients.get(api_key)
+        if client is not None and ((pool_size is not None and pool_size != client.pool_size)
+                                   or client.base_url != get_base_url().rstrip('/')
+                                   or client.cassette is not get_cassette()):
+            client.close()
+            client = None
+        if client is None:
+            client = MerakiHTTPClient(api_key, pool_size=pool_size or DEFAULT_POOL_SIZE)
+            _clients[api_key] = client
+        return client
+
+
+def close_clients():
+    """Close every shared client"""
+    with _clients_lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        client.close()
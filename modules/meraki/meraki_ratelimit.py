@@ -0,0 +1,332 @@
+"""
+Meraki Rate Limiter Module
+
+This module provides a process-wide rate scheduler for the Meraki Dashboard API.
+The Dashboard API allows roughly 10 requests per second per organization, so
+every request acquires a token from a bucket keyed by API key and organization
+before it is sent. Threads block with time.sleep and coroutines with
+asyncio.sleep, but both draw from the same buckets.
+
+A 429 response pauses its bucket for the ``Retry-After`` interval, which holds
+back every other thread and coroutine targeting the same organization.
+"""
+
+import asyncio
+import logging
+import os
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+# Default budget, overridable through the environment
+DEFAULT_RATE = float(os.getenv('MERAKI_RATE_LIMIT', '10'))  # requests per second
+DEFAULT_BURST = int(os.getenv('MERAKI_RATE_BURST', '10'))   # bucket capacity
+DEFAULT_RETRY_AFTER = 1  # seconds, used when a 429 has no usable Retry-After
+
+_ORGANIZATION_PATH = re.compile(r'^/organizations/([^/?]+)')
+_NETWORK_PATH = re.compile(r'^/networks/([^/?]+)')
+_DEVICE_PATH = re.compile(r'^/devices/([^/?]+)')
+
+
+def parse_retry_after(value, default=DEFAULT_RETRY_AFTER):
+    """
+    Parse a Retry-After header value.
+
+    Args:
+        value (str): Header value, either delay-seconds or an HTTP-date
+        default (float): Delay to use when the value is missing or invalid
+
+    Returns:
+        float: Delay in seconds
+    """
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=timezone.utc)
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return default
+
+
+class TokenBucket:
+    """
+    Token bucket shared by threads and coroutines.
+
+    Tokens are reserved up front: a caller that finds the bucket empty still
+    takes a token (driving the balance negative) and is told how long to wait,
+    so waiters are served in arrival order without polling.
+    """
+
+    def __init__(self, rate=DEFAULT_RATE, capacity=DEFAULT_BURST):
+        """
+        Initialize the bucket.
+
+        Args:
+            rate (float): Tokens added per second
+            capacity (int): Maximum number of tokens held
+        """
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.paused_until = 0.0
+        self.updated = time.monotonic()
+        self.acquired = 0
+        self.throttled = 0
+        self.waited = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self):
+        """
+        Take a token without blocking.
+
+        Returns:
+            float: Seconds the caller must wait before sending
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens -= 1
+            wait = max(0.0, -self.tokens / self.rate, self.paused_until - now)
+            self.acquired += 1
+            self.waited += wait
+            return wait
+
+    def paused_for(self):
+        """Seconds left before a Retry-After pause ends"""
+        with self._lock:
+            return max(0.0, self.paused_until - time.monotonic())
+
+    def acquire(self):
+        """Block the calling thread until a token is available"""
+        wait = self.reserve()
+        while wait > 0:
+            time.sleep(wait)
+            # A 429 may have paused the bucket while we slept
+            wait = self.paused_for()
+
+    async def acquire_async(self):
+        """Suspend the calling coroutine until a token is available"""
+        wait = self.reserve()
+        while wait > 0:
+            await asyncio.sleep(wait)
+            wait = self.paused_for()
+
+    def pause(self, seconds):
+        """
+        Pause the bucket after a 429 response.
+
+        Args:
+            seconds (float): Retry-After interval
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens = min(self.tokens, 0.0)
+            self.paused_until = max(self.paused_until, now + seconds)
+            self.throttled += 1
+
+    def budget(self):
+        """
+        Get the bucket's current budget.
+
+        Returns:
+            dict: Rate, capacity, available tokens (negative when callers are
+            queued), remaining pause and counters
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            return {
+                'rate': self.rate,
+                'capacity': self.capacity,
+                'available': round(self.tokens, 3),
+                'paused_for': round(max(0.0, self.paused_until - now), 3),
+                'acquired': self.acquired,
+                'throttled': self.throttled,
+                'waited_seconds': round(self.waited, 3)
+            }
+
+
+class RateLimiter:
+    """
+    Registry of token buckets keyed by API key and organization.
+
+    Requests whose organization can't be resolved from the path (or from
+    networks and devices seen in earlier organization listings) share a
+    per-API-key default bucket.
+    """
+
+    def __init__(self, rate=DEFAULT_RATE, capacity=DEFAULT_BURST):
+        """
+        Initialize the limiter.
+
+        Args:
+            rate (float): Requests per second allowed per organization
+            capacity (int): Burst size per organization
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._buckets = {}
+        self._network_orgs = {}
+        self._device_orgs = {}
+        self._lock = threading.Lock()
+
+    def organization_for(self, endpoint):
+        """
+        Resolve the organization an endpoint belongs to.
+
+        Args:
+            endpoint (str): API endpoint path
+
+        Returns:
+            str: Organization ID, or None if unknown
+        """
+        match = _ORGANIZATION_PATH.match(endpoint)
+        if match:
+            return match.group(1)
+        match = _NETWORK_PATH.match(endpoint)
+        if match:
+            return self._network_orgs.get(match.group(1))
+        match = _DEVICE_PATH.match(endpoint)
+        if match:
+            return self._device_orgs.get(match.group(1))
+        return None
+
+    def learn(self, endpoint, records):
+        """
+        Remember which organization the networks and devices in a response belong to.
+
+        Args:
+            endpoint (str): API endpoint path the records came from
+            records (list): Decoded response records
+        """
+        match = _ORGANIZATION_PATH.match(endpoint)
+        if not match or not isinstance(records, list):
+            return
+        org_id = match.group(1)
+        for record in records:
+            if not isinstance(record, dict):
+                continue
+            if record.get('serial'):
+                self._device_orgs[record['serial']] = org_id
+            elif record.get('id') and '/networks' in endpoint:
+                self._network_orgs[record['id']] = org_id
+            if record.get('networkId'):
+                self._network_orgs[record['networkId']] = org_id
+
+    def bucket(self, api_key, organization_id=None):
+        """
+        Get the bucket for an API key and organization, creating it on first use.
+
+        Args:
+            api_key (str): Meraki API key
+            organization_id (str, optional): Organization ID
+
+        Returns:
+            TokenBucket: The shared bucket
+        """
+        key = (api_key, organization_id)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            with self._lock:
+                bucket = self._buckets.get(key)
+                if bucket is None:
+                    bucket = TokenBucket(self.rate, self.capacity)
+                    self._buckets[key] = bucket
+        return bucket
+
+    def bucket_for(self, api_key, endpoint):
+        """Get the bucket a request to an endpoint draws from"""
+        return self.bucket(api_key, self.organization_for(endpoint))
+
+    def acquire(self, api_key, endpoint):
+        """Block until a request to the endpoint may be sent"""
+        self.bucket_for(api_key, endpoint).acquire()
+
+    async def acquire_async(self, api_key, endpoint):
+        """Wait asynchronously until a request to the endpoint may be sent"""
+        await self.bucket_for(api_key, endpoint).acquire_async()
+
+    def throttle(self, api_key, endpoint, retry_after):
+        """
+        Pause the endpoint's bucket after a 429 response.
+
+        Args:
+            api_key (str): Meraki API key
+            endpoint (str): API endpoint path that was throttled
+            retry_after (float): Retry-After interval in seconds
+        """
+        organization_id = self.organization_for(endpoint)
+        logging.warning(f"Rate limited by Meraki API (organization {organization_id or 'unknown'}), "
+                        f"pausing for {retry_after}s")
+        self.bucket(api_key, organization_id).pause(retry_after)
+
+    def budget(self, api_key=None):
+        """
+        Get the current budget of every bucket.
+
+        Args:
+            api_key (str, optional): Only report buckets for this API key
+
+        Returns:
+            list: One budget dictionary per bucket, with the API key masked
+        """
+        with self._lock:
+            buckets = list(self._buckets.items())
+        budgets = []
+        for (key, organization_id), bucket in buckets:
+            if api_key is not None and key != api_key:
+                continue
+            budget = bucket.budget()
+            budget['api_key'] = f"...{key[-4:]}" if key else None
+            budget['organization_id'] = organization_id
+            budgets.append(budget)
+        return budgets
+
+
+_rate_limiter = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    """
+    Get the process-wide rate limiter, creating it on first use.
+
+    Returns:
+        RateLimiter: Shared rate limiter
+    """
+    global _rate_limiter
+    if _rate_limiter is None:
+        with _rate_limiter_lock:
+            if _rate_limiter is None:
+                _rate_limiter = RateLimiter()
+    return _rate_limiter
+
+
+def configure_rate_limiter(rate=DEFAULT_RATE, capacity=DEFAULT_BURST):
+    """
+    Replace the process-wide rate limiter.
+
+    Args:
+        rate (float): Requests per second allowed per organization
+        capacity (int): Burst size per organization
+
+    Returns:
+        RateLimiter: The new shared rate limiter
+    """
+    global _rate_limiter
+    with _rate_limiter_lock:
+        _rate_limiter = RateLimiter(rate, capacity)
+    return _rate_limiter
@@ -16,6 +16,11 @@ import platform
 from datetime import datetime
 from termcolor import colored
 
+from modules.meraki.meraki_bulk import TOPOLOGY_DEADLINE, fetch_concurrently
+from modules.meraki.meraki_client import get_base_url
+from modules.meraki.topology_builder import build_network_topology
+from modules.meraki.topology_graph import TopologyGraph
+
 # Try to import the Meraki SDK, install if not available
 try:
     import meraki
@@ -87,7 +92,7 @@ class MerakiSDKWrapper:
                 # First try with verification enabled
                 dashboard = meraki.DashboardAPI(
                     api_key=self.api_key,
-                    base_url='https://api.meraki.com/api/v1',
+                    base_url=get_base_url(),
                     output_log=False,
                     print_console=False,
                     suppress_logging=False,
@@ -106,7 +111,7 @@ class MerakiSDKWrapper:
                 # If that fails, try with verification disabled
                 dashboard = meraki.DashboardAPI(
                     api_key=self.api_key,
-                    base_url='https://api.meraki.com/api/v1',
+                    base_url=get_base_url(),
                     output_log=False,
                     print_console=False,
                     suppress_logging=False,
@@ -122,7 +127,7 @@ class MerakiSDKWrapper:
             # For non-Windows platforms, use system certificates
             return meraki.DashboardAPI(
                 api_key=self.api_key,
-                base_url='https://api.meraki.com/api/v1',
+                base_url=get_base_url(),
                 output_log=False,
                 print_console=False,
                 suppress_logging=False,
@@ -219,7 +224,7 @@ class MerakiSDKWrapper:
             list: List of network dictionaries
         """
         try:
-            return self.dashboard.organizations.getOrganizationNetworks(organizationId=org_id)
+            return self.dashboard.organizations.getOrganizationNetworks(organizationId=org_id, total_pages='all')
         except Exception as e:
             logging.error(f"Error getting organization networks: {str(e)}")
             
@@ -270,7 +275,7 @@ class MerakiSDKWrapper:
             list: List of device dictionaries
         """
         try:
-            return self.dashboard.organizations.getOrganizationDevices(organizationId=org_id)
+            return self.dashboard.organizations.getOrganizationDevices(organizationId=org_id, total_pages='all')
         except Exception as e:
             logging.error(f"Error getting organization devices: {str(e)}")
             
@@ -423,7 +428,7 @@ class MerakiSDKWrapper:
             list: List of inventory item dictionaries
         """
         try:
-            return self.dashboard.organizations.getOrganizationInventoryDevices(org_id)
+            return self.dashboard.organizations.getOrganizationInventoryDevices(org_id, total_pages='all')
         except Exception as e:
             logging.error(f"Error getting inventory for organization {org_id}: {str(e)}")
             return []
@@ -480,7 +485,7 @@ class MerakiSDKWrapper:
             list: List of device status dictionaries with enhanced information
         """
         try:
-            devices_statuses = self.dashboard.organizations.getOrganizationDevicesStatuses(org_id)
+            devices_statuses = self.dashboard.organizations.getOrganizationDevicesStatuses(org_id, total_pages='all')
             if devices_statuses:
                 # Enrich device status data
                 for device in devices_statuses:
@@ -561,7 +566,7 @@ class MerakiSDKWrapper:
             list: List of client dictionaries with enhanced information
         """
         try:
-            clients = self.dashboard.networks.getNetworkClients(network_id, timespan=timespan)
+            clients = self.dashboard.networks.getNetworkClients(network_id, timespan=timespan, total_pages='all')
             if clients:
                 # Enrich client data with better field mapping
                 for client in clients:
@@ -635,184 +640,59 @@ class MerakiSDKWrapper:
             logging.warning(f"Could not get network traffic: {str(e)}")
             return []
     
-    def get_network_topology(self, network_id):
+    def get_network_topology(self, network_id, deadline=None, as_graph=False):
         """
         Get network topology data.
+
+        Devices, clients, topology links and the network name are fetched
+        concurrently under an overall deadline.
         
         Args:
             network_id (str): Network ID
+            deadline (float, optional): Seconds to wait for the calls before using
+                partial results (default: TOPOLOGY_DEADLINE)
+            as_graph (bool): Return a TopologyGraph instead of the dict
             
         Returns:
-            dict: Network topology data with nodes and links
+            dict: Network topology data with nodes and links, and the sources that
+            failed or missed the deadline under 'partial' (a network without
+            linkLayer support isn't partial). With as_graph, the same
+            as a TopologyGraph.
         """
         try:
-            # Get network devices
-            devices = self.get_network_devices(network_id)
-            
-            # Get network clients
-            clients = self.get_network_clients(network_id, timespan=10800)
-            
-            # Get topology links directly from Meraki API
-            try:
-                topology_links = self.dashboard.networks.getNetworkTopologyLinkLayer(network_id)
-            except Exception as e:
-                logging.warning(f"Could not get topology links from API, building manually: {str(e)}")
-                topology_links = []
-            
-            # Initialize topology data
-            topology_data = {
-                'network_name': self.get_network_name(network_id),
-                'nodes': [],
-                'links': []
-            }
-            
-            # Add devices as nodes
-            device_map = {}  # Map serial numbers to node indices
-            for i, device in enumerate(devices):
-                device_type = 'unknown'
-                if 'model' in device and device['model'] is not None:
-                    model = device['model'].lower()
-                    if 'mx' in model:
-                        device_type = 'security_appliance'
-                    elif 'ms' in model:
-                        device_type = 'switch'
-                    elif 'mr' in model:
-                        device_type = 'wireless'
-                    elif 'mv' in model:
-                        device_type = 'camera'
-                
-                node = {
-                    'id': device.get('serial', f"device_{i}"),
-                    'label': device.get('name', 'Unknown Device'),
-                    'type': device_type,
-                    'model': device.get('model', 'Unknown'),
-                    'ip': device.get('lanIp', 'No IP'),
-                    'mac': device.get('mac', 'No MAC'),
-                    'serial': device.get('serial', 'No Serial'),
-                    'firmware': device.get('firmware', 'Unknown'),
-                    'status': device.get('status', 'unknown')
-                }
-                
-                topology_data['nodes'].append(node)
-                device_map[device.get('serial')] = len(topology_data['nodes']) - 1
-            
-            # Add clients as nodes
-            for i, client in enumerate(clients):
-                # Determine client type based on available information
-                client_type = 'unknown'
-                if 'deviceTypePrediction' in client and client['deviceTypePrediction'] is not None:
-                    client_type = client['deviceTypePrediction'].lower()
-                elif 'manufacturer' in client and client['manufacturer'] is not None:
-                    manufacturer = client['manufacturer'].lower()
-                    if any(mobile in manufacturer for mobile in ['apple', 'samsung', 'lg', 'motorola', 'xiaomi']):
-                        client_type = 'mobile'
-                    elif any(pc in manufacturer for pc in ['dell', 'hp', 'lenovo', 'microsoft', 'asus']):
-                        client_type = 'desktop'
-                
-                # Get the connection details
-                connection_details = {
-                    'type': client.get('recentDeviceConnection', 'Unknown'),
-                    'vlan': client.get('vlan', 'Unknown'),
-                    'port': client.get('switchport', 'Unknown'),
-                    'last_seen': client.get('lastSeen', 'Unknown')
-                }
-                
-                node = {
-                    'id': client.get('id', f"client_{i}"),
-                    'label': client.get('description', client.get('mac', 'Unknown Client')),
-                    'type': 'client',
-                    'client_type': client_type,
-                    'ip': client.get('ip', 'No IP'),
-                    'mac': client.get('mac', 'No MAC'),
-                    'vlan': client.get('vlan', 'Unknown'),
-                    'connection': connection_details,
-                    'usage': client.get('usage', {})
-                }
-                
-                topology_data['nodes'].append(node)
-            
-            # Add links from the topology endpoint if available
-            if topology_links:
-                for link in topology_links:
-                    source_serial = link.get('source', {}).get('serial')
-                    dest_serial = link.get('destination', {}).get('serial')
-                    
-                    if source_serial in device_map and dest_serial in device_map:
-                        topology_data['links'].append({
-                            'source': device_map[source_serial],
-                            'target': device_map[dest_serial],
-                            'type': link.get('linkType', 'unknown'),
-                            'status': link.get('status', 'unknown')
-                        })
-            else:
-                # Fallback: build links based on device relationships
-                # Connect switches to security appliances
-                security_appliances = [i for i, node in enumerate(topology_data['nodes']) 
-                                    if node['type'] == 'security_appliance']
-                switches = [i for i, node in enumerate(topology_data['nodes']) 
-                            if node['type'] == 'switch']
-                
-                # Connect all switches to the first security appliance if available
-                if security_appliances and switches:
-                    for switch in switches:
-                        topology_data['links'].append({
-                            'source': security_appliances[0],
-                            'target': switch,
-                            'type': 'wired',
-                            'status': 'active'
-                        })
-                
-                # Connect switches to each other in a chain
-                for i in range(len(switches) - 1):
-                    topology_data['links'].append({
-                        'source': switches[i],
-                        'target': switches[i + 1],
-                        'type': 'wired',
-                        'status': 'active'
-                    })
-            
-            # Connect clients to their parent devices
-            for i, node in enumerate(topology_data['nodes']):
-                if node['type'] == 'client':
-                    # Find the device this client is connected to
-                    connected_to = None
-                    
-                    # For wireless clients
-                    if node.get('connection', {}).get('type') == 'wireless':
-                        # Find wireless APs
-                        wireless_aps = [j for j, d in enumerate(topology_data['nodes']) 
-                                        if d['type'] == 'wireless']
-                        if wireless_aps:
-                            # Connect to the first AP (could be improved with actual connection data)
-                            connected_to = wireless_aps[0]
-                    
-                    # For wired clients
-                    elif node.get('connection', {}).get('type') == 'wired':
-                        # Try to find the switch with matching port
-                        client_port = node.get('connection', {}).get('port')
-                        client_vlan = node.get('connection', {}).get('vlan')
-                        
-                        for j, device in enumerate(topology_data['nodes']):
-                            if device['type'] == 'switch':
-                                # In a real implementation, you would check if this switch has the port
-                                # the client is connected to. For now, connect to any switch.
-                                connected_to = j
-                                break
-                    
-                    # If we found a device to connect to
-                    if connected_to is not None:
-                        topology_data['links'].append({
-                            'source': connected_to,
-                            'target': i,
-                            'type': node.get('connection', {}).get('type', 'unknown'),
-                            'status': 'active'
-                        })
-            
-            return topology_data
-            
+            results = fetch_concurrently({
+                'devices': lambda: self.get_network_devices(network_id),
+                'clients': lambda: self.get_network_clients(network_id, timespan=10800),
+                # Get topology links directly from Meraki API
+                'links': lambda: self._get_topology_link_layer(network_id),
+                'network_name': lambda: self.get_network_name(network_id)
+            }, deadline=TOPOLOGY_DEADLINE if deadline is None else deadline)
+
+            devices = results['devices']['data'] or []
+            clients = results['clients']['data'] or []
+            topology_links = results['links']['data'] or []
+            if results['links']['error']:
+                logging.warning(f"Could not get topology links from API, building manually: {results['links']['error']}")
+            
+            topology_data = build_network_topology(devices, clients, topology_links,
+                                                   results['network_name']['data'] or "Unknown Network")
+            topology_data['partial'] = [name for name, result in results.items() if result['error']]
+            topology_data['network_id'] = network_id
         except Exception as e:
             logging.error(f"Error getting topology for network {network_id}: {str(e)}")
-            return {'nodes': [], 'links': [], 'network_name': 'Unknown Network'}
+            topology_data = {'nodes': [], 'links': [], 'network_name': 'Unknown Network'}
+        return TopologyGraph.from_topology(topology_data) if as_graph else topology_data
+    
+    def _get_topology_link_layer(self, network_id):
+        """linkLayer topology of a network, or None if the network doesn't support it"""
+        try:
+            return self.dashboard.networks.getNetworkTopologyLinkLayer(network_id)
+        except meraki.exceptions.APIError as e:
+            # Not every network supports linkLayer; that is expected, not a failure
+            if getattr(e, 'status', None) == 404:
+                logging.debug(f"Network {network_id} has no linkLayer topology, links will be built manually")
+                return None
+            raise
     
     def get_network_name(self, network_id):
         """
@@ -0,0 +1,139 @@
+"""
+Meraki Request Coalescing Module
+
+This module collapses concurrent identical requests into a single call. The
+first caller for a key (the leader) performs the request. Callers that arrive
+while it is in flight wait for it and receive the same result, or the same
+exception, instead of sending their own request and spending rate limit budget.
+
+SingleFlight serves threads and AsyncSingleFlight serves coroutines on one
+event loop.
+"""
+
+import asyncio
+import threading
+
+
+class _Call:
+    """An in-flight call shared by its leader and waiters"""
+
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Thread-safe request coalescing.
+    """
+
+    def __init__(self):
+        """Initialize with no calls in flight"""
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.stats = {'calls': 0, 'deduplicated': 0}
+        # When False every caller runs its own call, e.g. to measure raw request throughput
+        self.enabled = True
+
+    def do(self, key, fn):
+        """
+        Run fn() unless an identical call is already in flight, in which case wait for it.
+
+        Args:
+            key (str): Identity of the call, e.g. a response cache key
+            fn (callable): Performs the call
+
+        Returns:
+            Any: The leader's return value (waiters raise the leader's exception)
+        """
+        if not self.enabled:
+            return fn()
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = _Call()
+                self._calls[key] = call
+                self.stats['calls'] += 1
+                leader = True
+            else:
+                self.stats['deduplicated'] += 1
+                leader = False
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def in_flight(self):
+        """Number of distinct calls currently in flight"""
+        with self._lock:
+            return len(self._calls)
+
+
+class AsyncSingleFlight:
+    """
+    Request coalescing for coroutines on a single event loop.
+    """
+
+    def __init__(self):
+        """Initialize with no calls in flight"""
+        self._calls = {}
+        self.stats = {'calls': 0, 'deduplicated': 0}
+        # When False every caller runs its own call, e.g. to measure raw request throughput
+        self.enabled = True
+
+    async def do(self, key, coroutine_function):
+        """
+        Await coroutine_function() unless an identical call is already in flight.
+
+        Args:
+            key (str): Identity of the call
+            coroutine_function (callable): Returns the awaitable performing the call
+
+        Returns:
+            Any: The leader's result (waiters raise the leader's exception)
+        """
+        if not self.enabled:
+            return await coroutine_function()
+        future = self._calls.get(key)
+        if future is not None:
+            self.stats['deduplicated'] += 1
+            # Shield so a cancelled waiter doesn't cancel the shared call
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        self.stats['calls'] += 1
+        try:
+            result = await coroutine_function()
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark the exception retrieved in case nobody was waiting
+            future.exception()
+            raise
+        finally:
+            self._calls.pop(key, None)
+
+    def in_flight(self):
+        """Number of distinct calls currently in flight"""
+        return len(self._calls)
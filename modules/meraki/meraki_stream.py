@@ -0,0 +1,134 @@
+"""
+Meraki Streaming JSON Module
+
+This module decodes large JSON array responses incrementally. Instead of holding
+the whole body as bytes, then text, then a list of dictionaries, the array is
+parsed chunk by chunk as it downloads and each element is yielded as soon as it
+is complete. Peak memory is bounded by the chunk size and the largest single
+record, not by the size of the organization.
+"""
+
+import codecs
+import json
+
+CHUNK_SIZE = 64 * 1024  # bytes read from the socket at a time
+
+_WHITESPACE = ' \t\n\r'
+
+
+class _ArrayParser:
+    """
+    Incremental parser for a top-level JSON array.
+
+    Elements are decoded with the standard library decoder's raw_decode(), so
+    each record is parsed by the C scanner exactly once it is complete.
+    """
+
+    def __init__(self):
+        self._decoder = json.JSONDecoder()
+        self._text = codecs.getincrementaldecoder('utf-8')()
+        self._buffer = ''
+        self._pos = 0
+        self._started = False
+        self._finished = False
+        self._scalar = False
+
+    def feed(self, chunk, final=False):
+        """
+        Add downloaded bytes and collect the elements they complete.
+
+        Args:
+            chunk (bytes): Next piece of the response body
+            final (bool): Whether this is the end of the body
+
+        Returns:
+            list: Elements completed by this chunk
+        """
+        self._buffer = self._buffer[self._pos:] + self._text.decode(chunk, final)
+        self._pos = 0
+        items = []
+        buffer = self._buffer
+        while not self._finished:
+            pos = self._skip(buffer, self._pos)
+            if pos == len(buffer):
+                break
+            if not self._started:
+                if buffer[pos] != '[':
+                    # Not an array: the body is a single value, decoded once complete
+                    self._scalar = True
+                    self._pos = pos
+                    break
+                self._started = True
+                self._pos = pos + 1
+                continue
+            if buffer[pos] == ']':
+                self._finished = True
+                self._pos = pos + 1
+                break
+            if buffer[pos] == ',':
+                pos = self._skip(buffer, pos + 1)
+                if pos == len(buffer):
+                    self._pos = pos
+                    break
+            try:
+                item, end = self._decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if final:
+                    raise
+                break  # Element is incomplete, wait for more data
+            if end == len(buffer) and not final:
+                # A number at the end of the buffer may continue in the next chunk
+                break
+            items.append(item)
+            self._pos = end
+        if final and self._scalar:
+            items.append(json.loads(buffer[self._pos:]))
+            self._finished = True
+        elif final and not self._finished and self._buffer[self._pos:].strip():
+            raise json.JSONDecodeError("Unterminated array", self._buffer, self._pos)
+        return items
+
+    @staticmethod
+    def _skip(buffer, pos):
+        while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+            pos += 1
+        return pos
+
+
+def iter_json_array(chunks):
+    """
+    Iterate over the elements of a JSON array delivered in pieces.
+
+    A body that is not an array (e.g. an error object) is yielded once as a
+    whole.
+
+    Args:
+        chunks (iterable): Byte strings making up the body
+
+    Yields:
+        Any: One decoded element at a time
+    """
+    parser = _ArrayParser()
+    for chunk in chunks:
+        if chunk:
+            yield from parser.feed(chunk)
+    yield from parser.feed(b'', final=True)
+
+
+async def iter_json_array_async(chunks):
+    """
+    Async counterpart of iter_json_array() for async byte iterators.
+
+    Args:
+        chunks (async iterable): Byte strings making up the body
+
+    Yields:
+        Any: One decoded element at a time
+    """
+    parser = _ArrayParser()
+    async for chunk in chunks:
+        if chunk:
+            for item in parser.feed(chunk):
+                yield item
+    for item in parser.feed(b'', final=True):
+        yield item
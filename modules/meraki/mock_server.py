@@ -0,0 +1,1024 @@
+"""
+Mock Meraki Dashboard API Server
+
+This module runs a self-contained stand-in for the Meraki Dashboard API v1. It
+serves the endpoints used by meraki_api and MerakiSDKWrapper from
+deterministic synthetic organizations. Records are generated on demand from
+their index, so an organization with 10k networks, 100k devices and 1M
+clients costs no memory up front. Every run with the same sizes and seed
+returns byte-identical responses.
+
+The server mimics the behaviour the request layer has to cope with:
+
+- ``Link`` header pagination with perPage, startingAfter and endingBefore
+- a per-organization request budget answered with 429 and ``Retry-After``
+- injected latency, random 429s and 404s
+- networks without linkLayer topology and devices without uplink data (404)
+- gzip responses and ``ETag``/``If-None-Match`` revalidation
+
+Point the tool at it with the MERAKI_BASE_URL environment variable:
+
+    python -m modules.meraki.mock_server --networks 10000 --devices 100000 --clients 1000000 --port 8089
+    MERAKI_BASE_URL=http://127.0.0.1:8089/api/v1 python main.py
+
+Or start it in-process:
+
+    with MockDashboardServer(networks=50, devices=500, clients=5000) as server:
+        os.environ['MERAKI_BASE_URL'] = server.base_url
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import multiprocessing
+import re
+import socket
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlparse
+from urllib.request import urlopen
+
+API_PREFIX = '/api/v1'
+STATS_PATH = '/_mock/stats'  # Server counters, not part of the Dashboard API
+
+# Time all synthetic timestamps are relative to, so responses are reproducible
+EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+SWITCH_PORTS = 24
+MANUFACTURERS = ['Apple', 'Dell', 'HP', 'Lenovo', 'Samsung', 'Microsoft', 'Cisco', 'Intel']
+OPERATING_SYSTEMS = ['macOS', 'Windows 11', 'iOS', 'Android', 'Linux', 'Chrome OS']
+SSIDS = ['Corp', 'Guest', 'IoT']
+VLANS = [10, 20, 30, 40]
+
+
+def _hash(*parts):
+    """Deterministic 32-bit hash of the parts"""
+    return zlib.crc32('|'.join(str(p) for p in parts).encode())
+
+
+def _timestamp(seconds_before):
+    return (EPOCH - timedelta(seconds=seconds_before)).strftime('%Y-%m-%dT%H:%M:%S.000000Z')
+
+
+def _mac(*parts):
+    value = _hash('mac', *parts)
+    return 'e0:55:3d:{:02x}:{:02x}:{:02x}'.format((value >> 16) & 0xff, (value >> 8) & 0xff, value & 0xff)
+
+
+class SyntheticOrganization:
+    """
+    Deterministic synthetic organization whose records are computed from their index.
+
+    Devices are spread evenly over networks. Each network has one MX appliance,
+    roughly a third switches and the rest access points, plus an MT sensor in
+    networks with eight or more devices. Clients are spread evenly over networks
+    and attach to the network's switches (wired) or access points (wireless).
+    """
+
+    def __init__(self, index, networks=10, devices=100, clients=1000, seed=0):
+        """
+        Initialize the organization.
+
+        Args:
+            index (int): Organization number, used in IDs
+            networks (int): Number of networks
+            devices (int): Total number of devices
+            clients (int): Total number of clients
+            seed (int): Varies names, statuses and addresses between runs
+        """
+        self.index = index
+        self.id = str(500000 + index)
+        self.name = f"Synthetic Org {index + 1}"
+        self.network_count = max(1, networks)
+        self.device_count = max(self.network_count, devices)
+        self._roles = {}  # (network, role) -> device indexes, since clients look them up constantly
+        self.client_count = max(0, clients)
+        self.seed = seed
+
+    # Networks
+    def network_id(self, n):
+        return f"N_{self.index:02d}{n:07d}"
+
+    def network_index(self, network_id):
+        match = re.match(r'^N_(\d{2})(\d{7})$', network_id or '')
+        if not match or int(match.group(1)) != self.index or int(match.group(2)) >= self.network_count:
+            return None
+        return int(match.group(2))
+
+    def network(self, n):
+        return {
+            'id': self.network_id(n),
+            'organizationId': self.id,
+            'name': f"Site {n + 1:05d}",
+            'productTypes': ['appliance', 'switch', 'wireless', 'sensor'],
+            'timeZone': 'America/Los_Angeles',
+            'tags': ['synthetic'] + (['hq'] if n == 0 else []),
+            'enrollmentString': None,
+            'url': f"https://n1.meraki.com/Site-{n + 1:05d}/n/{self.network_id(n)}/manage/usage/list",
+            'notes': '',
+            'isBoundToConfigTemplate': False
+        }
+
+    # Devices
+    def devices_in_network(self, n):
+        """Range of device indexes in network n"""
+        per_network, extra = divmod(self.device_count, self.network_count)
+        start = n * per_network + min(n, extra)
+        return range(start, start + per_network + (1 if n < extra else 0))
+
+    def device_network(self, d):
+        per_network, extra = divmod(self.device_count, self.network_count)
+        boundary = extra * (per_network + 1)
+        if d < boundary:
+            return d // (per_network + 1)
+        return extra + (d - boundary) // per_network
+
+    def device_role(self, d):
+        """One of 'appliance', 'switch', 'wireless' or 'sensor'"""
+        members = self.devices_in_network(self.device_network(d))
+        position = d - members.start
+        if position == 0:
+            return 'appliance'
+        if len(members) >= 8 and position == len(members) - 1:
+            return 'sensor'
+        if position <= max(1, len(members) // 3):
+            return 'switch'
+        return 'wireless'
+
+    def serial(self, d):
+        return f"Q2{self.index:02d}-{d // 10000:04d}-{d % 10000:04d}"
+
+    def device_index(self, serial):
+        match = re.match(r'^Q2(\d{2})-(\d{4})-(\d{4})$', serial or '')
+        if not match or int(match.group(1)) != self.index:
+            return None
+        d = int(match.group(2)) * 10000 + int(match.group(3))
+        return d if d < self.device_count else None
+
+    def device(self, d):
+        n = self.device_network(d)
+        role = self.device_role(d)
+        model, prefix = {'appliance': ('MX250', 'mx'), 'switch': ('MS225-48LP', 'ms'),
+                         'wireless': ('MR46', 'ap'), 'sensor': ('MT10', 'mt')}[role]
+        position = d - self.devices_in_network(n).start
+        return {
+            'serial': self.serial(d),
+            'name': f"site{n + 1:05d}-{prefix}{position:02d}",
+            'model': model,
+            'productType': role,
+            'mac': _mac(self.index, 'device', d),
+            'lanIp': f"10.{(n // 250) % 250}.{n % 250}.{position + 1}" if role != 'sensor' else None,
+            'networkId': self.network_id(n),
+            'firmware': {'appliance': 'wired-18-107', 'switch': 'switch-16-8',
+                         'wireless': 'wireless-30-6', 'sensor': 'sensor-2-1'}[role],
+            'tags': [],
+            'address': '',
+            'lat': 37.4180951010362,
+            'lng': -122.098531723022,
+            'url': f"https://n1.meraki.com/Site-{n + 1:05d}/n/{self.network_id(n)}/manage/nodes/new_list/{d}"
+        }
+
+    def device_status(self, d):
+        device = self.device(d)
+        health = _hash(self.seed, 'status', self.index, d) % 100
+        status = 'offline' if health < 2 else 'alerting' if health < 5 else 'dormant' if health < 6 else 'online'
+        return {
+            'name': device['name'],
+            'serial': device['serial'],
+            'mac': device['mac'],
+            'publicIp': f"203.0.{(d // 250) % 250}.{d % 250}",
+            'networkId': device['networkId'],
+            'status': status,
+            'lastReportedAt': _timestamp(30 + health * (3600 if status != 'online' else 1)),
+            'productType': device['productType'],
+            'model': device['model'],
+            'tags': [],
+            'lanIp': device['lanIp'],
+            'gateway': f"10.{(self.device_network(d) // 250) % 250}.{self.device_network(d) % 250}.1",
+            'ipType': 'dhcp',
+            'primaryDns': '8.8.8.8',
+            'secondaryDns': '8.8.4.4'
+        }
+
+    def devices_with_role(self, n, role):
+        key = (n, role)
+        devices = self._roles.get(key)
+        if devices is None:
+            devices = self._roles[key] = [d for d in self.devices_in_network(n) if self.device_role(d) == role]
+        return devices
+
+    # Clients
+    def clients_in_network(self, n):
+        """Range of client indexes in network n"""
+        per_network, extra = divmod(self.client_count, self.network_count)
+        start = n * per_network + min(n, extra)
+        return range(start, start + per_network + (1 if n < extra else 0))
+
+    def client_network(self, c):
+        per_network, extra = divmod(self.client_count, self.network_count)
+        boundary = extra * (per_network + 1)
+        if c < boundary:
+            return c // (per_network + 1)
+        return extra + (c - boundary) // max(1, per_network)
+
+    def client_id(self, c):
+        return f"k{self.index:02d}{c:08d}"
+
+    def client_index(self, client_id):
+        match = re.match(r'^k(\d{2})(\d{8})$', client_id or '')
+        if not match or int(match.group(1)) != self.index:
+            return None
+        return int(match.group(2))
+
+    def client(self, c):
+        n = self.client_network(c)
+        members = self.clients_in_network(n)
+        position = c - members.start
+        wired_devices = self.devices_with_role(n, 'switch')
+        wireless_devices = self.devices_with_role(n, 'wireless')
+        wired = not wireless_devices or (wired_devices and position % 3 == 0)
+        attached = wired_devices if wired else wireless_devices
+        if not attached:
+            attached = [self.devices_in_network(n).start]
+        d = attached[position % len(attached)]
+        device = self.device(d)
+        value = _hash(self.seed, 'client', self.index, c)
+        online = value % 10 < 8
+        return {
+            'id': self.client_id(c),
+            'mac': _mac(self.index, 'client', c),
+            'description': f"host-{n + 1:05d}-{position:04d}",
+            'ip': f"10.{100 + (n // 250) % 150}.{n % 250}.{position % 250 + 2}",
+            'ip6': None,
+            'user': None,
+            'firstSeen': _timestamp(86400 * 30 + value % 86400),
+            'lastSeen': _timestamp(60 if online else 3600 + value % 7200),
+            'manufacturer': MANUFACTURERS[value % len(MANUFACTURERS)],
+            'os': OPERATING_SYSTEMS[(value >> 8) % len(OPERATING_SYSTEMS)],
+            'recentDeviceSerial': device['serial'],
+            'recentDeviceName': device['name'],
+            'recentDeviceMac': device['mac'],
+            'recentDeviceConnection': 'Wired' if wired else 'Wireless',
+            'ssid': None if wired else SSIDS[position % len(SSIDS)],
+            'vlan': VLANS[position % len(VLANS)],
+            'switchport': str(position % SWITCH_PORTS + 1) if wired else None,
+            'usage': {'sent': value % 500000, 'recv': (value >> 4) % 2000000},
+            'status': 'Online' if online else 'Offline',
+            'notes': None,
+            'deviceTypePrediction': None
+        }
+
+    def clients_of_device(self, d):
+        n = self.device_network(d)
+        return [c for c in self.clients_in_network(n) if self.client(c)['recentDeviceSerial'] == self.serial(d)]
+
+    # Topology
+    def has_link_layer(self, n):
+        """Roughly one network in seven has no linkLayer topology (404)"""
+        return _hash(self.seed, 'linkLayer', self.index, n) % 7 != 0
+
+    def link_layer(self, n):
+        members = list(self.devices_in_network(n))
+        switches = self.devices_with_role(n, 'switch')
+        aps = self.devices_with_role(n, 'wireless')
+        appliance = members[0]
+
+        def node(d):
+            device = self.device(d)
+            return {
+                'derivedId': f"{d:012d}",
+                'mac': device['mac'],
+                'type': 'device',
+                'root': d == appliance,
+                'device': {'serial': device['serial'], 'name': device['name'],
+                           'model': device['model'], 'productType': device['productType']},
+                'discovered': {'lldp': None, 'cdp': None}
+            }
+
+        def end(d, port):
+            device = self.device(d)
+            return {
+                'node': {'derivedId': f"{d:012d}", 'type': 'device'},
+                'device': {'serial': device['serial'], 'name': device['name']},
+                'discovered': {'lldp': {'portId': str(port)}, 'cdp': {'portId': f"Port {port}"}}
+            }
+
+        links = []
+        if switches:
+            links.append((appliance, 3, switches[0], SWITCH_PORTS + 1))
+            for i in range(1, len(switches)):
+                links.append((switches[i - 1], SWITCH_PORTS + 2, switches[i], SWITCH_PORTS + 1))
+            for i, ap in enumerate(aps):
+                links.append((switches[i % len(switches)], i // len(switches) + 1, ap, 0))
+        else:
+            for ap in aps:
+                links.append((appliance, 4, ap, 0))
+
+        return {
+            'nodes': [node(d) for d in members if self.device_role(d) != 'sensor'],
+            'links': [{'ends': [end(a, pa), end(b, pb)], 'lastReportedAt': _timestamp(120)}
+                      for a, pa, b, pb in links],
+            'errors': []
+        }
+
+    # Site-to-site VPN
+    def vpn_hubs(self):
+        """Hub networks: about one in a hundred, at least one"""
+        return range(min(self.network_count, max(1, self.network_count // 100)))
+
+    def vpn_status(self, n):
+        """AutoVPN status of network n: hubs mesh with each other, spokes peer with two hubs"""
+        hubs = self.vpn_hubs()
+        appliance = self.devices_in_network(n).start
+        if n in hubs:
+            peers = [h for h in hubs if h != n]
+        else:
+            peers = sorted({hubs[n % len(hubs)], hubs[(n + 1) % len(hubs)]})
+        health = _hash(self.seed, 'vpn', self.index, n) % 100
+        return {
+            'networkId': self.network_id(n),
+            'networkName': self.network(n)['name'],
+            'deviceSerial': self.serial(appliance),
+            'deviceStatus': 'offline' if health < 2 else 'online',
+            'uplinks': [{'interface': 'wan1', 'publicIp': f"203.0.{(appliance // 250) % 250}.{appliance % 250}"}],
+            'vpnMode': 'hub' if n in hubs else 'spoke',
+            'exportedSubnets': [{'subnet': f"10.{(n // 250) % 250}.{n % 250}.0/24", 'name': 'Main'}],
+            'merakiVpnPeers': [{'networkId': self.network_id(p), 'networkName': self.network(p)['name'],
+                                'reachability': 'unreachable' if health < 3 else 'reachable'} for p in peers],
+            'thirdPartyVpnPeers': []
+        }
+
+    def switch_ports(self, d, statuses=False):
+        n = self.device_network(d)
+        neighbours = {}
+        for link in self.link_layer(n)['links'] if self.device_role(d) == 'switch' else []:
+            near, far = link['ends']
+            if near['device']['serial'] == self.serial(d):
+                neighbours[near['discovered']['lldp']['portId']] = far['device']['name']
+            elif far['device']['serial'] == self.serial(d):
+                neighbours[far['discovered']['lldp']['portId']] = near['device']['name']
+        ports = []
+        for port in range(1, SWITCH_PORTS + 3):
+            port_id = str(port)
+            if not statuses:
+                ports.append({
+                    'portId': port_id, 'name': None, 'tags': [], 'enabled': True, 'poeEnabled': port <= SWITCH_PORTS,
+                    'type': 'trunk' if port > SWITCH_PORTS else 'access', 'vlan': VLANS[port % len(VLANS)],
+                    'voiceVlan': None, 'allowedVlans': 'all', 'isolationEnabled': False, 'rstpEnabled': True,
+                    'stpGuard': 'disabled', 'linkNegotiation': 'Auto negotiate'
+                })
+                continue
+            value = _hash(self.seed, 'port', self.index, d, port)
+            connected = port_id in neighbours or value % 3 != 0
+            status = {
+                'portId': port_id, 'enabled': True, 'status': 'Connected' if connected else 'Disconnected',
+                'isUplink': port > SWITCH_PORTS, 'errors': [], 'warnings': [],
+                'speed': '1 Gbps' if connected else '', 'duplex': 'full' if connected else '',
+                'usageInKb': {'total': value % 100000, 'sent': value % 60000, 'recv': value % 40000},
+                'clientCount': value % 4 if connected else 0,
+                'powerUsageInWh': round((value % 900) / 10, 1)
+            }
+            if port_id in neighbours:
+                status['cdp'] = {'deviceId': neighbours[port_id], 'portId': f"Port {port_id}"}
+                status['lldp'] = {'systemName': neighbours[port_id], 'portId': port_id}
+            ports.append(status)
+        return ports
+
+
+class MockDashboard:
+    """
+    Synthetic organizations plus the routing that turns a request into a response.
+
+    Kept separate from the HTTP server so it can be driven directly in tests.
+    """
+
+    def __init__(self, organizations=1, networks=10, devices=100, clients=1000, seed=0):
+        """
+        Initialize the dashboard.
+
+        Args:
+            organizations (int): Number of organizations
+            networks (int): Networks per organization
+            devices (int): Devices per organization
+            clients (int): Clients per organization
+            seed (int): Varies generated values between runs
+        """
+        self.organizations = [SyntheticOrganization(i, networks, devices, clients, seed)
+                              for i in range(max(1, organizations))]
+        self.routes = [
+            (r'/organizations', self.get_organizations),
+            (r'/organizations/(?P<org>[^/]+)', self.get_organization),
+            (r'/organizations/(?P<org>[^/]+)/networks', self.get_organization_networks),
+            (r'/organizations/(?P<org>[^/]+)/devices', self.get_organization_devices),
+            (r'/organizations/(?P<org>[^/]+)/devices/statuses', self.get_organization_devices_statuses),
+            (r'/organizations/(?P<org>[^/]+)/inventory/devices', self.get_organization_inventory_devices),
+            (r'/organizations/(?P<org>[^/]+)/licenses', self.get_organization_licenses),
+            (r'/organizations/(?P<org>[^/]+)/admins', self.get_organization_admins),
+            (r'/organizations/(?P<org>[^/]+)/summary', self.get_organization_summary),
+            (r'/organizations/(?P<org>[^/]+)/apiRequests', self.get_organization_api_requests),
+            (r'/organizations/(?P<org>[^/]+)/policyObjects', self.get_policy_objects),
+            (r'/organizations/(?P<org>[^/]+)/policyObjects/groups', self.get_policy_object_groups),
+            (r'/organizations/(?P<org>[^/]+)/appliance/vpn/statuses', self.get_organization_vpn_statuses),
+            (r'/networks/(?P<network>[^/]+)', self.get_network),
+            (r'/networks/(?P<network>[^/]+)/devices', self.get_network_devices),
+            (r'/networks/(?P<network>[^/]+)/clients', self.get_network_clients),
+            (r'/networks/(?P<network>[^/]+)/topology/linkLayer', self.get_network_link_layer),
+            (r'/networks/(?P<network>[^/]+)/appliance/firewall/l3FirewallRules', self.get_l3_firewall_rules),
+            (r'/networks/(?P<network>[^/]+)/appliance/vlans', self.get_vlans),
+            (r'/networks/(?P<network>[^/]+)/appliance/staticRoutes', self.get_static_routes),
+            (r'/networks/(?P<network>[^/]+)/sensor/alerts/current/overview/byMetric', self.get_sensor_alerts),
+            (r'/networks/(?P<network>[^/]+)/health/alerts', self.get_health_alerts),
+            (r'/networks/(?P<network>[^/]+)/traffic', self.get_traffic),
+            (r'/devices/(?P<serial>[^/]+)', self.get_device),
+            (r'/devices/(?P<serial>[^/]+)/clients', self.get_device_clients),
+            (r'/devices/(?P<serial>[^/]+)/uplink', self.get_device_uplink),
+            (r'/devices/(?P<serial>[^/]+)/switch/ports', self.get_switch_ports),
+            (r'/devices/(?P<serial>[^/]+)/switch/ports/statuses', self.get_switch_ports_statuses),
+            (r'/devices/(?P<serial>[^/]+)/sensor/readings/latest', self.get_sensor_readings),
+            (r'/devices/(?P<serial>[^/]+)/sensor/relationships', self.get_sensor_relationships),
+        ]
+        self.routes = [(re.compile(f"^{pattern}$"), handler) for pattern, handler in self.routes]
+
+    # Lookup helpers
+    def organization(self, org_id):
+        for org in self.organizations:
+            if org.id == org_id:
+                return org
+        raise LookupError(f"Organization {org_id} not found")
+
+    def find_network(self, network_id):
+        for org in self.organizations:
+            n = org.network_index(network_id)
+            if n is not None:
+                return org, n
+        raise LookupError(f"Network {network_id} not found")
+
+    def find_device(self, serial):
+        for org in self.organizations:
+            d = org.device_index(serial)
+            if d is not None:
+                return org, d
+        raise LookupError(f"Device {serial} not found")
+
+    def organization_of(self, path):
+        """Organization ID a request path is charged to, for rate limiting"""
+        try:
+            match = re.match(r'^/organizations/([^/]+)', path)
+            if match:
+                return match.group(1)
+            match = re.match(r'^/networks/([^/]+)', path)
+            if match:
+                return self.find_network(match.group(1))[0].id
+            match = re.match(r'^/devices/([^/]+)', path)
+            if match:
+                return self.find_device(match.group(1))[0].id
+        except LookupError:
+            pass
+        return None
+
+    def handle(self, path, query):
+        """
+        Resolve a request.
+
+        Args:
+            path (str): Path below /api/v1
+            query (dict): Query parameters, one value each
+
+        Returns:
+            tuple: (status, body) where body is a JSON-serializable value, or a
+            Page for paginated listings
+        """
+        for pattern, handler in self.routes:
+            match = pattern.match(path)
+            if match:
+                try:
+                    return handler(query, **match.groupdict())
+                except LookupError as e:
+                    return 404, {'errors': [str(e)]}
+        return 404, {'errors': [f"No route for {path}"]}
+
+    # Organization endpoints
+    def get_organizations(self, query):
+        return 200, [{'id': org.id, 'name': org.name,
+                      'url': f"https://n1.meraki.com/o/{org.id}/manage/organization/overview",
+                      'api': {'enabled': True}, 'licensing': {'model': 'co-term'},
+                      'cloud': {'region': {'name': 'North America'}}} for org in self.organizations]
+
+    def get_organization(self, query, org):
+        return 200, self.get_organizations(query)[1][self.organizations.index(self.organization(org))]
+
+    def get_organization_networks(self, query, org):
+        org = self.organization(org)
+        return 200, Page(org.network_count, org.network, org.network_id, org.network_index, 1000, 100000)
+
+    def get_organization_devices(self, query, org):
+        org = self.organization(org)
+        return 200, Page(org.device_count, org.device, org.serial, org.device_index, 1000, 1000)
+
+    def get_organization_devices_statuses(self, query, org):
+        org = self.organization(org)
+        return 200, Page(org.device_count, org.device_status, org.serial, org.device_index, 1000, 1000)
+
+    def get_organization_vpn_statuses(self, query, org):
+        org = self.organization(org)
+        return 200, Page(org.network_count, org.vpn_status, org.network_id, org.network_index, 300, 300)
+
+    def get_organization_inventory_devices(self, query, org):
+        org = self.organization(org)
+
+        def inventory(d):
+            device = org.device(d)
+            return {'mac': device['mac'], 'serial': device['serial'], 'name': device['name'],
+                    'model': device['model'], 'networkId': device['networkId'], 'orderNumber': f"4C{d:07d}",
+                    'claimedAt': _timestamp(86400 * 365), 'licenseExpirationDate': None, 'tags': [],
+                    'productType': device['productType'], 'countryCode': 'US'}
+        return 200, Page(org.device_count, inventory, org.serial, org.device_index, 1000, 1000)
+
+    def get_organization_licenses(self, query, org):
+        org = self.organization(org)
+        return 200, [{'id': f"{org.id}{i:04d}", 'licenseType': 'ENT', 'state': 'active',
+                      'seatCount': None, 'expirationDate': '2030-01-01T00:00:00Z'} for i in range(3)]
+
+    def get_organization_admins(self, query, org):
+        org = self.organization(org)
+        return 200, [{'id': f"{org.id}-admin-{i}", 'name': f"Admin {i + 1}", 'email': f"admin{i + 1}@example.com",
+                      'orgAccess': 'full', 'accountStatus': 'ok', 'twoFactorAuthEnabled': True,
+                      'hasApiKey': i == 0, 'lastActive': _timestamp(3600 * i), 'tags': [], 'networks': []}
+                     for i in range(3)]
+
+    def get_organization_summary(self, query, org):
+        org = self.organization(org)
+        return 200, {'networks': org.network_count, 'devices': org.device_count, 'clients': org.client_count}
+
+    def get_organization_api_requests(self, query, org):
+        self.organization(org)
+        return 200, []
+
+    def get_policy_objects(self, query, org):
+        org = self.organization(org)
+        return 200, [{'id': f"{org.id}{i:05d}", 'name': f"Object {i}", 'category': 'network', 'type': 'cidr',
+                      'cidr': f"10.{i // 250}.{i % 250}.0/24", 'groupIds': [f"{org.id}-g{i % 10}"],
+                      'networkIds': []} for i in range(100)]
+
+    def get_policy_object_groups(self, query, org):
+        org = self.organization(org)
+        return 200, [{'id': f"{org.id}-g{i}", 'name': f"Group {i}", 'category': 'NetworkObjectGroup',
+                      'objectIds': [f"{org.id}{j:05d}" for j in range(i, 100, 10)]} for i in range(10)]
+
+    # Network endpoints
+    def get_network(self, query, network):
+        org, n = self.find_network(network)
+        return 200, org.network(n)
+
+    def get_network_devices(self, query, network):
+        org, n = self.find_network(network)
+        return 200, [org.device(d) for d in org.devices_in_network(n)]
+
+    def get_network_clients(self, query, network):
+        org, n = self.find_network(network)
+        members = org.clients_in_network(n)
+
+        def index_of(cursor):
+            c = org.client_index(cursor)
+            return c - members.start if c in members else None
+        return 200, Page(len(members), lambda i: org.client(members.start + i),
+                         lambda i: org.client_id(members.start + i), index_of, 10, 5000)
+
+    def get_network_link_layer(self, query, network):
+        org, n = self.find_network(network)
+        if not org.has_link_layer(n):
+            return 404, {'errors': ['Topology is not available for this network']}
+        return 200, org.link_layer(n)
+
+    def get_l3_firewall_rules(self, query, network):
+        self.find_network(network)
+        rules = [{'comment': f"Rule {i}", 'policy': 'deny' if i % 4 == 0 else 'allow', 'protocol': 'tcp',
+                  'srcPort': 'Any', 'srcCidr': f"10.{i}.0.0/16", 'destPort': str(443 + i),
+                  'destCidr': 'Any', 'syslogEnabled': False} for i in range(20)]
+        rules.append({'comment': 'Default rule', 'policy': 'allow', 'protocol': 'Any', 'srcPort': 'Any',
+                      'srcCidr': 'Any', 'destPort': 'Any', 'destCidr': 'Any', 'syslogEnabled': False})
+        return 200, {'rules': rules}
+
+    def get_vlans(self, query, network):
+        org, n = self.find_network(network)
+        return 200, [{'id': str(vlan), 'networkId': network, 'name': f"VLAN {vlan}",
+                      'applianceIp': f"10.{vlan}.{n % 250}.1", 'subnet': f"10.{vlan}.{n % 250}.0/24"}
+                     for vlan in VLANS]
+
+    def get_static_routes(self, query, network):
+        self.find_network(network)
+        return 200, [{'id': f"{network}-r{i}", 'name': f"Route {i}", 'subnet': f"172.16.{i}.0/24",
+                      'gatewayIp': '10.0.0.254', 'enabled': True} for i in range(3)]
+
+    def get_sensor_alerts(self, query, network):
+        self.find_network(network)
+        return 200, {'counts': {'temperature': 0, 'humidity': 0, 'door': 0, 'water': 0, 'noise': {'ambient': 0}}}
+
+    def get_health_alerts(self, query, network):
+        self.find_network(network)
+        return 200, []
+
+    def get_traffic(self, query, network):
+        org, n = self.find_network(network)
+        return 200, [{'application': app, 'destination': None, 'protocol': 'TCP', 'port': 443,
+                      'sent': _hash(network, app) % 100000, 'recv': _hash(app, network) % 500000,
+                      'numClients': _hash(app) % 50, 'activeTime': 3600, 'flows': 100}
+                     for app in ('Webex', 'Office 365', 'YouTube', 'Salesforce')]
+
+    # Device endpoints
+    def get_device(self, query, serial):
+        org, d = self.find_device(serial)
+        return 200, org.device(d)
+
+    def get_device_clients(self, query, serial):
+        org, d = self.find_device(serial)
+        return 200, [org.client(c) for c in org.clients_of_device(d)]
+
+    def get_device_uplink(self, query, serial):
+        org, d = self.find_device(serial)
+        if org.device_role(d) != 'appliance':
+            return 404, {'errors': ['Uplink information is not available for this device']}
+        n = org.device_network(d)
+        return 200, [{'interface': 'wan1', 'status': 'active', 'ip': f"203.0.{n % 250}.{d % 250}",
+                      'gateway': f"203.0.{n % 250}.1", 'publicIp': f"203.0.{n % 250}.{d % 250}",
+                      'dns': '8.8.8.8', 'usingStaticIp': False},
+                     {'interface': 'wan2', 'status': 'not connected'}]
+
+    def get_switch_ports(self, query, serial):
+        org, d = self.find_device(serial)
+        if org.device_role(d) != 'switch':
+            return 400, {'errors': ['This device is not a switch']}
+        return 200, org.switch_ports(d)
+
+    def get_switch_ports_statuses(self, query, serial):
+        org, d = self.find_device(serial)
+        if org.device_role(d) != 'switch':
+            return 400, {'errors': ['This device is not a switch']}
+        return 200, org.switch_ports(d, statuses=True)
+
+    def get_sensor_readings(self, query, serial):
+        org, d = self.find_device(serial)
+        if org.device_role(d) != 'sensor':
+            return 400, {'errors': ['This device is not a sensor']}
+        value = _hash('reading', serial)
+        return 200, [{'metric': 'temperature', 'ts': _timestamp(60),
+                      'temperature': {'celsius': 18 + value % 80 / 10}},
+                     {'metric': 'humidity', 'ts': _timestamp(60), 'humidity': {'relativePercentage': 30 + value % 40}}]
+
+    def get_sensor_relationships(self, query, serial):
+        org, d = self.find_device(serial)
+        return 200, {'livestream': {'relatedDevices': []}}
+
+
+class Page:
+    """A paginated listing whose items are produced on demand"""
+
+    def __init__(self, count, item, item_id, index_of, default_per_page, max_per_page):
+        """
+        Initialize the listing.
+
+        Args:
+            count (int): Total number of items
+            item (callable): Builds item i
+            item_id (callable): Cursor value of item i
+            index_of (callable): Maps a cursor value back to its index, or None
+            default_per_page (int): Page size when perPage isn't given
+            max_per_page (int): Largest allowed perPage
+        """
+        self.count = count
+        self.item = item
+        self.item_id = item_id
+        self.index_of = index_of
+        self.default_per_page = default_per_page
+        self.max_per_page = max_per_page
+
+    def window(self, query):
+        """
+        Select the page a query asks for.
+
+        Returns:
+            tuple: (start, end, per_page)
+        """
+        try:
+            per_page = int(query.get('perPage', self.default_per_page))
+        except ValueError:
+            per_page = self.default_per_page
+        per_page = max(3, min(per_page, self.max_per_page))
+        start = 0
+        end = None
+        if query.get('startingAfter'):
+            index = self.index_of(query['startingAfter'])
+            start = index + 1 if index is not None else 0
+        if query.get('endingBefore'):
+            index = self.index_of(query['endingBefore'])
+            end = index if index is not None else self.count
+            if not query.get('startingAfter'):
+                start = max(0, end - per_page)
+        end = min(self.count, start + per_page, end if end is not None else self.count)
+        return start, end, per_page
+
+
+class MockRequestHandler(BaseHTTPRequestHandler):
+    """Serves MockDashboard responses over HTTP/1.1 keep-alive"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        # Headers and body are written separately; don't let Nagle delay the body
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, format, *args):
+        pass  # Keep benchmark output clean
+
+    def do_GET(self):
+        server = self.server
+        parsed = urlparse(self.path)
+        if parsed.path == STATS_PATH:
+            with server._lock:
+                stats = dict(server.stats)
+            self.send_json(200, stats)
+            return
+        server.count('requests')
+        query = {key: values[-1] for key, values in parse_qs(parsed.query).items()}
+        path = parsed.path[len(API_PREFIX):] if parsed.path.startswith(API_PREFIX) else parsed.path
+        path = path.rstrip('/') or '/'
+
+        if server.latency:
+            jitter = (_hash(server.counter('requests')) % 1000) / 1000 * server.jitter
+            time.sleep(server.latency + jitter)
+
+        if not self.headers.get('X-Cisco-Meraki-API-Key') and not self.headers.get('Authorization'):
+            self.send_json(401, {'errors': ['Invalid API key']})
+            return
+
+        retry_after = server.throttle(server.dashboard.organization_of(path))
+        if retry_after is not None:
+            server.count('throttled')
+            self.send_json(429, {'errors': ['API rate limit exceeded for organization']},
+                           {'Retry-After': str(retry_after)})
+            return
+
+        if server.inject('not_found_rate', path):
+            server.count('not_found')
+            self.send_json(404, {'errors': ['Not found (injected)']})
+            return
+
+        status, body = server.dashboard.handle(path, query)
+        if status == 404:
+            server.count('not_found')
+        if isinstance(body, Page):
+            self.send_page(parsed.path, query, body)
+        else:
+            self.send_json(status, body)
+
+    def send_page(self, path, query, page):
+        start, end, per_page = page.window(query)
+        items = [page.item(i) for i in range(start, end)]
+        base = f"http://{self.headers.get('Host', '%s:%s' % self.server.server_address[:2])}{path}"
+        carried = {k: v for k, v in query.items() if k not in ('startingAfter', 'endingBefore', 'perPage')}
+
+        def link(rel, **cursor):
+            return f"<{base}?{urlencode({**carried, 'perPage': per_page, **cursor})}>; rel={rel}"
+
+        links = [link('first', startingAfter='0' * 10)] if page.count else []
+        if start > 0:
+            links.append(link('prev', endingBefore=page.item_id(start)))
+        if end < page.count:
+            links.append(link('next', startingAfter=page.item_id(end - 1)))
+        if page.count:
+            links.append(link('last', endingBefore=page.item_id(page.count - 1) + '~'))
+        self.send_json(200, items, {'Link': ', '.join(links)} if links else None)
+
+    def send_json(self, status, body, headers=None):
+        payload = json.dumps(body, separators=(',', ':')).encode()
+        etag = '"' + hashlib.md5(payload).hexdigest() + '"'
+        if status == 200 and self.headers.get('If-None-Match') == etag:
+            self.server.count('not_modified')
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        encoding = None
+        if self.server.gzip and len(payload) > 1024 and 'gzip' in (self.headers.get('Accept-Encoding') or ''):
+            payload = gzip.compress(payload, compresslevel=1)
+            encoding = 'gzip'
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)))
+        if status == 200:
+            self.send_header('ETag', etag)
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+        self.server.count('bytes_sent', len(payload))
+
+
+class MockDashboardServer(ThreadingHTTPServer):
+    """
+    Threaded HTTP server for the mock Dashboard API.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, host='127.0.0.1', port=0, organizations=1, networks=10, devices=100, clients=1000,
+                 seed=0, latency=0.0, jitter=0.0, rate_limit=None, throttle_rate=0.0, retry_after=1,
+                 not_found_rate=0.0, gzip=True):
+        """
+        Initialize the server.
+
+        Args:
+            host (str): Address to bind
+            port (int): Port to bind (0 picks a free port)
+            organizations (int): Number of organizations
+            networks (int): Networks per organization
+            devices (int): Devices per organization
+            clients (int): Clients per organization
+            seed (int): Varies generated values between runs
+            latency (float): Seconds added to every response, simulating round-trip time
+            jitter (float): Extra random latency of up to this many seconds
+            rate_limit (float, optional): Requests per second allowed per organization
+                before answering 429, like the real API's 10 rps budget
+            throttle_rate (float): Fraction of requests answered 429 regardless of budget
+            retry_after (int): Retry-After seconds sent with injected 429s
+            not_found_rate (float): Fraction of per-device and per-network requests answered 404
+            gzip (bool): Compress responses for clients that accept gzip
+        """
+        super().__init__((host, port), MockRequestHandler)
+        self.dashboard = MockDashboard(organizations, networks, devices, clients, seed)
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit = rate_limit
+        self.throttle_rate = throttle_rate
+        self.not_found_rate = not_found_rate
+        self.retry_after = retry_after
+        self.gzip = gzip
+        self.stats = {'requests': 0, 'throttled': 0, 'not_found': 0, 'not_modified': 0, 'bytes_sent': 0}
+        self._budgets = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def base_url(self):
+        """Base URL to use in place of https://api.meraki.com/api/v1"""
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}{API_PREFIX}"
+
+    def count(self, key, amount=1):
+        with self._lock:
+            self.stats[key] += amount
+
+    def counter(self, key):
+        with self._lock:
+            return self.stats[key]
+
+    def inject(self, option, path):
+        """Decide deterministically whether to inject a fault for this request"""
+        rate = getattr(self, option)
+        if not rate or not re.match(r'^/(devices|networks)/[^/]+/', path):
+            return False
+        return _hash(option, self.counter('requests')) % 10000 < rate * 10000
+
+    def throttle(self, org_id):
+        """
+        Charge a request to its organization's budget.
+
+        Returns:
+            int: Retry-After seconds if the request should be answered 429, else None
+        """
+        if self.throttle_rate and _hash('throttle', self.counter('requests')) % 10000 < self.throttle_rate * 10000:
+            return self.retry_after
+        if not self.rate_limit:
+            return None
+        with self._lock:
+            now = time.monotonic()
+            tokens, updated = self._budgets.get(org_id, (self.rate_limit, now))
+            tokens = min(self.rate_limit, tokens + (now - updated) * self.rate_limit)
+            if tokens < 1:
+                self._budgets[org_id] = (tokens, now)
+                return max(1, int((1 - tokens) / self.rate_limit + 0.999))
+            self._budgets[org_id] = (tokens - 1, now)
+        return None
+
+    def start(self):
+        """Serve on a background thread and return the server"""
+        self._thread = threading.Thread(target=self.serve_forever, name='meraki-mock-server', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving and release the socket"""
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+
+def _serve(options, ready):
+    server = MockDashboardServer(**options)
+    ready.put(server.base_url)
+    server.serve_forever()
+
+
+class MockServerProcess:
+    """
+    Mock server running in a child process.
+
+    Benchmarks use this so the server doesn't compete with the client for the
+    GIL. The synthetic data is deterministic, so ``dashboard`` is a local copy
+    of what the child serves and can be used to pick request targets.
+    """
+
+    def __init__(self, **options):
+        """
+        Initialize the process.
+
+        Args:
+            **options: MockDashboardServer arguments
+        """
+        self.options = options
+        self.dashboard = MockDashboard(options.get('organizations', 1), options.get('networks', 10),
+                                       options.get('devices', 100), options.get('clients', 1000),
+                                       options.get('seed', 0))
+        self.base_url = None
+        self._process = None
+
+    def start(self):
+        """Start the child process and wait until it accepts connections"""
+        context = multiprocessing.get_context('spawn')
+        ready = context.Queue()
+        self._process = context.Process(target=_serve, args=(self.options, ready), daemon=True)
+        self._process.start()
+        self.base_url = ready.get(timeout=60)
+        return self
+
+    @property
+    def stats(self):
+        """The child's request, 429, 404 and byte counters"""
+        root = self.base_url[:-len(API_PREFIX)]
+        with urlopen(root + STATS_PATH, timeout=10) as response:
+            return json.loads(response.read())
+
+    def stop(self):
+        """Stop the child process"""
+        if self._process is not None:
+            self._process.terminate()
+            self._process.join()
+            self._process = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+
+def main():
+    """Run the mock server from the command line"""
+    parser = argparse.ArgumentParser(description='Mock Meraki Dashboard API server with synthetic organizations')
+    parser.add_argument('--host', default='127.0.0.1', help='Address to bind')
+    parser.add_argument('--port', type=int, default=8089, help='Port to bind')
+    parser.add_argument('--organizations', type=int, default=1, help='Number of organizations')
+    parser.add_argument('--networks', type=int, default=100, help='Networks per organization')
+    parser.add_argument('--devices', type=int, default=1000, help='Devices per organization')
+    parser.add_argument('--clients', type=int, default=10000, help='Clients per organization')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for generated values')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds of latency added to every response')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Extra random latency in seconds')
+    parser.add_argument('--rate-limit', type=float, default=None, help='Requests per second per organization')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='Fraction of requests answered 429')
+    parser.add_argument('--retry-after', type=int, default=1, help='Retry-After seconds for injected 429s')
+    parser.add_argument('--not-found-rate', type=float, default=0.0,
+                        help='Fraction of per-device/per-network requests answered 404')
+    parser.add_argument('--no-gzip', action='store_true', help='Never compress responses')
+    args = parser.parse_args()
+
+    server = MockDashboardServer(args.host, args.port, args.organizations, args.networks, args.devices,
+                                 args.clients, args.seed, args.latency, args.jitter, args.rate_limit,
+                                 args.throttle_rate, args.retry_after, args.not_found_rate, not args.no_gzip)
+    print(f"Mock Meraki Dashboard API listening on {server.base_url}")
+    print(f"Use it with: MERAKI_BASE_URL={server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,298 @@
+"""
+Organization Topology Module
+
+This module builds one topology for a whole organization. Each network's
+devices and linkLayer links (and optionally clients) are fetched on a thread
+pool through the shared client and rate limiter. The network's subgraph is then
+built and serialized in a process pool, so assembly doesn't compete with the
+fetch threads for the GIL.
+
+Subgraphs are streamed to a gzip-compressed JSON Lines file as they complete,
+one record per line:
+
+- ``organization``: header with the organization ID and network count
+- ``network``: one network's nodes and links, tagged with its security appliance
+- ``vpn``: links stitching the networks' appliances together over AutoVPN, plus
+  nodes for third-party VPN peers
+- ``summary``: counts and the networks that failed
+
+At most ``in_flight`` networks are held in memory at a time, between their first
+request and the moment their record is written, so memory stays flat no matter
+how many sites the organization has. Read the file back with
+load_organization_topology(), or from the command line:
+
+    python -m modules.meraki.org_topology 123456 --in-flight 32 --output org.jsonl.gz
+"""
+
+import argparse
+import gzip
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from datetime import datetime
+from pathlib import Path
+
+from modules.meraki.meraki_api import (
+    get_network_clients, get_network_devices, get_network_topology_links, get_organization_networks,
+    get_organization_vpn_statuses
+)
+from modules.meraki.meraki_client import get_client
+from modules.meraki.topology_builder import LinkSet, encode_network_subgraph
+from modules.meraki.topology_graph import TopologyGraph
+
+# Networks held in memory at once while building an organization topology
+ORG_TOPOLOGY_IN_FLIGHT = int(os.getenv('MERAKI_ORG_TOPOLOGY_IN_FLIGHT', '32'))
+
+# Default location of organization topology files
+ORG_TOPOLOGY_DIR = Path(os.path.expanduser("~")) / ".meraki_clu" / "org_topologies"
+
+
+def _fetch_network(api_key, network, include_clients):
+    """Fetch the sources of one network's topology, recording the ones that failed"""
+    network_id = network['id']
+    calls = [('devices', lambda: get_network_devices(api_key, network_id)),
+             # None without linkLayer support, which the builder handles and isn't a failure
+             ('links', lambda: get_network_topology_links(api_key, network_id))]
+    if include_clients:
+        calls.append(('clients', lambda: get_network_clients(api_key, network_id, timespan=10800)))
+    data = {}
+    partial = []
+    for name, call in calls:
+        try:
+            data[name] = call()
+        except Exception as e:
+            logging.debug(f"Could not get {name} for network {network_id}: {str(e)}")
+            data[name] = None
+            partial.append(name)
+    return data, partial
+
+
+def vpn_links(vpn_statuses, appliances):
+    """
+    Stitch network subgraphs together over site-to-site VPN.
+
+    Args:
+        vpn_statuses (list): Organization VPN statuses, one per appliance network
+        appliances (dict): Network ID to the node ID of its security appliance
+
+    Returns:
+        tuple: (links between appliances and to third-party peers, nodes for the
+        third-party peers)
+    """
+    link_set = LinkSet()
+    peer_nodes = {}
+    for status in vpn_statuses or []:
+        source = appliances.get(status.get('networkId')) or status.get('deviceSerial')
+        if source is None:
+            continue
+        for peer in status.get('merakiVpnPeers') or []:
+            target = appliances.get(peer.get('networkId'))
+            if target is not None and target != source:
+                link_set.add(source, target, 'vpn', status=peer.get('reachability', 'unknown'),
+                             interface='AutoVPN')
+        for peer in status.get('thirdPartyVpnPeers') or []:
+            peer_id = f"vpn-peer:{peer.get('publicIp') or peer.get('name')}"
+            peer_nodes.setdefault(peer_id, {'id': peer_id, 'label': peer.get('name') or peer.get('publicIp'),
+                                            'type': 'vpn_peer', 'ip': peer.get('publicIp', 'Unknown')})
+            link_set.add(source, peer_id, 'vpn', status=peer.get('reachability', 'unknown'),
+                         interface='Third-party VPN')
+    return link_set.links, list(peer_nodes.values())
+
+
+def build_organization_topology(api_key, org_id, output_path=None, in_flight=None, processes=None,
+                                include_clients=False, network_ids=None, progress=None):
+    """
+    Build the stitched topology of every network in an organization, streamed to disk.
+
+    Args:
+        api_key (str): Meraki API key
+        org_id (str): Organization ID
+        output_path (str, optional): JSON Lines file to write (gzip-compressed
+            when it ends in .gz). Defaults to ORG_TOPOLOGY_DIR/<org_id>.jsonl.gz
+        in_flight (int, optional): Networks held in memory at once
+            (default: ORG_TOPOLOGY_IN_FLIGHT)
+        processes (int, optional): Worker processes building subgraphs
+            (default: one per CPU)
+        include_clients (bool): Also fetch and attach each network's clients
+        network_ids (list, optional): Only build these networks
+        progress (callable, optional): Called as ``progress(done, total)`` as
+            each network is written
+
+    Returns:
+        dict: Summary with the output path, network, node and link counts, the
+        number of VPN links, and the networks that failed or are partial
+    """
+    started = time.perf_counter()
+    output_path = Path(output_path) if output_path else ORG_TOPOLOGY_DIR / f"{org_id}.jsonl.gz"
+    networks = get_organization_networks(api_key, org_id) or []
+    if network_ids is not None:
+        wanted = set(network_ids)
+        networks = [network for network in networks if network['id'] in wanted]
+    in_flight = max(1, in_flight or ORG_TOPOLOGY_IN_FLIGHT)
+    fetchers = max(1, min(in_flight, get_client(api_key).pool_size))
+    summary = {'organization_id': org_id, 'path': str(output_path), 'networks': len(networks), 'nodes': 0,
+               'links': 0, 'vpn_links': 0, 'failed': [], 'partial': []}
+    appliances = {}
+
+    os.makedirs(output_path.parent, exist_ok=True)
+    temporary = output_path.with_name(f"{output_path.name}.{os.getpid()}.tmp")
+    opener = gzip.open if output_path.suffix == '.gz' else open
+
+    def write(out, record):
+        out.write(json.dumps(record, separators=(',', ':'), default=str))
+        out.write('\n')
+
+    # Spawned workers only import the topology builder, not the API layer and its threads
+    context = multiprocessing.get_context('spawn')
+    with opener(temporary, 'wt', encoding='utf-8') as out, \
+            ThreadPoolExecutor(max_workers=fetchers, thread_name_prefix='meraki-org-topology') as fetch_pool, \
+            ProcessPoolExecutor(max_workers=processes, mp_context=context) as build_pool:
+        write(out, {'kind': 'organization', 'organization_id': org_id, 'networks': len(networks),
+                    'created': datetime.now().isoformat(timespec='seconds')})
+        pending = iter(networks)
+        fetching = {}
+        building = {}
+        done = 0
+        while True:
+            # A network holds its slot from its first request until its record is written
+            while len(fetching) + len(building) < in_flight:
+                network = next(pending, None)
+                if network is None:
+                    break
+                fetching[fetch_pool.submit(_fetch_network, api_key, network, include_clients)] = network
+            if not fetching and not building:
+                break
+            finished, _ = wait(list(fetching) + list(building), return_when=FIRST_COMPLETED)
+            for future in finished:
+                if future in fetching:
+                    network = fetching.pop(future)
+                    data, partial = future.result()
+                    if data['devices'] is None:
+                        summary['failed'].append(network['id'])
+                        done += 1
+                        continue
+                    building[build_pool.submit(encode_network_subgraph, network, data['devices'],
+                                               data.get('clients'), data['links'], partial)] = (network, partial)
+                    continue
+                network, partial = building.pop(future)
+                done += 1
+                try:
+                    line, appliance, nodes, links = future.result()
+                except Exception as e:
+                    logging.warning(f"Could not build the topology of network {network['id']}: {str(e)}")
+                    summary['failed'].append(network['id'])
+                    continue
+                out.write(line)
+                out.write('\n')
+                if appliance is not None:
+                    appliances[network['id']] = appliance
+                summary['nodes'] += nodes
+                summary['links'] += links
+                if partial:
+                    summary['partial'].append(network['id'])
+                if progress:
+                    progress(done, len(networks))
+
+        try:
+            vpn_statuses = get_organization_vpn_statuses(api_key, org_id)
+        except Exception as e:
+            logging.warning(f"Could not get VPN statuses for organization {org_id}: {str(e)}")
+            vpn_statuses = []
+        links, peer_nodes = vpn_links(vpn_statuses, appliances)
+        write(out, {'kind': 'vpn', 'nodes': peer_nodes, 'links': links})
+        summary['vpn_links'] = len(links)
+        summary['nodes'] += len(peer_nodes)
+        summary['duration'] = round(time.perf_counter() - started, 3)
+        write(out, dict(summary, kind='summary'))
+    os.replace(temporary, output_path)
+
+    logging.info(f"Organization {org_id} topology: {summary['networks']} networks, {summary['nodes']} nodes, "
+                 f"{summary['links'] + summary['vpn_links']} links in {summary['duration']}s -> {output_path}")
+    return summary
+
+
+def iter_organization_topology(path):
+    """
+    Read an organization topology file one record at a time.
+
+    Args:
+        path (str): File written by build_organization_topology()
+
+    Yields:
+        dict: Records in file order
+    """
+    opener = gzip.open if str(path).endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def load_organization_topology(path, network_ids=None, as_graph=False):
+    """
+    Load a stitched organization topology.
+
+    Args:
+        path (str): File written by build_organization_topology()
+        network_ids (list, optional): Only load these networks (VPN links to
+            other networks are dropped)
+        as_graph (bool): Return a TopologyGraph instead of the dict
+
+    Returns:
+        dict: ``{'network_name', 'nodes', 'links', 'organization_id', 'summary'}``,
+        or a TopologyGraph with the same fields as metadata
+    """
+    wanted = set(network_ids) if network_ids is not None else None
+    topology = {'network_name': None, 'nodes': [], 'links': [], 'organization_id': None, 'summary': None}
+    node_ids = set()
+    for record in iter_organization_topology(path):
+        kind = record.get('kind')
+        if kind == 'organization':
+            topology['organization_id'] = record['organization_id']
+            topology['network_name'] = f"Organization {record['organization_id']}"
+        elif kind == 'network':
+            if wanted is not None and record['network_id'] not in wanted:
+                continue
+            topology['nodes'].extend(record['nodes'])
+            topology['links'].extend(record['links'])
+            node_ids.update(node['id'] for node in record['nodes'])
+        elif kind == 'vpn':
+            topology['nodes'].extend(record['nodes'])
+            node_ids.update(node['id'] for node in record['nodes'])
+            topology['links'].extend(link for link in record['links']
+                                     if link['source'] in node_ids and link['target'] in node_ids)
+        elif kind == 'summary':
+            topology['summary'] = {key: value for key, value in record.items() if key != 'kind'}
+    return TopologyGraph.from_topology(topology) if as_graph else topology
+
+
+def main():
+    """Build an organization topology from the command line"""
+    parser = argparse.ArgumentParser(description='Build the stitched topology of a Meraki organization')
+    parser.add_argument('org_id', help='Organization ID')
+    parser.add_argument('--output', help='Output file (default: ~/.meraki_clu/org_topologies/<org_id>.jsonl.gz)')
+    parser.add_argument('--in-flight', type=int, default=ORG_TOPOLOGY_IN_FLIGHT,
+                        help='Networks held in memory at once')
+    parser.add_argument('--processes', type=int, default=None, help='Worker processes (default: one per CPU)')
+    parser.add_argument('--clients', action='store_true', help="Include each network's clients")
+    parser.add_argument('--api-key', default=os.getenv('MERAKI_DASHBOARD_API_KEY'),
+                        help='Meraki API key (default: MERAKI_DASHBOARD_API_KEY)')
+    args = parser.parse_args()
+    if not args.api_key:
+        parser.error('an API key is required (--api-key or MERAKI_DASHBOARD_API_KEY)')
+
+    logging.disable(logging.INFO)
+    summary = build_organization_topology(
+        args.api_key, args.org_id, args.output, args.in_flight, args.processes, args.clients,
+        progress=lambda done, total: print(f"\r{done}/{total} networks", end='', file=sys.stderr, flush=True))
+    print(file=sys.stderr)
+    print(json.dumps(summary, indent=2))
+    return 1 if summary['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
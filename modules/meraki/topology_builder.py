@@ -0,0 +1,378 @@
+"""
+Network Topology Builder Module
+
+This module assembles topology graphs from Meraki devices, clients and link
+data. Devices are indexed by serial, MAC, name and type up front, so each client
+and each link is resolved with dictionary lookups in a single pass:
+
+- clients attach to the device named by ``recentDeviceSerial`` (falling back to
+  ``recentDeviceMac`` and ``recentDeviceName``), over the reported switchport or
+  SSID
+- device links come from the linkLayer endpoint, from older source/destination
+  link lists, or from CDP/LLDP neighbours reported on switch ports
+
+Links reference nodes by their ``id``, which is what the vis.js and d3 views
+look nodes up by.
+"""
+
+import json
+import logging
+
+MOBILE_MANUFACTURERS = ('apple', 'samsung', 'lg', 'motorola', 'xiaomi')
+DESKTOP_MANUFACTURERS = ('dell', 'hp', 'lenovo', 'microsoft', 'asus')
+
+
+def device_type(model):
+    """
+    Classify a device by model for the topology views.
+
+    Args:
+        model (str): Device model, e.g. "MS225-48LP"
+
+    Returns:
+        str: security_appliance, switch, wireless, camera or unknown
+    """
+    model = (model or '').lower()
+    if 'mx' in model:
+        return 'security_appliance'
+    if 'ms' in model:
+        return 'switch'
+    if 'mr' in model:
+        return 'wireless'
+    if 'mv' in model:
+        return 'camera'
+    return 'unknown'
+
+
+def client_type(client):
+    """
+    Guess what kind of endpoint a client is.
+
+    Args:
+        client (dict): Client as returned by the clients endpoint
+
+    Returns:
+        str: The predicted device type, mobile, desktop or unknown
+    """
+    prediction = client.get('deviceTypePrediction')
+    if prediction:
+        return prediction.lower()
+    manufacturer = (client.get('manufacturer') or '').lower()
+    if manufacturer:
+        if any(name in manufacturer for name in MOBILE_MANUFACTURERS):
+            return 'mobile'
+        if any(name in manufacturer for name in DESKTOP_MANUFACTURERS):
+            return 'desktop'
+    return 'unknown'
+
+
+def _normalize_mac(mac):
+    return mac.lower().replace('-', ':') if isinstance(mac, str) else None
+
+
+class DeviceIndex:
+    """Lookup tables from serial, MAC, name and type to device node IDs"""
+
+    def __init__(self):
+        self.by_serial = {}
+        self.by_mac = {}
+        self.by_name = {}
+        self.by_type = {}
+
+    def add(self, node_id, device, node_type):
+        """
+        Index one device.
+
+        Args:
+            node_id (str): ID of the device's node
+            device (dict): Device as returned by the API
+            node_type (str): Topology type of the device
+        """
+        serial = device.get('serial')
+        if serial:
+            self.by_serial[serial] = node_id
+        mac = _normalize_mac(device.get('mac'))
+        if mac:
+            self.by_mac[mac] = node_id
+        name = device.get('name')
+        if name:
+            self.by_name.setdefault(name, node_id)
+        self.by_type.setdefault(node_type, []).append(node_id)
+
+    def find(self, serial=None, mac=None, name=None):
+        """
+        Resolve a device reference to a node ID.
+
+        Args:
+            serial (str, optional): Device serial
+            mac (str, optional): Device MAC address
+            name (str, optional): Device name, or a CDP/LLDP identifier that may
+                be any of the three
+
+        Returns:
+            str: Node ID, or None if no indexed device matches
+        """
+        if serial and serial in self.by_serial:
+            return self.by_serial[serial]
+        mac = _normalize_mac(mac)
+        if mac and mac in self.by_mac:
+            return self.by_mac[mac]
+        if name:
+            if name in self.by_name:
+                return self.by_name[name]
+            return self.by_serial.get(name) or self.by_mac.get(_normalize_mac(name))
+        return None
+
+    def only(self, node_type):
+        """The node ID of the only device of a type, or None if there are zero or several"""
+        nodes = self.by_type.get(node_type, ())
+        return nodes[0] if len(nodes) == 1 else None
+
+
+def attribute_client(client, index):
+    """
+    Find the device a client is connected to.
+
+    The device reported by the API wins. Without one, a client is only attached
+    when the network has a single device that could serve it.
+
+    Args:
+        client (dict): Client as returned by the clients endpoint
+        index (DeviceIndex): Indexed devices
+
+    Returns:
+        tuple: (node ID, connection type, interface label), or None when the
+        client can't be attributed
+    """
+    connection = (client.get('recentDeviceConnection') or '').lower()
+    wireless = connection == 'wireless' or (connection != 'wired' and bool(client.get('ssid')))
+    device_id = index.find(client.get('recentDeviceSerial'), client.get('recentDeviceMac'),
+                           client.get('recentDeviceName'))
+    if device_id is None:
+        device_id = index.only('wireless') if wireless else index.only('switch')
+        if device_id is None:
+            return None
+
+    if wireless:
+        interface = f"SSID {client['ssid']}" if client.get('ssid') else 'Wireless'
+    elif client.get('switchport'):
+        interface = f"Port {client['switchport']}"
+        if client.get('switchportDesc'):
+            interface += f" ({client['switchportDesc']})"
+    elif client.get('vlan'):
+        interface = f"VLAN {client['vlan']}"
+    else:
+        interface = 'Unknown'
+    return device_id, 'wireless' if wireless else 'wired', interface
+
+
+def _port_label(discovered):
+    for protocol in ('lldp', 'cdp'):
+        port = (discovered or {}).get(protocol) or {}
+        if port.get('portId'):
+            port_id = str(port['portId'])
+            return port_id if port_id.lower().startswith('port') else f"Port {port_id}"
+    return 'Unknown'
+
+
+def link_layer_edges(links, index):
+    """
+    Resolve device-to-device links to node IDs.
+
+    Accepts the linkLayer response (``{'nodes': [...], 'links': [{'ends': [...]}]}``)
+    as well as plain lists of links with ``source``/``destination`` objects or
+    ``source``/``target``, ``sourceSerial``/``targetSerial`` or ``sourceMac``/``targetMac``
+    fields.
+
+    Args:
+        links (dict or list): Link data from the API
+        index (DeviceIndex): Indexed devices
+
+    Yields:
+        tuple: (source ID, target ID, link type, interface label)
+    """
+    if isinstance(links, dict):
+        links = links.get('links') or []
+    for link in links or []:
+        if not isinstance(link, dict):
+            continue
+        if 'ends' in link:
+            ends = link['ends']
+            if len(ends) != 2:
+                continue
+            near, far = ends
+            source = index.find((near.get('device') or {}).get('serial'), None, (near.get('device') or {}).get('name'))
+            target = index.find((far.get('device') or {}).get('serial'), None, (far.get('device') or {}).get('name'))
+            link_type, interface = 'switch', _port_label(near.get('discovered'))
+        else:
+            source_ref, target_ref = link.get('source'), link.get('destination', link.get('target'))
+            if isinstance(source_ref, dict):
+                source = index.find(source_ref.get('serial'), source_ref.get('mac'), source_ref.get('name'))
+            else:
+                source = index.find(link.get('sourceSerial'), link.get('sourceMac'), source_ref)
+            if isinstance(target_ref, dict):
+                target = index.find(target_ref.get('serial'), target_ref.get('mac'), target_ref.get('name'))
+            else:
+                target = index.find(link.get('targetSerial') or link.get('destinationSerial'),
+                                    link.get('targetMac') or link.get('destinationMac'), target_ref)
+            link_type = (link.get('linkType') or 'switch').lower()
+            interface = f"Port {link['sourcePort']}" if 'sourcePort' in link else 'Unknown'
+        if source is not None and target is not None and source != target:
+            yield source, target, link_type, interface
+
+
+def neighbour_edges(devices, index):
+    """
+    Derive device links from CDP/LLDP neighbours reported on switch ports.
+
+    Args:
+        devices (list): Devices, where switches may carry a ``ports`` mapping of
+            port number to port data with ``cdp``/``lldp`` neighbour details
+        index (DeviceIndex): Indexed devices
+
+    Yields:
+        tuple: (source ID, target ID, link type, interface label)
+    """
+    for device in devices:
+        ports = device.get('ports')
+        if not ports or not isinstance(ports, dict):
+            continue
+        source = index.find(device.get('serial'), device.get('mac'), device.get('name'))
+        if source is None:
+            continue
+        for port_number, port_data in ports.items():
+            for protocol, field in (('cdp', 'deviceId'), ('lldp', 'systemName')):
+                neighbour = (port_data or {}).get(protocol) or {}
+                target = index.find(name=neighbour.get(field))
+                if target is not None and target != source:
+                    yield source, target, 'switch', f"Port {port_number}"
+                    break
+
+
+class LinkSet:
+    """Collects links, dropping duplicates in either direction"""
+
+    def __init__(self):
+        self.links = []
+        self._seen = set()
+
+    def add(self, source, target, link_type, **fields):
+        pair = (source, target) if str(source) <= str(target) else (target, source)
+        if pair in self._seen:
+            return False
+        self._seen.add(pair)
+        self.links.append({'source': source, 'target': target, 'type': link_type, **fields})
+        return True
+
+
+def build_network_topology(devices, clients, links=None, network_name=None):
+    """
+    Build the nodes and links of a network topology.
+
+    Args:
+        devices (list): Network devices
+        clients (list): Network clients
+        links (dict or list, optional): linkLayer response or link list. Without
+            usable links, switches hang off the first security appliance and are
+            chained together.
+        network_name (str, optional): Name stored in the result
+
+    Returns:
+        dict: ``{'network_name', 'nodes', 'links'}`` with links referencing node IDs
+    """
+    nodes = []
+    index = DeviceIndex()
+    for i, device in enumerate(devices or []):
+        node_type = device_type(device.get('model'))
+        node = {
+            'id': device.get('serial', f"device_{i}"),
+            'label': device.get('name', 'Unknown Device'),
+            'type': node_type,
+            'model': device.get('model', 'Unknown'),
+            'ip': device.get('lanIp', 'No IP'),
+            'mac': device.get('mac', 'No MAC'),
+            'serial': device.get('serial', 'No Serial'),
+            'firmware': device.get('firmware', 'Unknown'),
+            'status': device.get('status', 'unknown')
+        }
+        nodes.append(node)
+        index.add(node['id'], device, node_type)
+
+    link_set = LinkSet()
+    for source, target, link_type, interface in link_layer_edges(links, index):
+        link_set.add(source, target, link_type, status='active', interface=interface)
+    for source, target, link_type, interface in neighbour_edges(devices or [], index):
+        link_set.add(source, target, link_type, status='active', interface=interface)
+
+    if not link_set.links:
+        # Fallback: connect switches to the first security appliance and chain them
+        appliances = index.by_type.get('security_appliance', [])
+        switches = index.by_type.get('switch', [])
+        if appliances:
+            for switch in switches:
+                link_set.add(appliances[0], switch, 'wired', status='active')
+        for i in range(len(switches) - 1):
+            link_set.add(switches[i], switches[i + 1], 'wired', status='active')
+
+    unattributed = 0
+    for i, client in enumerate(clients or []):
+        node = {
+            'id': client.get('id', f"client_{i}"),
+            'label': client.get('description') or client.get('mac', 'Unknown Client'),
+            'type': 'client',
+            'client_type': client_type(client),
+            'ip': client.get('ip', 'No IP'),
+            'mac': client.get('mac', 'No MAC'),
+            'vlan': client.get('vlan', 'Unknown'),
+            'connection': {
+                'type': client.get('recentDeviceConnection', 'Unknown'),
+                'vlan': client.get('vlan', 'Unknown'),
+                'port': client.get('switchport', 'Unknown'),
+                'ssid': client.get('ssid'),
+                'last_seen': client.get('lastSeen', 'Unknown')
+            },
+            'usage': client.get('usage', {})
+        }
+        nodes.append(node)
+        attribution = attribute_client(client, index)
+        if attribution is None:
+            unattributed += 1
+            continue
+        device_id, connection, interface = attribution
+        link_set.links.append({'source': device_id, 'target': node['id'], 'type': connection,
+                               'status': 'active', 'interface': interface})
+
+    if unattributed:
+        logging.debug(f"{unattributed} clients could not be attributed to a device")
+    return {'network_name': network_name, 'nodes': nodes, 'links': link_set.links}
+
+
+def encode_network_subgraph(network, devices, clients=None, links=None, partial=None):
+    """
+    Build one network's topology and serialize it as an organization topology record.
+
+    Runs in worker processes when an organization topology is built, so the
+    parent only writes the encoded line. Every node is tagged with its network.
+
+    Args:
+        network (dict): Network as returned by the networks endpoint
+        devices (list): Network devices
+        clients (list, optional): Network clients
+        links (dict or list, optional): linkLayer response or link list
+        partial (list, optional): Sources that could not be fetched
+
+    Returns:
+        tuple: (JSON line without the newline, ID of the network's first security
+        appliance or None, number of nodes, number of links)
+    """
+    topology = build_network_topology(devices, clients or [], links, network.get('name'))
+    appliance = None
+    for node in topology['nodes']:
+        node['network_id'] = network['id']
+        if appliance is None and node['type'] == 'security_appliance':
+            appliance = node['id']
+    record = {'kind': 'network', 'network_id': network['id'], 'network_name': network.get('name'),
+              'appliance': appliance, 'partial': partial or [], 'nodes': topology['nodes'],
+              'links': topology['links']}
+    return (json.dumps(record, separators=(',', ':'), default=str), appliance, len(topology['nodes']),
+            len(topology['links']))
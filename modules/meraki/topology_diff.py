@@ -0,0 +1,234 @@
+"""
+Topology Snapshot and Diff Module
+
+This module records what a topology looked like and computes what changed
+between runs. A snapshot keeps a content hash per node and per link rather
+than the elements themselves, so it stays small enough to persist for every
+network. A diff against a new topology yields:
+
+- nodes and links that were added, with their data
+- nodes and links that changed, with their new data
+- IDs of removed nodes and keys of removed links
+
+Fields that change on every poll without changing the picture (usage
+counters, last-seen times) are left out of the hashes by default.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime
+
+# Fields ignored when hashing, at any nesting level
+VOLATILE_FIELDS = frozenset({'usage', 'last_seen', 'lastSeen'})
+
+
+def _canonical(value, ignore):
+    if isinstance(value, dict):
+        return {key: _canonical(item, ignore) for key, item in value.items() if key not in ignore}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(item, ignore) for item in value]
+    return value
+
+
+def content_hash(item, ignore=VOLATILE_FIELDS):
+    """
+    Hash a node or link independently of key order.
+
+    Args:
+        item (dict): Node or link
+        ignore (Iterable): Field names to leave out
+
+    Returns:
+        str: 16 hex digits
+    """
+    data = json.dumps(_canonical(item, frozenset(ignore)), sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.blake2b(data.encode('utf-8'), digest_size=8).hexdigest()
+
+
+def link_keys(links, source='source', target='target'):
+    """
+    Compute a stable key for each link.
+
+    Keys don't depend on the link's direction. A repeated pair gets a ``#n``
+    suffix so every link keeps its own key.
+
+    Args:
+        links (list): Links
+        source (str): Field holding a link's first end
+        target (str): Field holding a link's second end
+
+    Returns:
+        list: One key per link, e.g. "Q2AA-BBBB-CCCC|k74d3b9", in link order
+    """
+    keys = []
+    seen = {}
+    for link in links:
+        a, b = str(link.get(source)), str(link.get(target))
+        key = f"{a}|{b}" if a <= b else f"{b}|{a}"
+        count = seen.get(key, 0)
+        seen[key] = count + 1
+        keys.append(key if not count else f"{key}#{count}")
+    return keys
+
+
+class TopologySnapshot:
+    """Content hashes of a topology's nodes and links"""
+
+    def __init__(self, nodes=None, links=None, version=0, created=None):
+        """
+        Initialize the snapshot.
+
+        Args:
+            nodes (dict): Node ID to content hash
+            links (dict): Link key (see link_keys()) to content hash
+            version (int): Increases by one with every diff
+            created (str, optional): ISO timestamp, defaults to now
+        """
+        self.nodes = nodes or {}
+        self.links = links or {}
+        self.version = version
+        self.created = created or datetime.now().isoformat(timespec='seconds')
+
+    @classmethod
+    def from_topology(cls, topology_data, version=0, source='source', target='target', ignore=VOLATILE_FIELDS):
+        """
+        Snapshot a topology.
+
+        Args:
+            topology_data (dict): Topology with 'nodes' and 'links'
+            version (int): Version number of the snapshot
+            source (str): Field holding a link's first end
+            target (str): Field holding a link's second end
+            ignore (Iterable): Fields left out of the hashes
+
+        Returns:
+            TopologySnapshot: The snapshot
+        """
+        links = topology_data.get('links', [])
+        return cls({node['id']: content_hash(node, ignore) for node in topology_data.get('nodes', [])},
+                   dict(zip(link_keys(links, source, target), (content_hash(link, ignore) for link in links))),
+                   version)
+
+    def to_dict(self):
+        """Serialize; node IDs are kept as pairs so integer IDs survive JSON"""
+        return {'version': self.version, 'created': self.created, 'nodes': list(self.nodes.items()),
+                'links': self.links}
+
+    @classmethod
+    def from_dict(cls, data):
+        """Deserialize from to_dict() output"""
+        return cls({node_id: digest for node_id, digest in data.get('nodes', [])}, data.get('links', {}),
+                   data.get('version', 0), data.get('created'))
+
+    def save(self, path):
+        """Write the snapshot to a JSON file atomically"""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, 'w') as f:
+            json.dump(self.to_dict(), f, separators=(',', ':'))
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Read a snapshot written by save().
+
+        Returns:
+            TopologySnapshot: The snapshot, or None if the file is missing or unreadable
+        """
+        try:
+            with open(path) as f:
+                return cls.from_dict(json.load(f))
+        except (OSError, ValueError, TypeError) as e:
+            logging.debug(f"No usable topology snapshot at {path}: {str(e)}")
+            return None
+
+
+def diff_topology(snapshot, topology_data, source='source', target='target', ignore=VOLATILE_FIELDS):
+    """
+    Compare a topology with an earlier snapshot.
+
+    Args:
+        snapshot (TopologySnapshot): Earlier snapshot, or None to treat everything as added
+        topology_data (dict): Current topology with 'nodes' and 'links'
+        source (str): Field holding a link's first end
+        target (str): Field holding a link's second end
+        ignore (Iterable): Fields left out of the hashes
+
+    Returns:
+        tuple: (delta, snapshot of the current topology). The delta is
+        ``{'base': old version, 'version': new version,
+        'nodes': {'added': [...], 'changed': [...], 'removed': [IDs]},
+        'links': {'added': [...], 'changed': [...], 'removed': [keys]}}``
+        with added and changed links carrying their key under 'key'.
+    """
+    snapshot = snapshot or TopologySnapshot(version=-1)
+    current = TopologySnapshot(version=snapshot.version + 1)
+    delta = {'base': snapshot.version, 'version': current.version,
+             'nodes': {'added': [], 'changed': [], 'removed': []},
+             'links': {'added': [], 'changed': [], 'removed': []}}
+
+    for node in topology_data.get('nodes', []):
+        digest = current.nodes[node['id']] = content_hash(node, ignore)
+        previous = snapshot.nodes.get(node['id'])
+        if previous is None:
+            delta['nodes']['added'].append(node)
+        elif previous != digest:
+            delta['nodes']['changed'].append(node)
+    delta['nodes']['removed'] = [node_id for node_id in snapshot.nodes if node_id not in current.nodes]
+
+    links = topology_data.get('links', [])
+    for key, link in zip(link_keys(links, source, target), links):
+        digest = current.links[key] = content_hash(link, ignore)
+        previous = snapshot.links.get(key)
+        if previous is None:
+            delta['links']['added'].append(dict(link, key=key))
+        elif previous != digest:
+            delta['links']['changed'].append(dict(link, key=key))
+    delta['links']['removed'] = [key for key in snapshot.links if key not in current.links]
+    return delta, current
+
+
+def delta_size(delta):
+    """The number of nodes and links a delta adds, changes or removes"""
+    return sum(len(items) for part in ('nodes', 'links') for items in delta[part].values())
+
+
+def summarize_delta(delta):
+    """
+    Count a delta's changes.
+
+    Returns:
+        dict: ``{'nodes': {'added': n, 'changed': n, 'removed': n}, 'links': {...}}``
+    """
+    return {part: {change: len(items) for change, items in delta[part].items()} for part in ('nodes', 'links')}
+
+
+def apply_delta(topology_data, delta, source='source', target='target'):
+    """
+    Apply a delta to a topology built from the delta's base snapshot.
+
+    Args:
+        topology_data (dict): Topology the delta was computed against
+        delta (dict): Result of diff_topology()
+        source (str): Field holding a link's first end
+        target (str): Field holding a link's second end
+
+    Returns:
+        dict: The updated topology; the input is not modified
+    """
+    nodes = {node['id']: node for node in topology_data.get('nodes', [])}
+    for node_id in delta['nodes']['removed']:
+        nodes.pop(node_id, None)
+    for node in delta['nodes']['added'] + delta['nodes']['changed']:
+        nodes[node['id']] = node
+
+    old_links = topology_data.get('links', [])
+    links = dict(zip(link_keys(old_links, source, target), old_links))
+    for key in delta['links']['removed']:
+        links.pop(key, None)
+    for link in delta['links']['added'] + delta['links']['changed']:
+        links[link['key']] = {name: value for name, value in link.items() if name != 'key'}
+    return dict(topology_data, nodes=list(nodes.values()), links=list(links.values()))
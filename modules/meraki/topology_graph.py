@@ -0,0 +1,367 @@
+"""
+Network Topology Graph Module
+
+This module provides TopologyGraph, a compact graph over a network topology.
+Node IDs are interned to integer indices and adjacency is stored in compressed
+sparse row (CSR) form: for node i, its neighbours are
+``targets[offsets[i]:offsets[i + 1]]``. Both are ``array`` buffers rather than
+lists of dicts, so walking the graph touches a few contiguous integer arrays.
+
+On top of that it answers graph questions without rescanning node lists:
+
+- nodes by type
+- breadth-first hop counts and shortest paths
+- what loses connectivity if a device fails, from the dominator tree rooted
+  at the network's security appliances
+"""
+
+from array import array
+
+# Node types the dominator analysis roots at by default
+ROOT_TYPES = ('security_appliance', 'appliance', 'gateway')
+
+
+class TopologyNode:
+    """One node of a TopologyGraph"""
+
+    __slots__ = ('index', 'id', 'type', 'label', 'attributes')
+
+    def __init__(self, index, node_id, node_type, label, attributes):
+        self.index = index
+        self.id = node_id
+        self.type = node_type
+        self.label = label
+        self.attributes = attributes
+
+    def __repr__(self):
+        return f"TopologyNode({self.id!r}, type={self.type!r})"
+
+    def to_dict(self):
+        """The node in topology dict form"""
+        return dict(self.attributes, id=self.id, type=self.type, label=self.label)
+
+
+class TopologyGraph:
+    """
+    Array-backed, undirected topology graph.
+
+    Edges are stored in both directions. ``edge_links[k]`` is the position in
+    ``links`` of the link behind CSR entry ``k``, so link attributes such as the
+    connection type and interface stay reachable from the adjacency arrays.
+    """
+
+    def __init__(self, nodes, links, network_name=None, metadata=None):
+        """
+        Build the graph.
+
+        Args:
+            nodes (list): Topology nodes, dicts with at least an 'id'
+            links (list): Topology links, dicts with 'source' and 'target' node
+                IDs. Links to unknown nodes are kept in ``links`` but not in the
+                adjacency arrays.
+            network_name (str, optional): Name of the network
+            metadata (dict, optional): Other topology fields to keep, such as
+                'partial'
+        """
+        self.network_name = network_name
+        self.metadata = dict(metadata or {})
+        self.ids = []
+        self.index = {}
+        self.nodes = []
+        self._by_type = {}
+        for node in nodes:
+            node_id = node['id']
+            if node_id in self.index:
+                continue
+            position = len(self.ids)
+            self.index[node_id] = position
+            self.ids.append(node_id)
+            node_type = node.get('type', 'unknown')
+            attributes = {key: value for key, value in node.items() if key not in ('id', 'type', 'label')}
+            self.nodes.append(TopologyNode(position, node_id, node_type, node.get('label', node_id), attributes))
+            self._by_type.setdefault(node_type, array('i')).append(position)
+
+        self.links = list(links)
+        count = len(self.ids)
+        degree = array('i', bytes(4 * (count + 1)))
+        ends = []
+        for k, link in enumerate(self.links):
+            source = self.index.get(link.get('source'))
+            target = self.index.get(link.get('target'))
+            if source is None or target is None or source == target:
+                continue
+            ends.append((source, target, k))
+            degree[source] += 1
+            degree[target] += 1
+
+        self.offsets = array('i', bytes(4 * (count + 1)))
+        for i in range(count):
+            self.offsets[i + 1] = self.offsets[i] + degree[i]
+        self.targets = array('i', bytes(4 * self.offsets[count]))
+        self.edge_links = array('i', bytes(4 * self.offsets[count]))
+        fill = array('i', self.offsets)
+        for source, target, k in ends:
+            self.targets[fill[source]] = target
+            self.edge_links[fill[source]] = k
+            fill[source] += 1
+            self.targets[fill[target]] = source
+            self.edge_links[fill[target]] = k
+            fill[target] += 1
+
+    @classmethod
+    def from_topology(cls, topology_data):
+        """
+        Build a graph from topology dict data.
+
+        Args:
+            topology_data (dict): ``{'nodes', 'links', 'network_name', ...}`` as
+                returned by build_network_topology()
+
+        Returns:
+            TopologyGraph: The graph, keeping any other top-level fields as metadata
+        """
+        metadata = {key: value for key, value in topology_data.items()
+                    if key not in ('nodes', 'links', 'network_name')}
+        return cls(topology_data.get('nodes', []), topology_data.get('links', []),
+                   topology_data.get('network_name'), metadata)
+
+    def to_topology(self):
+        """
+        Convert back to topology dict data, for the visualizers.
+
+        Returns:
+            dict: ``{'network_name', 'nodes', 'links', ...}``
+        """
+        return dict(self.metadata, network_name=self.network_name,
+                    nodes=[node.to_dict() for node in self.nodes], links=list(self.links))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, node_id):
+        return node_id in self.index
+
+    def __iter__(self):
+        return iter(self.nodes)
+
+    def node(self, node_id):
+        """The TopologyNode with an ID; raises KeyError for unknown IDs"""
+        return self.nodes[self.index[node_id]]
+
+    def of_type(self, *node_types):
+        """
+        Get the nodes of some types.
+
+        Args:
+            *node_types (str): Node types, e.g. 'switch', 'wireless'
+
+        Returns:
+            list: Matching TopologyNodes, in insertion order per type
+        """
+        return [self.nodes[i] for node_type in node_types for i in self._by_type.get(node_type, ())]
+
+    def neighbours(self, node_id):
+        """
+        Get the IDs of the nodes linked to a node.
+
+        Args:
+            node_id: Node ID
+
+        Returns:
+            list: Neighbour node IDs
+        """
+        i = self.index[node_id]
+        return [self.ids[j] for j in self.targets[self.offsets[i]:self.offsets[i + 1]]]
+
+    def degree(self, node_id):
+        """The number of links at a node"""
+        i = self.index[node_id]
+        return self.offsets[i + 1] - self.offsets[i]
+
+    def _bfs(self, sources):
+        """Hop counts, BFS parents and visiting order from source indices"""
+        count = len(self.ids)
+        distance = array('i', [-1]) * count
+        parent = array('i', [-1]) * count
+        frontier = []
+        for source in sources:
+            if distance[source] < 0:
+                distance[source] = 0
+                frontier.append(source)
+        offsets, targets = self.offsets, self.targets
+        head = 0
+        while head < len(frontier):
+            current = frontier[head]
+            head += 1
+            for k in range(offsets[current], offsets[current + 1]):
+                neighbour = targets[k]
+                if distance[neighbour] < 0:
+                    distance[neighbour] = distance[current] + 1
+                    parent[neighbour] = current
+                    frontier.append(neighbour)
+        return distance, parent, frontier
+
+    def bfs(self, source, max_depth=None):
+        """
+        Walk the graph breadth-first.
+
+        Args:
+            source: Node ID to start from
+            max_depth (int, optional): Stop after this many hops
+
+        Returns:
+            dict: Node ID to hop count, in visiting order
+        """
+        distance, _, order = self._bfs([self.index[source]])
+        return {self.ids[i]: distance[i] for i in order if max_depth is None or distance[i] <= max_depth}
+
+    def shortest_path(self, source, target):
+        """
+        Find a path with the fewest hops between two nodes.
+
+        Args:
+            source: Node ID to start from
+            target: Node ID to reach
+
+        Returns:
+            list: Node IDs from source to target, or None if they aren't connected
+        """
+        start, goal = self.index[source], self.index[target]
+        _, parent, _ = self._bfs([start])
+        if start != goal and parent[goal] < 0:
+            return None
+        path = [goal]
+        while path[-1] != start:
+            path.append(parent[path[-1]])
+        return [self.ids[i] for i in reversed(path)]
+
+    def _roots(self, roots):
+        if roots is None:
+            indices = [node.index for node in self.of_type(*ROOT_TYPES)]
+            if not indices:
+                devices = [node.index for node in self.nodes if node.type != 'client']
+                indices = [max(devices, key=lambda i: self.offsets[i + 1] - self.offsets[i])] if devices else []
+        else:
+            if not isinstance(roots, (list, tuple, set)):
+                roots = [roots]
+            indices = [self.index[root] for root in roots]
+        return indices
+
+    def dominators(self, roots=None):
+        """
+        Compute the dominator tree of the graph from its roots.
+
+        Node d dominates node v when every path from the roots to v passes
+        through d, i.e. v is cut off from the roots if d fails. Uses the
+        iterative algorithm of Cooper, Harvey and Kennedy over a virtual root
+        linked to every root.
+
+        Args:
+            roots (optional): Root node ID or IDs. Defaults to the security
+                appliances, or the best-connected device if there are none.
+
+        Returns:
+            dict: Node ID to its immediate dominator's ID, None for the roots.
+            Nodes unreachable from the roots are left out.
+        """
+        root_indices = self._roots(roots)
+        count = len(self.ids)
+        virtual = count
+        offsets, targets = self.offsets, self.targets
+
+        # Reverse postorder of an iterative depth-first search from the virtual root
+        postorder = array('i', [-1]) * (count + 1)
+        order = []
+        visited = bytearray(count + 1)
+        visited[virtual] = 1
+        stack = [(virtual, iter(root_indices))]
+        while stack:
+            current, pending = stack[-1]
+            for neighbour in pending:
+                if not visited[neighbour]:
+                    visited[neighbour] = 1
+                    stack.append((neighbour, iter(targets[offsets[neighbour]:offsets[neighbour + 1]])))
+                    break
+            else:
+                stack.pop()
+                postorder[current] = len(order)
+                order.append(current)
+        reverse_postorder = order[::-1]
+        is_root = set(root_indices)
+
+        idom = array('i', [-1]) * (count + 1)
+        idom[virtual] = virtual
+
+        def intersect(a, b):
+            while a != b:
+                while postorder[a] < postorder[b]:
+                    a = idom[a]
+                while postorder[b] < postorder[a]:
+                    b = idom[b]
+            return a
+
+        changed = True
+        while changed:
+            changed = False
+            for current in reverse_postorder[1:]:
+                # Links are undirected, so predecessors are the neighbours
+                predecessors = targets[offsets[current]:offsets[current + 1]]
+                new_idom = virtual if current in is_root else -1
+                for predecessor in predecessors:
+                    if idom[predecessor] < 0:
+                        continue
+                    new_idom = predecessor if new_idom < 0 else intersect(predecessor, new_idom)
+                if idom[current] != new_idom:
+                    idom[current] = new_idom
+                    changed = True
+
+        return {self.ids[i]: (None if idom[i] == virtual else self.ids[idom[i]])
+                for i in reverse_postorder[1:]}
+
+    def failure_impact(self, node_id, roots=None, dominator_tree=None):
+        """
+        Find what loses connectivity to the roots if a device fails.
+
+        Args:
+            node_id: ID of the failing node
+            roots (optional): Root node ID or IDs (see dominators())
+            dominator_tree (dict, optional): Result of dominators() to reuse when
+                asking about many nodes
+
+        Returns:
+            list: IDs of the nodes dominated by the failing node, in breadth-first
+            order, not including the node itself
+        """
+        tree = dominator_tree if dominator_tree is not None else self.dominators(roots)
+        children = {}
+        for child, parent in tree.items():
+            if parent is not None:
+                children.setdefault(parent, []).append(child)
+        impacted = []
+        frontier = children.get(node_id, [])
+        while frontier:
+            impacted.extend(frontier)
+            frontier = [child for parent in frontier for child in children.get(parent, ())]
+        return impacted
+
+    def critical_devices(self, roots=None):
+        """
+        Rank devices by how many nodes lose connectivity if they fail.
+
+        Args:
+            roots (optional): Root node ID or IDs (see dominators())
+
+        Returns:
+            list: (device ID, number of nodes cut off) for every device that
+            would cut off at least one node, most impactful first
+        """
+        tree = self.dominators(roots)
+        subtree = dict.fromkeys(tree, 1)
+        # Parents come before children in the tree's reverse postorder, so sum back to front
+        for node_id in reversed(list(tree)):
+            parent = tree[node_id]
+            if parent is not None:
+                subtree[parent] += subtree[node_id]
+        impact = [(node_id, size - 1) for node_id, size in subtree.items()
+                  if size > 1 and self.nodes[self.index[node_id]].type != 'client']
+        return sorted(impact, key=lambda item: -item[1])
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Test script for the pooled Meraki HTTP client, run against the local mock
+Dashboard API.
+"""
+import os
+import logging
+import threading
+from modules.meraki.meraki_client import get_client, close_clients
+from modules.meraki.mock_server import MockDashboardServer
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+def test_throttled_stream_releases_connections():
+    """Streamed pages answered 429 must give their connection back to the pool."""
+    with MockDashboardServer(networks=1, devices=10, clients=200, throttle_rate=0.5, retry_after=0) as server:
+        os.environ['MERAKI_BASE_URL'] = server.base_url
+        try:
+            client = get_client('mock-api-key', pool_size=2)
+            pages = []
+
+            def stream_pages():
+                # The pool blocks when it runs out, so a leaked connection hangs here
+                for _ in range(5):
+                    pages.append(sum(1 for _ in client.iter_stream('/networks/N_000000000/clients', per_page=50)))
+
+            worker = threading.Thread(target=stream_pages, daemon=True)
+            worker.start()
+            worker.join(timeout=60)
+            assert not worker.is_alive(), f"Streaming hung after {len(pages)} of 5 runs"
+            assert server.counter('throttled') > 0, "The mock server injected no 429 responses"
+            assert client.connection_stats()['connections_opened'] <= 2
+            logging.info(f"Streamed {len(pages)} runs of {pages[0]} clients through "
+                         f"{server.counter('throttled')} throttled responses")
+        finally:
+            del os.environ['MERAKI_BASE_URL']
+            close_clients()
+
+if __name__ == "__main__":
+    test_throttled_stream_releases_connections()
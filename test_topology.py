@@ -1,6 +1,9 @@
 #!/usr/bin/env python3
 """
 Test script for the network topology functionality in the Meraki API module.
+
+Set MERAKI_MOCK_SERVER=1 to run against the local mock Dashboard API instead of
+a live API key.
 """
 import os
 import logging
@@ -15,9 +18,20 @@ load_dotenv()
 
 def test_network_topology():
     """Test the network topology functionality with improved error handling."""
+    if os.getenv('MERAKI_MOCK_SERVER'):
+        from modules.meraki.mock_server import MockDashboardServer
+        with MockDashboardServer(networks=3, devices=30, clients=150) as server:
+            os.environ['MERAKI_BASE_URL'] = server.base_url
+            try:
+                run_network_topology_test('mock-api-key')
+            finally:
+                del os.environ['MERAKI_BASE_URL']
+        return
+    run_network_topology_test(initialize_api_key())
+
+def run_network_topology_test(api_key):
+    """Fetch and summarize the topology of every network in the first organization."""
     try:
-        # Initialize API key
-        api_key = initialize_api_key()
         if not api_key:
             logging.error("Failed to initialize API key")
             return
@@ -57,7 +71,7 @@ def test_network_topology():
                 if topology['nodes']:
                     logging.info("Sample nodes:")
                     for node in topology['nodes'][:3]:  # Show up to 3 nodes
-                        logging.info(f"  - {node['name']} ({node['model']})")
+                        logging.info(f"  - {node['label']} ({node['model']})")
             else:
                 logging.warning(f"No topology data for network {network_name}")
         
@@ -33,8 +33,6 @@
 # IMPORT various libraries and modules
 # ==================================================
 import os
-import webbrowser
-from flask import Flask, render_template, jsonify
 from pathlib import Path
 from datetime import datetime
 from termcolor import colored
@@ -216,11 +214,7 @@ def submenu_network_wide(api_key):
             if organization_id:
                 network_id = select_network(api_key, organization_id)
                 if network_id:
-                    network_name = meraki_api.get_network_name(api_key, network_id)
-                    topology_data = meraki_api.get_network_topology(api_key, network_id)
-                    if topology_data:
-                        topology_data['network_name'] = network_name
-                        create_web_visualization(topology_data)
+                    create_web_visualization(api_key, [network_id])
             input(colored("\nPress Enter to continue...", "green"))
         elif choice == '2':
             organization_id = select_organization(api_key)
@@ -299,365 +293,24 @@ def submenu_sw_and_ap(api_key):
             print(colored("\nInvalid choice. Please try again.", "red"))
             input(colored("\nPress Enter to continue...", "green"))
 
-def create_web_visualization(topology_data):
-    """Create and launch web visualization"""
-    app = Flask(__name__, 
-                template_folder=os.path.join(os.path.dirname(__file__), '..', 'web', 'templates'),
-                static_folder=os.path.join(os.path.dirname(__file__), '..', 'web', 'static'))
-    
-    @app.route('/')
-    def index():
-        return render_template('topology.html')
-    
-    @app.route('/topology-data')
-    def get_topology():
-        return jsonify(topology_data)
-    
-    # Create web directory if it doesn't exist
-    web_dir = os.path.join(os.path.dirname(__file__), '..', 'web')
-    templates_dir = os.path.join(web_dir, 'templates')
-    static_dir = os.path.join(web_dir, 'static')
-    
-    os.makedirs(templates_dir, exist_ok=True)
-    os.makedirs(static_dir, exist_ok=True)
-    
-    # Create HTML template
-    html_content = """
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>Network Topology Visualization</title>
-        <script src="https://d3js.org/d3.v7.min.js"></script>
-        <link rel="stylesheet" href="{{ url_for('static', filename='style.css') }}">
-    </head>
-    <body>
-        <div class="controls">
-            <div class="search-box">
-                <input type="text" id="search" placeholder="Search devices...">
-            </div>
-            <div class="filter-box">
-                <label>Filter by type:</label>
-                <select id="deviceFilter">
-                    <option value="all">All Devices</option>
-                    <option value="switch">Switches</option>
-                    <option value="wireless">Wireless</option>
-                    <option value="appliance">Appliances</option>
-                </select>
-            </div>
-            <div class="layout-box">
-                <label>Layout:</label>
-                <select id="layoutType">
-                    <option value="force">Force Directed</option>
-                    <option value="radial">Radial</option>
-                    <option value="hierarchical">Hierarchical</option>
-                </select>
-            </div>
-        </div>
-        <div class="stats-panel">
-            <h3>Network Statistics</h3>
-            <div id="deviceStats"></div>
-            <div id="connectionStats"></div>
-            <div id="performanceStats"></div>
-        </div>
-        <div id="topology"></div>
-        <div id="tooltip" class="tooltip"></div>
-        <script src="{{ url_for('static', filename='topology.js') }}"></script>
-    </body>
-    </html>
-    """
-
-    # Create CSS
-    css_content = """
-    body {
-        margin: 0;
-        font-family: Arial, sans-serif;
-        background-color: #f0f0f0;
-        display: flex;
-        flex-direction: column;
-    }
-    .controls {
-        background-color: #fff;
-        padding: 15px;
-        box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-        display: flex;
-        gap: 20px;
-        align-items: center;
-    }
-    .search-box input {
-        padding: 8px;
-        border: 1px solid #ddd;
-        border-radius: 4px;
-        width: 200px;
-    }
-    .filter-box, .layout-box {
-        display: flex;
-        align-items: center;
-        gap: 10px;
-    }
-    select {
-        padding: 8px;
-        border: 1px solid #ddd;
-        border-radius: 4px;
-    }
-    .stats-panel {
-        position: fixed;
-        right: 0;
-        top: 60px;
-        width: 250px;
-        background-color: white;
-        padding: 15px;
-        box-shadow: -2px 0 4px rgba(0,0,0,0.1);
-        height: calc(100vh - 60px);
-        overflow-y: auto;
-    }
-    #topology {
-        width: calc(100vw - 250px);
-        height: calc(100vh - 60px);
-        background-color: white;
-    }
-    .tooltip {
-        position: absolute;
-        padding: 10px;
-        background-color: rgba(0, 0, 0, 0.8);
-        color: white;
-        border-radius: 5px;
-        pointer-events: none;
-        display: none;
-    }
-    .node circle {
-        stroke: #fff;
-        stroke-width: 2px;
-    }
-    .node text {
-        font-size: 12px;
-    }
-    .link {
-        stroke: #999;
-        stroke-opacity: 0.6;
-        stroke-width: 2px;
-    }
-    .hidden {
-        opacity: 0.2;
-    }
+def create_web_visualization(api_key, network_ids):
     """
-
-    # Create JavaScript
-    js_content = """
-    let currentLayout = 'force';
-    let simulation;
-    let svg;
-    let link;
-    let node;
-    
-    fetch('/topology-data')
-        .then(response => response.json())
-        .then(data => {
-            const width = window.innerWidth - 250;
-            const height = window.innerHeight - 60;
-            
-            svg = d3.select('#topology')
-                .append('svg')
-                .attr('width', width)
-                .attr('height', height);
-            
-            // Initialize force simulation
-            simulation = d3.forceSimulation(data.nodes)
-                .force('link', d3.forceLink(data.links).id(d => d.id))
-                .force('charge', d3.forceManyBody().strength(-1000))
-                .force('center', d3.forceCenter(width / 2, height / 2));
-            
-            // Create links
-            link = svg.append('g')
-                .selectAll('line')
-                .data(data.links)
-                .join('line')
-                .attr('class', 'link');
-            
-            // Create nodes
-            node = svg.append('g')
-                .selectAll('g')
-                .data(data.nodes)
-                .join('g')
-                .attr('class', 'node')
-                .call(d3.drag()
-                    .on('start', dragstarted)
-                    .on('drag', dragged)
-                    .on('end', dragended));
-            
-            node.append('circle')
-                .attr('r', 20)
-                .style('fill', getNodeColor);
-            
-            node.append('text')
-                .attr('dx', 25)
-                .attr('dy', '.35em')
-                .text(d => d.name);
-            
-            // Tooltip functionality
-            const tooltip = d3.select('#tooltip');
-            
-            node.on('mouseover', (event, d) => {
-                tooltip.style('display', 'block')
-                    .html(`
-                        <div>
-                            <strong>${d.name}</strong><br>
-                            Model: ${d.model}<br>
-                            Type: ${d.type}<br>
-                            Status: ${d.status}
-                        </div>
-                    `)
-                    .style('left', (event.pageX + 10) + 'px')
-                    .style('top', (event.pageY + 10) + 'px');
-            })
-            .on('mouseout', () => {
-                tooltip.style('display', 'none');
-            });
-            
-            // Update statistics
-            updateStatistics(data);
-            
-            // Search functionality
-            d3.select('#search').on('input', function() {
-                const searchTerm = this.value.toLowerCase();
-                node.classed('hidden', d => !d.name.toLowerCase().includes(searchTerm));
-                link.classed('hidden', d => {
-                    const sourceHidden = !d.source.name.toLowerCase().includes(searchTerm);
-                    const targetHidden = !d.target.name.toLowerCase().includes(searchTerm);
-                    return sourceHidden && targetHidden;
-                });
-            });
-            
-            // Device type filter
-            d3.select('#deviceFilter').on('change', function() {
-                const filterValue = this.value;
-                node.classed('hidden', d => filterValue !== 'all' && d.type !== filterValue);
-                link.classed('hidden', d => {
-                    const sourceHidden = filterValue !== 'all' && d.source.type !== filterValue;
-                    const targetHidden = filterValue !== 'all' && d.target.type !== filterValue;
-                    return sourceHidden && targetHidden;
-                });
-            });
-            
-            // Layout selection
-            d3.select('#layoutType').on('change', function() {
-                currentLayout = this.value;
-                updateLayout();
-            });
-            
-            // Initial layout
-            updateLayout();
-        });
-    
-    function getNodeColor(d) {
-        switch(d.type) {
-            case 'switch': return '#4CAF50';
-            case 'wireless': return '#2196F3';
-            case 'appliance': return '#F44336';
-            default: return '#9E9E9E';
-        }
-    }
-    
-    function updateStatistics(data) {
-        // Device statistics
-        const deviceTypes = d3.group(data.nodes, d => d.type);
-        const deviceStats = Array.from(deviceTypes, ([type, nodes]) => ({
-            type: type || 'unknown',
-            count: nodes.length
-        }));
-        
-        const deviceStatsHtml = `
-            <h4>Device Count</h4>
-            ${deviceStats.map(stat => `
-                <div>${stat.type}: ${stat.count}</div>
-            `).join('')}
-        `;
-        
-        // Connection statistics
-        const connectionTypes = d3.group(data.links, d => d.type);
-        const connectionStats = Array.from(connectionTypes, ([type, links]) => ({
-            type: type || 'unknown',
-            count: links.length
-        }));
-        
-        const connectionStatsHtml = `
-            <h4>Connection Types</h4>
-            ${connectionStats.map(stat => `
-                <div>${stat.type}: ${stat.count}</div>
-            `).join('')}
-        `;
-        
-        // Performance metrics
-        const performanceStatsHtml = `
-            <h4>Network Performance</h4>
-            <div>Active Connections: ${data.links.length}</div>
-            <div>Total Devices: ${data.nodes.length}</div>
-        `;
-        
-        d3.select('#deviceStats').html(deviceStatsHtml);
-        d3.select('#connectionStats').html(connectionStatsHtml);
-        d3.select('#performanceStats').html(performanceStatsHtml);
-    }
-    
-    function updateLayout() {
-        simulation.stop();
-        
-        switch(currentLayout) {
-            case 'radial':
-                simulation
-                    .force('link', d3.forceLink().id(d => d.id).distance(100))
-                    .force('charge', d3.forceManyBody().strength(-1000))
-                    .force('r', d3.forceRadial(200))
-                    .force('center', d3.forceCenter(width / 2, height / 2));
-                break;
-                
-            case 'hierarchical':
-                simulation
-                    .force('link', d3.forceLink().id(d => d.id).distance(100))
-                    .force('charge', d3.forceManyBody().strength(-500))
-                    .force('x', d3.forceX())
-                    .force('y', d3.forceY().strength(0.1).y(d => d.depth * 100));
-                break;
-                
-            default: // force
-                simulation
-                    .force('link', d3.forceLink().id(d => d.id))
-                    .force('charge', d3.forceManyBody().strength(-1000))
-                    .force('center', d3.forceCenter(width / 2, height / 2));
-        }
-        
-        simulation.alpha(1).restart();
-    }
-    
-    function dragstarted(event) {
-        if (!event.active) simulation.alphaTarget(0.3).restart();
-        event.subject.fx = event.subject.x;
-        event.subject.fy = event.subject.y;
-    }
-    
-    function dragged(event) {
-        event.subject.fx = event.x;
-        event.subject.fy = event.y;
-    }
+    Serve live topologies of networks until Ctrl+C
     
-    function dragended(event) {
-        if (!event.active) simulation.alphaTarget(0);
-        event.subject.fx = null;
-        event.subject.fy = null;
-    }
+    Args:
+        api_key (str): Meraki API key
+        network_ids (list): IDs of the networks to serve
     """
-
-    with open(os.path.join(templates_dir, 'topology.html'), 'w') as f:
-        f.write(html_content)
-    
-    with open(os.path.join(static_dir, 'style.css'), 'w') as f:
-        f.write(css_content)
-    
-    with open(os.path.join(static_dir, 'topology.js'), 'w') as f:
-        f.write(js_content)
-    
-    # Open browser and start Flask app
-    webbrowser.open('http://localhost:5000')
-    app.run(debug=False)
+    from api.topology_server import LIVE_POLL_INTERVAL, serve_topology
+    print(colored(f"\nServing live topology at http://localhost:8050, refreshed every {LIVE_POLL_INTERVAL}s.", "green"))
+    print(colored("Press Ctrl+C to stop the server.", "green"))
+    try:
+        serve_topology(api_key, network_ids)
+    except KeyboardInterrupt:
+        pass
+    except Exception as e:
+        logging.error(f"Error serving live topology: {str(e)}")
+        print(colored(f"\nError serving live topology: {str(e)}", "red"))
 
 def network_wide_operations(api_key, organization_id):
     while True:
@@ -673,16 +326,17 @@ def network_wide_operations(api_key, organization_id):
             "Check Device Uplinks",
             "Generate Network Diagram",
             "Launch Web Visualization",
+            "Launch Live Web Visualization",
             "Return to Previous Menu"
         ]
         for index, option in enumerate(options, start=1):
             print(f"{index}. {option}")
 
-        choice = input(colored("\nChoose an option [1-9]: ", "cyan"))
+        choice = input(colored("\nChoose an option [1-10]: ", "cyan"))
         
-        if choice == '9':
+        if choice == '10':
             break
-        elif choice in ['1', '2', '3', '4', '5', '6', '7', '8']:
+        elif choice in ['1', '2', '3', '4', '5', '6', '7', '8', '9']:
             network_id = meraki_api.select_network(api_key, organization_id)
             if network_id:
                 # Get network details for visualization title
@@ -845,6 +499,7 @@ def network_wide_operations(api_key, organization_id):
                         
                         # Build the topology with the collected data
                         topology = build_topology_from_api_data(devices, clients, links)
+                        topology['network_id'] = network_id
                         
                         # Display summary of the topology
                         print("\nNetwork Topology Summary:")
@@ -945,6 +600,12 @@ def network_wide_operations(api_key, organization_id):
                         logging.error(f"Error launching web visualization: {str(e)}")
                         print(colored(f"\nError launching web visualization: {str(e)}", "red"))
                     
+                    input("\nPress Enter to continue...")
+                elif choice == '9':
+                    # Serve the network live, pushing changes to the browser as they're polled
+                    print(colored("\nLaunching live web visualization...", "cyan"))
+                    create_web_visualization(api_key, [network_id])
+                    
                     input("\nPress Enter to continue...")
         else:
             print(colored("Invalid choice. Please try again.", "red"))
@@ -1556,11 +1217,7 @@ def submenu_network_wide_sdk(sdk_wrapper):
             if organization_id:
                 network_id = select_network(sdk_wrapper, organization_id)
                 if network_id:
-                    network_name = sdk_wrapper.get_network_name(network_id)
-                    topology_data = sdk_wrapper.get_network_topology(network_id)
-                    if topology_data:
-                        topology_data['network_name'] = network_name
-                        create_web_visualization(topology_data)
+                    create_web_visualization(sdk_wrapper.api_key, [network_id])
             input(colored("\nPress Enter to continue...", "green"))
         elif choice == '2':
             organization_id = select_organization(sdk_wrapper)
@@ -2203,6 +1860,7 @@ def network_wide_operations_sdk(sdk_wrapper, organization_id):
                         
                         # Build the topology with the collected data
                         topology = build_topology_from_api_data(devices, clients, links)
+                        topology['network_id'] = network_id
                         
                         # Display summary of the topology
                         print("\nNetwork Topology Summary:")
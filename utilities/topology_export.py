@@ -0,0 +1,501 @@
+"""
+Topology Export Module
+
+This module writes topologies in graph interchange formats, for tools other
+than the vis.js page:
+
+- GraphML (``.graphml``), for Gephi, yEd, Cytoscape and networkx
+- GEXF 1.3 (``.gexf``), for Gephi
+- DOT (``.dot`` or ``.gv``), for Graphviz
+- node-link JSON (``.json``), as read by networkx.node_link_graph()
+
+Writers stream: nodes and links are taken from iterables and written one at a
+time, so memory stays flat however large the graph. Formats that list every
+node before the first link get the nodes and the links as two separate
+iterables; an organization topology file is simply read twice. Append ``.gz``
+to a path to gzip the output.
+
+Node and link fields are flattened, so a client's ``connection.port`` becomes
+its own attribute. GraphML and GEXF declare their attributes up front, from
+EXPORT_NODE_ATTRIBUTES and EXPORT_LINK_ATTRIBUTES; DOT and JSON keep every field.
+
+From the command line, export a network, or a whole organization with one
+worker process per output file:
+
+    python -m utilities.topology_export network L_123 -o site.graphml
+    python -m utilities.topology_export org 123456 -o exports --format gexf dot --split
+"""
+
+import argparse
+import gzip
+import json
+import logging
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from xml.sax.saxutils import escape, quoteattr
+
+# Node attributes declared in GraphML and GEXF, as (name, type)
+EXPORT_NODE_ATTRIBUTES = (
+    ('type', 'string'), ('model', 'string'), ('ip', 'string'), ('mac', 'string'), ('serial', 'string'),
+    ('firmware', 'string'), ('status', 'string'), ('client_type', 'string'), ('vlan', 'string'),
+    ('network_id', 'string'), ('connection.type', 'string'), ('connection.port', 'string'),
+    ('connection.ssid', 'string'), ('connection.last_seen', 'string'), ('usage.sent', 'double'),
+    ('usage.recv', 'double')
+)
+
+# Link attributes declared in GraphML and GEXF, as (name, type)
+EXPORT_LINK_ATTRIBUTES = (('type', 'string'), ('status', 'string'), ('interface', 'string'))
+
+# File suffixes of each format
+EXPORT_SUFFIXES = {'graphml': '.graphml', 'gexf': '.gexf', 'dot': '.dot', 'json': '.json'}
+
+# Characters per write() call once buffered
+WRITE_BUFFER = 1 << 16
+
+
+def flatten_fields(item, prefix=''):
+    """
+    Flatten nested dicts into dotted field names.
+
+    Args:
+        item (dict): Node or link
+        prefix (str): Prefix for the names
+
+    Returns:
+        dict: Field name to value, without None values
+    """
+    fields = {}
+    for key, value in item.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            fields.update(flatten_fields(value, f"{name}."))
+        elif value is not None:
+            fields[name] = value
+    return fields
+
+
+class _BufferedWriter:
+    """Collects small writes into larger ones"""
+
+    def __init__(self, out):
+        self.out = out
+        self.parts = []
+        self.size = 0
+
+    def write(self, text):
+        self.parts.append(text)
+        self.size += len(text)
+        if self.size >= WRITE_BUFFER:
+            self.flush()
+
+    def flush(self):
+        self.out.write(''.join(self.parts))
+        self.parts = []
+        self.size = 0
+
+
+def _xml_value(value):
+    return escape(value if isinstance(value, str) else json.dumps(value, default=str)
+                  if isinstance(value, (list, dict)) else str(value))
+
+
+def _declared(fields, attributes):
+    """Values of the declared attributes an item has"""
+    for position, (name, _) in enumerate(attributes):
+        value = fields.get(name)
+        if value is not None and value != '':
+            yield position, name, value
+
+
+def write_graphml(out, nodes, links, name=None, node_attributes=EXPORT_NODE_ATTRIBUTES,
+                  link_attributes=EXPORT_LINK_ATTRIBUTES):
+    """
+    Write a topology as GraphML.
+
+    Args:
+        out: Text stream to write to
+        nodes (Iterable): Topology nodes
+        links (Iterable): Topology links, only read once every node is written
+        name (str, optional): Graph name
+        node_attributes (tuple): Declared node attributes, as (name, type)
+        link_attributes (tuple): Declared link attributes, as (name, type)
+
+    Returns:
+        tuple: (nodes written, links written)
+    """
+    writer = _BufferedWriter(out)
+    writer.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                 '<graphml xmlns="http://graphml.graphdrawing.org/xmlns" '
+                 'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" '
+                 'xsi:schemaLocation="http://graphml.graphdrawing.org/xmlns '
+                 'http://graphml.graphdrawing.org/xmlns/1.0/graphml.xsd">\n')
+    writer.write('  <key id="label" for="node" attr.name="label" attr.type="string"/>\n')
+    for position, (attribute, kind) in enumerate(node_attributes):
+        writer.write(f'  <key id="n{position}" for="node" attr.name={quoteattr(attribute)} attr.type="{kind}"/>\n')
+    for position, (attribute, kind) in enumerate(link_attributes):
+        writer.write(f'  <key id="e{position}" for="edge" attr.name={quoteattr(attribute)} attr.type="{kind}"/>\n')
+    writer.write(f'  <graph id={quoteattr(str(name or "topology"))} edgedefault="undirected">\n')
+
+    node_count = 0
+    for node in nodes:
+        fields = flatten_fields(node)
+        writer.write(f'    <node id={quoteattr(str(node["id"]))}>'
+                     f'<data key="label">{_xml_value(node.get("label", node["id"]))}</data>')
+        for position, _, value in _declared(fields, node_attributes):
+            writer.write(f'<data key="n{position}">{_xml_value(value)}</data>')
+        writer.write('</node>\n')
+        node_count += 1
+
+    link_count = 0
+    for link in links:
+        fields = flatten_fields(link)
+        writer.write(f'    <edge id="e{link_count}" source={quoteattr(str(link["source"]))} '
+                     f'target={quoteattr(str(link["target"]))}>')
+        for position, _, value in _declared(fields, link_attributes):
+            writer.write(f'<data key="e{position}">{_xml_value(value)}</data>')
+        writer.write('</edge>\n')
+        link_count += 1
+
+    writer.write('  </graph>\n</graphml>\n')
+    writer.flush()
+    return node_count, link_count
+
+
+def write_gexf(out, nodes, links, name=None, node_attributes=EXPORT_NODE_ATTRIBUTES,
+               link_attributes=EXPORT_LINK_ATTRIBUTES):
+    """
+    Write a topology as GEXF 1.3.
+
+    Args and Returns:
+        As for write_graphml()
+    """
+    writer = _BufferedWriter(out)
+    writer.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                 '<gexf xmlns="http://gexf.net/1.3" version="1.3">\n'
+                 f'  <meta><description>{_xml_value(name or "topology")}</description></meta>\n'
+                 '  <graph mode="static" defaultedgetype="undirected">\n')
+    for kind, attributes in (('node', node_attributes), ('edge', link_attributes)):
+        writer.write(f'    <attributes class="{kind}">\n')
+        for position, (attribute, value_type) in enumerate(attributes):
+            writer.write(f'      <attribute id="{position}" title={quoteattr(attribute)} type="{value_type}"/>\n')
+        writer.write('    </attributes>\n')
+
+    def attvalues(fields, attributes):
+        values = ''.join(f'<attvalue for="{position}" value={quoteattr(_xml_value(value))}/>'
+                         for position, _, value in _declared(fields, attributes))
+        return f'<attvalues>{values}</attvalues>' if values else ''
+
+    writer.write('    <nodes>\n')
+    node_count = 0
+    for node in nodes:
+        writer.write(f'      <node id={quoteattr(str(node["id"]))} '
+                     f'label={quoteattr(_xml_value(node.get("label", node["id"])))}>'
+                     f'{attvalues(flatten_fields(node), node_attributes)}</node>\n')
+        node_count += 1
+    writer.write('    </nodes>\n    <edges>\n')
+    link_count = 0
+    for link in links:
+        writer.write(f'      <edge id="{link_count}" source={quoteattr(str(link["source"]))} '
+                     f'target={quoteattr(str(link["target"]))}>'
+                     f'{attvalues(flatten_fields(link), link_attributes)}</edge>\n')
+        link_count += 1
+    writer.write('    </edges>\n  </graph>\n</gexf>\n')
+    writer.flush()
+    return node_count, link_count
+
+
+def _dot_id(value):
+    text = value if isinstance(value, str) else json.dumps(value, default=str) \
+        if isinstance(value, (list, dict)) else str(value)
+    return '"' + text.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+
+
+def _dot_attributes(fields):
+    return ', '.join(f"{_dot_id(key)}={_dot_id(value)}" for key, value in fields.items())
+
+
+def write_dot(out, nodes, links, name=None):
+    """
+    Write a topology as a Graphviz DOT graph.
+
+    Every field of a node or link is kept as a DOT attribute.
+
+    Args:
+        out: Text stream to write to
+        nodes (Iterable): Topology nodes
+        links (Iterable): Topology links
+        name (str, optional): Graph name
+
+    Returns:
+        tuple: (nodes written, links written)
+    """
+    writer = _BufferedWriter(out)
+    writer.write(f"graph {_dot_id(name or 'topology')} {{\n  node [shape=box];\n")
+    node_count = 0
+    for node in nodes:
+        fields = flatten_fields(node)
+        fields.pop('id', None)
+        fields.setdefault('label', node['id'])
+        writer.write(f"  {_dot_id(node['id'])} [{_dot_attributes(fields)}];\n")
+        node_count += 1
+    link_count = 0
+    for link in links:
+        fields = flatten_fields(link)
+        source, target = fields.pop('source'), fields.pop('target')
+        attributes = f" [{_dot_attributes(fields)}]" if fields else ''
+        writer.write(f"  {_dot_id(source)} -- {_dot_id(target)}{attributes};\n")
+        link_count += 1
+    writer.write('}\n')
+    writer.flush()
+    return node_count, link_count
+
+
+def write_node_link_json(out, nodes, links, name=None, graph=None):
+    """
+    Write a topology as node-link JSON.
+
+    The layout is the one networkx.node_link_graph() reads, with every field of
+    the nodes and links kept as is.
+
+    Args:
+        out: Text stream to write to
+        nodes (Iterable): Topology nodes
+        links (Iterable): Topology links
+        name (str, optional): Graph name
+        graph (dict, optional): Other graph-level fields
+
+    Returns:
+        tuple: (nodes written, links written)
+    """
+    writer = _BufferedWriter(out)
+    header = dict(graph or {}, name=name or 'topology')
+    writer.write('{"directed":false,"multigraph":true,"graph":')
+    writer.write(json.dumps(header, separators=(',', ':'), default=str))
+    counts = []
+    for key, items in (('nodes', nodes), ('links', links)):
+        writer.write(f',\n"{key}":[')
+        count = 0
+        for item in items:
+            writer.write(',\n' if count else '\n')
+            writer.write(json.dumps(item, separators=(',', ':'), default=str))
+            count += 1
+        writer.write(']')
+        counts.append(count)
+    writer.write('}\n')
+    writer.flush()
+    return tuple(counts)
+
+
+EXPORT_WRITERS = {'graphml': write_graphml, 'gexf': write_gexf, 'dot': write_dot, 'json': write_node_link_json}
+
+
+def export_format(path):
+    """
+    Infer the export format from a file name.
+
+    Args:
+        path (str): Output path, optionally ending in .gz
+
+    Returns:
+        str: 'graphml', 'gexf', 'dot' or 'json'
+    """
+    suffixes = Path(path).suffixes
+    if suffixes and suffixes[-1] == '.gz':
+        suffixes = suffixes[:-1]
+    suffix = suffixes[-1] if suffixes else ''
+    for name, known in EXPORT_SUFFIXES.items():
+        if suffix == known:
+            return name
+    if suffix == '.gv':
+        return 'dot'
+    raise ValueError(f"Unknown export format for {path}; use one of {', '.join(EXPORT_SUFFIXES)}")
+
+
+def export_graph(nodes, links, path, export_as=None, name=None):
+    """
+    Stream nodes and links to a file, atomically.
+
+    Args:
+        nodes (Iterable): Topology nodes
+        links (Iterable): Topology links, only read once every node is written
+        path (str): Output file; gzip-compressed when it ends in .gz
+        export_as (str, optional): Format, inferred from the path by default
+        name (str, optional): Graph name
+
+    Returns:
+        dict: ``{'path', 'format', 'nodes', 'links'}``
+    """
+    path = Path(path)
+    export_as = export_as or export_format(path)
+    os.makedirs(path.parent, exist_ok=True)
+    temporary = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    opener = gzip.open if path.suffix == '.gz' else open
+    try:
+        with opener(temporary, 'wt', encoding='utf-8') as out:
+            node_count, link_count = EXPORT_WRITERS[export_as](out, nodes, links, name=name)
+        os.replace(temporary, path)
+    finally:
+        if temporary.exists():
+            temporary.unlink()
+    logging.info(f"Exported {node_count} nodes and {link_count} links as {export_as} to {path}")
+    return {'path': str(path), 'format': export_as, 'nodes': node_count, 'links': link_count}
+
+
+def export_topology(topology_data, path, export_as=None):
+    """
+    Export a network topology.
+
+    Args:
+        topology_data (dict or TopologyGraph): Topology with nodes and links
+        path (str): Output file; gzip-compressed when it ends in .gz
+        export_as (str, optional): Format, inferred from the path by default
+
+    Returns:
+        dict: ``{'path', 'format', 'nodes', 'links'}``
+    """
+    if hasattr(topology_data, 'to_topology'):
+        topology_data = topology_data.to_topology()
+    return export_graph(topology_data.get('nodes', []), topology_data.get('links', []), path, export_as,
+                        topology_data.get('network_name'))
+
+
+def _organization_items(org_path, kind):
+    """Nodes or links of every record in an organization topology file, read lazily"""
+    from modules.meraki.org_topology import iter_organization_topology
+    for record in iter_organization_topology(org_path):
+        if record.get('kind') in ('network', 'vpn'):
+            yield from record[kind]
+
+
+def export_organization(org_path, path, export_as=None):
+    """
+    Export a whole organization topology file, reading it twice instead of loading it.
+
+    Args:
+        org_path (str): File written by build_organization_topology()
+        path (str): Output file; gzip-compressed when it ends in .gz
+        export_as (str, optional): Format, inferred from the path by default
+
+    Returns:
+        dict: ``{'path', 'format', 'nodes', 'links'}``
+    """
+    from modules.meraki.org_topology import iter_organization_topology
+    name = None
+    for record in iter_organization_topology(org_path):
+        name = f"Organization {record.get('organization_id')}"
+        break
+    return export_graph(_organization_items(org_path, 'nodes'), _organization_items(org_path, 'links'),
+                        path, export_as, name)
+
+
+def export_organization_networks(org_path, output_dir, export_as, shard=0, shards=1, compress=False):
+    """
+    Export each network of an organization topology file to its own file.
+
+    Networks are spread over ``shards`` workers by their line in the file; each
+    worker only parses its own lines and holds one network at a time.
+
+    Args:
+        org_path (str): File written by build_organization_topology()
+        output_dir (str): Directory for the ``<network_id>.<format>`` files
+        export_as (str): Format
+        shard (int): This worker's share, 0 to shards - 1
+        shards (int): Number of workers
+        compress (bool): Gzip the files
+
+    Returns:
+        list: One ``{'path', 'format', 'nodes', 'links'}`` per network
+    """
+    opener = gzip.open if str(org_path).endswith('.gz') else open
+    suffix = EXPORT_SUFFIXES[export_as] + ('.gz' if compress else '')
+    results = []
+    with opener(org_path, 'rt', encoding='utf-8') as f:
+        for line_number, line in enumerate(f):
+            if line_number % shards != shard or not line.startswith('{"kind":"network"'):
+                continue
+            record = json.loads(line)
+            results.append(export_graph(record['nodes'], record['links'],
+                                        Path(output_dir) / f"{record['network_id']}{suffix}", export_as,
+                                        record.get('network_name') or record['network_id']))
+    return results
+
+
+def main():
+    """Export topologies from the command line"""
+    parser = argparse.ArgumentParser(description='Export Meraki topologies as GraphML, GEXF, DOT or JSON')
+    parser.add_argument('scope', choices=['network', 'org'], help='Export one network or a whole organization')
+    parser.add_argument('id', help='Network or organization ID')
+    parser.add_argument('-o', '--output', required=True,
+                        help='Output file, or directory with --format or --split')
+    parser.add_argument('--format', nargs='+', choices=sorted(EXPORT_WRITERS), dest='formats',
+                        help='Formats to write (default: from the output file name; required with --split)')
+    parser.add_argument('--gzip', action='store_true', help='Gzip the output files')
+    parser.add_argument('--split', action='store_true', help='One file per network (org only)')
+    parser.add_argument('--from-file', help='Organization topology file to export instead of fetching one')
+    parser.add_argument('--processes', type=int, default=None, help='Worker processes (default: one per CPU)')
+    parser.add_argument('--api-key', default=os.getenv('MERAKI_DASHBOARD_API_KEY'),
+                        help='Meraki API key (default: MERAKI_DASHBOARD_API_KEY)')
+    args = parser.parse_args()
+    if not args.from_file and not args.api_key:
+        parser.error('an API key is required (--api-key or MERAKI_DASHBOARD_API_KEY)')
+    if args.split and args.scope != 'org':
+        parser.error('--split only applies to an organization')
+    if args.split and not args.formats:
+        parser.error('--split writes a directory per format; choose them with --format')
+    output = Path(args.output)
+    try:
+        formats = args.formats or [export_format(output)]
+    except ValueError as e:
+        parser.error(str(e))
+    logging.disable(logging.INFO)
+
+    suffix = '.gz' if args.gzip else ''
+    if args.scope == 'network':
+        from modules.meraki.meraki_api import get_network_topology
+        topology = get_network_topology(args.api_key, args.id)
+        for export_as in formats:
+            path = output / f"{args.id}{EXPORT_SUFFIXES[export_as]}{suffix}" if args.formats else \
+                Path(f"{output}{suffix}" if args.gzip and output.suffix != '.gz' else output)
+            print(json.dumps(export_topology(topology, path, export_as)))
+        return 0
+
+    org_path = args.from_file
+    if not org_path:
+        from modules.meraki.org_topology import build_organization_topology
+        org_path = build_organization_topology(args.api_key, args.id)['path']
+
+    # Every output file is its own job, and each job streams the organization file itself
+    processes = args.processes or os.cpu_count() or 1
+    # Spawned workers start with logging enabled, so quiet them like this process
+    with ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context('spawn'),
+                             initializer=logging.disable, initargs=(logging.INFO,)) as pool:
+        if args.split:
+            shards = max(1, processes // len(formats))
+            futures = [pool.submit(export_organization_networks, org_path, output / export_as, export_as, shard,
+                                   shards, args.gzip)
+                       for export_as in formats for shard in range(shards)]
+        else:
+            futures = [pool.submit(export_organization, org_path,
+                                   output / f"{args.id}{EXPORT_SUFFIXES[export_as]}{suffix}" if args.formats
+                                   else Path(f"{output}{suffix}" if args.gzip and output.suffix != '.gz'
+                                             else output), export_as)
+                       for export_as in formats]
+        failed = 0
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                logging.error(f"Export failed: {str(e)}")
+                print(f"Export failed: {str(e)}", file=sys.stderr)
+                failed += 1
+                continue
+            for item in result if isinstance(result, list) else [result]:
+                print(json.dumps(item))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
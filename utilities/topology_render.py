@@ -0,0 +1,431 @@
+"""
+Topology Render Module
+
+This module draws topologies as images without a browser, for reports built on
+headless machines. Nodes are placed with the same precomputed layout as the
+interactive page (see get_topology_layout()), and large networks have their
+clients clustered the same way.
+
+The drawing is produced as a stream of shapes: edges first, then nodes and
+their labels, then a legend. The SVG writer writes each shape as it comes,
+and the PNG painter draws it with Pillow when Pillow is installed. Without
+Pillow only the SVG is written.
+
+From the command line, render one network, or every network of an
+organization with one worker process per share of the networks:
+
+    python -m utilities.topology_render network L_123 -o site.svg --png
+    python -m utilities.topology_render org 123456 -o reports/topology --png --processes 8
+"""
+
+import argparse
+import gzip
+import json
+import logging
+import math
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+from modules.meraki.topology_graph import TopologyGraph
+from utilities.topology_export import _BufferedWriter
+from utilities.topology_visualizer import (
+    CONNECTION_STYLES, _resolve_cluster_mode, cluster_clients, create_vis_network_data,
+    get_topology_layout
+)
+
+# Fill and border colors per node group, as on the interactive page
+NODE_COLORS = {
+    'security_appliance': ('#9C27B0', '#7B1FA2'),
+    'appliance': ('#9C27B0', '#7B1FA2'),
+    'gateway': ('#9C27B0', '#7B1FA2'),
+    'switch': ('#4CAF50', '#2E7D32'),
+    'wireless': ('#FF9800', '#F57C00'),
+    'client': ('#2196F3', '#1976D2'),
+    'unknown': ('#9E9E9E', '#616161')
+}
+
+# Node radius per group, in layout units
+NODE_RADIUS = {'security_appliance': 22, 'appliance': 22, 'gateway': 22, 'switch': 18, 'wireless': 16, 'client': 7}
+DEFAULT_NODE_RADIUS = 14
+
+# Page and text colors
+RENDER_BACKGROUND = '#ffffff'
+RENDER_TEXT_COLOR = '#212121'
+
+# Space around the drawing, in layout units
+RENDER_MARGIN = 80
+
+# Client labels are left out of drawings with more nodes than this
+CLIENT_LABEL_LIMIT = 1000
+
+# PNG images are scaled down so neither side exceeds this many pixels
+MAX_PNG_SIZE = 8192
+
+# Dash and gap lengths of dashed edges
+EDGE_DASH = (6, 4)
+
+
+def render_layout(topology_data, network_name=None, cluster_by='auto'):
+    """
+    Lay out a topology the way the interactive page does.
+
+    Args:
+        topology_data (dict or TopologyGraph): Network topology data with nodes and links
+        network_name (str, optional): Name the layout is cached under
+        cluster_by (str, optional): Client clustering (see generate_topology_html())
+
+    Returns:
+        tuple: (vis_nodes, vis_edges) as made by create_vis_network_data(), with positions
+    """
+    if isinstance(topology_data, TopologyGraph):
+        topology_data = topology_data.to_topology()
+    network_name = network_name or topology_data.get('network_name') or "Unknown Network"
+    cluster_by = _resolve_cluster_mode(topology_data, cluster_by)
+    if cluster_by:
+        topology_data, _ = cluster_clients(topology_data, cluster_by)
+    positions = get_topology_layout(topology_data, network_name)
+    vis_data = create_vis_network_data(topology_data, positions)
+    return vis_data['nodes'], vis_data['edges']
+
+
+def _node_radius(vis_node):
+    if vis_node.get('count'):
+        return 10 + min(20, 3 * math.log2(vis_node['count'] + 1))
+    return NODE_RADIUS.get(vis_node.get('group'), DEFAULT_NODE_RADIUS)
+
+
+def _node_label(vis_node):
+    label = str(vis_node.get('label', vis_node['id']))
+    return label if len(label) <= 32 else f"{label[:31]}…"
+
+
+def _drawing_bounds(vis_nodes):
+    """Left, top, width and height of the drawing, margin included"""
+    xs = [node.get('x', 0) for node in vis_nodes] or [0]
+    ys = [node.get('y', 0) for node in vis_nodes] or [0]
+    left, top = min(xs) - RENDER_MARGIN, min(ys) - RENDER_MARGIN
+    width = max(xs) - left + RENDER_MARGIN
+    # Room for the title and legend above the nodes
+    top -= 40 + 18 * len(CONNECTION_STYLES)
+    return left, top, max(width, 400), max(ys) - top + RENDER_MARGIN
+
+
+def topology_shapes(vis_nodes, vis_edges, title=None):
+    """
+    Turn a laid-out topology into shapes, in drawing order.
+
+    Args:
+        vis_nodes (list): Compact vis.js nodes with 'x' and 'y'
+        vis_edges (list): Compact vis.js edges
+        title (str, optional): Text drawn at the top left
+
+    Yields:
+        tuple: One of ``('line', x1, y1, x2, y2, color, width, dashed)``,
+        ``('circle', x, y, radius, fill, border)`` or
+        ``('text', x, y, text, size, color, anchor)`` where anchor is 'start' or 'middle'
+    """
+    left, top, _, _ = _drawing_bounds(vis_nodes)
+    positions = {node['id']: (node.get('x', 0), node.get('y', 0)) for node in vis_nodes}
+    for edge in vis_edges:
+        start, end = positions.get(edge['from']), positions.get(edge['to'])
+        if start is None or end is None:
+            continue
+        style = CONNECTION_STYLES.get(edge.get('type'), CONNECTION_STYLES['unknown'])
+        yield 'line', start[0], start[1], end[0], end[1], style['color'], style['width'], style['dashes']
+
+    label_clients = len(vis_nodes) <= CLIENT_LABEL_LIMIT
+    for node in vis_nodes:
+        x, y = positions[node['id']]
+        radius = _node_radius(node)
+        fill, border = NODE_COLORS.get(node.get('group'), NODE_COLORS['unknown'])
+        yield 'circle', x, y, radius, fill, border
+        if node.get('group') != 'client' or node.get('count') or label_clients:
+            yield 'text', x, y + radius + 12, _node_label(node), 9 if node.get('group') == 'client' else 11, \
+                RENDER_TEXT_COLOR, 'middle'
+
+    x, y = left + 20, top + 28
+    if title:
+        yield 'text', x, y, str(title), 18, RENDER_TEXT_COLOR, 'start'
+    used = {edge.get('type') for edge in vis_edges}
+    for link_type, style in CONNECTION_STYLES.items():
+        if link_type not in used:
+            continue
+        y += 18
+        yield 'line', x, y - 4, x + 30, y - 4, style['color'], style['width'], style['dashes']
+        yield 'text', x + 38, y, style['label'], 11, RENDER_TEXT_COLOR, 'start'
+
+
+def write_topology_svg(out, vis_nodes, vis_edges, title=None):
+    """
+    Write a laid-out topology as SVG, one shape at a time.
+
+    Args:
+        out: Text stream to write to
+        vis_nodes (list): Compact vis.js nodes with 'x' and 'y'
+        vis_edges (list): Compact vis.js edges
+        title (str, optional): Text drawn at the top left
+
+    Returns:
+        tuple: (width, height) of the drawing
+    """
+    left, top, width, height = _drawing_bounds(vis_nodes)
+    writer = _BufferedWriter(out)
+    writer.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                 f'<svg xmlns="http://www.w3.org/2000/svg" width="{width:.0f}" height="{height:.0f}" '
+                 f'viewBox="{left:.1f} {top:.1f} {width:.1f} {height:.1f}" '
+                 'font-family="Segoe UI, Helvetica, Arial, sans-serif">\n')
+    if title:
+        writer.write(f'<title>{escape(str(title))}</title>\n')
+    writer.write(f'<rect x="{left:.1f}" y="{top:.1f}" width="{width:.1f}" height="{height:.1f}" '
+                 f'fill="{RENDER_BACKGROUND}"/>\n')
+    dash = ' stroke-dasharray="{}"'.format(','.join(str(length) for length in EDGE_DASH))
+    for shape in topology_shapes(vis_nodes, vis_edges, title):
+        kind = shape[0]
+        if kind == 'line':
+            _, x1, y1, x2, y2, color, line_width, dashed = shape
+            writer.write(f'<line x1="{x1:.1f}" y1="{y1:.1f}" x2="{x2:.1f}" y2="{y2:.1f}" stroke="{color}" '
+                         f'stroke-width="{line_width}"{dash if dashed else ""}/>\n')
+        elif kind == 'circle':
+            _, x, y, radius, fill, border = shape
+            writer.write(f'<circle cx="{x:.1f}" cy="{y:.1f}" r="{radius:.1f}" fill="{fill}" stroke="{border}" '
+                         'stroke-width="2"/>\n')
+        else:
+            _, x, y, text, size, color, anchor = shape
+            writer.write(f'<text x="{x:.1f}" y="{y:.1f}" font-size="{size}" fill="{color}" '
+                         f'text-anchor="{anchor}">{escape(text)}</text>\n')
+    writer.write('</svg>\n')
+    writer.flush()
+    return width, height
+
+
+def _load_font(image_font, size):
+    try:
+        return image_font.load_default(size=size)
+    except TypeError:
+        # Pillow before 10.1 has a single bitmap font
+        return image_font.load_default()
+
+
+def draw_topology_png(path, vis_nodes, vis_edges, title=None, scale=1.0):
+    """
+    Draw a laid-out topology as a PNG image with Pillow.
+
+    Args:
+        path (str): Output file
+        vis_nodes (list): Compact vis.js nodes with 'x' and 'y'
+        vis_edges (list): Compact vis.js edges
+        title (str, optional): Text drawn at the top left
+        scale (float): Pixels per layout unit, lowered to fit MAX_PNG_SIZE
+
+    Returns:
+        tuple: (width, height) in pixels, or None when Pillow isn't installed
+    """
+    try:
+        from PIL import Image, ImageDraw, ImageFont
+    except ImportError:
+        logging.warning("Pillow is not installed; skipping the PNG rendering")
+        return None
+
+    left, top, width, height = _drawing_bounds(vis_nodes)
+    scale = min(scale, MAX_PNG_SIZE / width, MAX_PNG_SIZE / height)
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    image = Image.new('RGB', size, RENDER_BACKGROUND)
+    draw = ImageDraw.Draw(image)
+    fonts = {}
+
+    def point(x, y):
+        return (x - left) * scale, (y - top) * scale
+
+    for shape in topology_shapes(vis_nodes, vis_edges, title):
+        kind = shape[0]
+        if kind == 'line':
+            _, x1, y1, x2, y2, color, line_width, dashed = shape
+            (x1, y1), (x2, y2) = point(x1, y1), point(x2, y2)
+            line_width = max(1, round(line_width * scale))
+            if not dashed:
+                draw.line((x1, y1, x2, y2), fill=color, width=line_width)
+                continue
+            # Pillow has no dashed lines, so draw the dashes one by one
+            length = math.hypot(x2 - x1, y2 - y1)
+            dash, gap = (max(1.0, value * scale) for value in EDGE_DASH)
+            position = 0.0
+            while position < length:
+                end = min(position + dash, length)
+                draw.line((x1 + (x2 - x1) * position / length, y1 + (y2 - y1) * position / length,
+                           x1 + (x2 - x1) * end / length, y1 + (y2 - y1) * end / length),
+                          fill=color, width=line_width)
+                position = end + gap
+        elif kind == 'circle':
+            _, x, y, radius, fill, border = shape
+            x, y = point(x, y)
+            radius *= scale
+            draw.ellipse((x - radius, y - radius, x + radius, y + radius), fill=fill, outline=border,
+                         width=max(1, round(2 * scale)))
+        else:
+            _, x, y, text, font_size, color, anchor = shape
+            font_size = max(6, round(font_size * scale))
+            if font_size not in fonts:
+                fonts[font_size] = _load_font(ImageFont, font_size)
+            # SVG text sits on its baseline; 'ls' and 'ms' anchor Pillow text the same way
+            draw.text(point(x, y), text, fill=color, font=fonts[font_size],
+                      anchor='ms' if anchor == 'middle' else 'ls')
+
+    os.makedirs(Path(path).parent, exist_ok=True)
+    temporary = Path(path).with_name(f"{Path(path).name}.{os.getpid()}.tmp")
+    try:
+        image.save(temporary, format='PNG', optimize=True)
+        os.replace(temporary, path)
+    finally:
+        if temporary.exists():
+            temporary.unlink()
+    return size
+
+
+def render_topology(topology_data, output_path, network_name=None, png=False, cluster_by='auto'):
+    """
+    Render a topology to an SVG file, and optionally a PNG next to it.
+
+    Args:
+        topology_data (dict or TopologyGraph): Network topology data with nodes and links
+        output_path (str): SVG file to write
+        network_name (str, optional): Name of the network, used as the title
+        png (bool): Also write a PNG with the same name, when Pillow is installed
+        cluster_by (str, optional): Client clustering (see generate_topology_html())
+
+    Returns:
+        dict: ``{'svg': path, 'png': path or None, 'nodes': n, 'edges': n}``
+    """
+    if isinstance(topology_data, TopologyGraph):
+        topology_data = topology_data.to_topology()
+    network_name = network_name or topology_data.get('network_name') or "Unknown Network"
+    vis_nodes, vis_edges = render_layout(topology_data, network_name, cluster_by)
+
+    output_path = Path(output_path)
+    os.makedirs(output_path.parent, exist_ok=True)
+    temporary = output_path.with_name(f"{output_path.name}.{os.getpid()}.tmp")
+    try:
+        with open(temporary, 'w', encoding='utf-8') as out:
+            write_topology_svg(out, vis_nodes, vis_edges, network_name)
+        os.replace(temporary, output_path)
+    finally:
+        if temporary.exists():
+            temporary.unlink()
+
+    png_path = None
+    if png:
+        png_path = output_path.with_suffix('.png')
+        if draw_topology_png(png_path, vis_nodes, vis_edges, network_name) is None:
+            png_path = None
+    logging.info(f"Rendered {len(vis_nodes)} nodes and {len(vis_edges)} edges of {network_name} to {output_path}")
+    return {'svg': str(output_path), 'png': str(png_path) if png_path else None, 'nodes': len(vis_nodes),
+            'edges': len(vis_edges)}
+
+
+def render_organization_networks(org_path, output_dir, png=False, shard=0, shards=1, cluster_by='auto'):
+    """
+    Render each network of an organization topology file to its own image.
+
+    Networks are spread over ``shards`` workers by their line in the file; each
+    worker only parses its own lines and holds one network at a time.
+
+    Args:
+        org_path (str): File written by build_organization_topology()
+        output_dir (str): Directory for the ``<network_id>.svg`` files
+        png (bool): Also write ``<network_id>.png`` files
+        shard (int): This worker's share, 0 to shards - 1
+        shards (int): Number of workers
+        cluster_by (str, optional): Client clustering (see generate_topology_html())
+
+    Returns:
+        list: One render_topology() result per network, with its 'network_id'
+    """
+    opener = gzip.open if str(org_path).endswith('.gz') else open
+    results = []
+    with opener(org_path, 'rt', encoding='utf-8') as f:
+        for line_number, line in enumerate(f):
+            if line_number % shards != shard or not line.startswith('{"kind":"network"'):
+                continue
+            record = json.loads(line)
+            name = record.get('network_name') or record['network_id']
+            try:
+                result = render_topology({'network_name': name, 'network_id': record['network_id'],
+                                          'nodes': record['nodes'], 'links': record['links']},
+                                         Path(output_dir) / f"{record['network_id']}.svg", name, png, cluster_by)
+            except Exception as e:
+                logging.error(f"Could not render network {record['network_id']}: {str(e)}")
+                result = {'svg': None, 'png': None, 'error': str(e)}
+            results.append(dict(result, network_id=record['network_id']))
+    return results
+
+
+def render_organization(org_path, output_dir, png=False, processes=None, cluster_by='auto'):
+    """
+    Render every network of an organization topology file in parallel.
+
+    Args:
+        org_path (str): File written by build_organization_topology()
+        output_dir (str): Directory for the images
+        png (bool): Also write PNG images
+        processes (int, optional): Worker processes, one per CPU by default
+        cluster_by (str, optional): Client clustering (see generate_topology_html())
+
+    Returns:
+        list: One result per network (see render_organization_networks())
+    """
+    processes = processes or os.cpu_count() or 1
+    results = []
+    # Spawned like the organization builder's workers, so no API threads are forked,
+    # and given this process's logging.disable() level, which spawning doesn't carry over
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=processes, mp_context=context, initializer=logging.disable,
+                             initargs=(logging.root.manager.disable,)) as pool:
+        futures = [pool.submit(render_organization_networks, str(org_path), str(output_dir), png, shard, processes,
+                               cluster_by) for shard in range(processes)]
+        for future in as_completed(futures):
+            results.extend(future.result())
+    failed = sum(1 for result in results if result.get('error'))
+    logging.info(f"Rendered {len(results) - failed} of {len(results)} networks to {output_dir}")
+    return results
+
+
+def main():
+    """Render topologies from the command line"""
+    parser = argparse.ArgumentParser(description='Render Meraki topologies as SVG and PNG images without a browser')
+    parser.add_argument('scope', choices=['network', 'org'], help='Render one network or every network of an organization')
+    parser.add_argument('id', help='Network or organization ID')
+    parser.add_argument('-o', '--output', required=True, help='SVG file for a network, directory for an organization')
+    parser.add_argument('--png', action='store_true', help='Also write PNG images (needs Pillow)')
+    parser.add_argument('--cluster-by', default='auto', choices=['auto', 'device', 'port', 'vlan', 'none'],
+                        help='Collapse clients into clusters (default: auto)')
+    parser.add_argument('--from-file', help='Organization topology file to render instead of fetching one')
+    parser.add_argument('--processes', type=int, default=None, help='Worker processes (default: one per CPU)')
+    parser.add_argument('--api-key', default=os.getenv('MERAKI_DASHBOARD_API_KEY'),
+                        help='Meraki API key (default: MERAKI_DASHBOARD_API_KEY)')
+    args = parser.parse_args()
+    if not args.from_file and not args.api_key:
+        parser.error('an API key is required (--api-key or MERAKI_DASHBOARD_API_KEY)')
+    logging.disable(logging.INFO)
+    cluster_by = None if args.cluster_by == 'none' else args.cluster_by
+
+    if args.scope == 'network':
+        from modules.meraki.meraki_api import get_network_topology
+        topology = get_network_topology(args.api_key, args.id)
+        print(json.dumps(render_topology(topology, args.output, png=args.png, cluster_by=cluster_by)))
+        return 0
+
+    org_path = args.from_file
+    if not org_path:
+        from modules.meraki.org_topology import build_organization_topology
+        org_path = build_organization_topology(args.api_key, args.id)['path']
+    results = render_organization(org_path, args.output, args.png, args.processes, cluster_by)
+    for result in results:
+        print(json.dumps(result))
+    return 1 if any(result.get('error') for result in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,356 @@
+"""
+Topology Tiles Module
+
+This module serves very large topologies a viewport at a time. Node positions
+come from the precomputed layout and are indexed in a quadtree. The plane is
+cut into square tiles, 2^z by 2^z at zoom level z, and a tile holds the nodes
+inside it plus the edges that reach them. The browser only fetches the tiles
+covering its viewport.
+
+Each zoom level has its own level of detail. A tile shows at most
+TILE_CAPACITY nodes, picked by importance: appliances first, then switches,
+access points, other devices and finally clients, and better-connected nodes
+first within each type. The remaining nodes of the tile are drawn as one
+summary node, and their edges are rerouted to it. A node visible at one zoom
+level stays visible at every level above it.
+
+Tiles are built on first request and kept in an LRU cache. A new topology
+version builds a new TopologyTiles, so cached tiles never go stale.
+"""
+
+import gzip
+import json
+import math
+import threading
+from array import array
+from collections import OrderedDict
+
+from modules.meraki.topology_diff import link_keys
+from utilities.topology_visualizer import (
+    DEVICE_ICONS, _pack_vis_data, create_vis_network_data, get_topology_layout
+)
+
+# Most nodes a tile shows before summarizing the rest
+TILE_CAPACITY = 400
+
+# Deepest zoom level; tiles there show every node even past TILE_CAPACITY
+MAX_TILE_ZOOM = 12
+
+# Tiles kept in memory per topology version
+TILE_CACHE_SIZE = 512
+
+# On-screen size of a tile the page aims for when picking a zoom level
+TILE_PIXELS = 512
+
+# Quadtree leaves split above this many points
+QUADTREE_BUCKET = 64
+
+# Order in which node types become visible
+TYPE_IMPORTANCE = {'security_appliance': 0, 'appliance': 0, 'gateway': 0, 'switch': 1, 'wireless': 2,
+                   'client_cluster': 4, 'client': 5}
+DEFAULT_TYPE_IMPORTANCE = 3
+
+
+class QuadTree:
+    """
+    Point quadtree over node positions.
+
+    Points are stored in flat coordinate arrays and leaves hold point indices,
+    so a rectangle query only visits the cells that overlap it.
+    """
+
+    def __init__(self, xs, ys, bounds, bucket=QUADTREE_BUCKET, max_depth=MAX_TILE_ZOOM + 8):
+        """
+        Build the tree.
+
+        Args:
+            xs (array): X coordinates
+            ys (array): Y coordinates
+            bounds (tuple): (left, top, size) of the square to index; points
+                outside it are left out
+            bucket (int): Points a leaf holds before it splits
+            max_depth (int): Depth at which leaves stop splitting
+        """
+        self.xs = xs
+        self.ys = ys
+        self.bounds = bounds
+        left, top, size = bounds
+        inside = [i for i in range(len(xs)) if left <= xs[i] < left + size and top <= ys[i] < top + size]
+        # A cell is (left, top, size, children or None, point indices or None)
+        self.root = self._build(left, top, size, inside, bucket, max_depth)
+
+    def _build(self, left, top, size, points, bucket, max_depth):
+        root = [left, top, size, None, points]
+        stack = [(root, 0)]
+        while stack:
+            cell, depth = stack.pop()
+            points = cell[4]
+            if len(points) <= bucket or depth >= max_depth:
+                continue
+            half = cell[2] / 2
+            middle_x, middle_y = cell[0] + half, cell[1] + half
+            quarters = ([], [], [], [])
+            for i in points:
+                quarters[(self.xs[i] >= middle_x) + 2 * (self.ys[i] >= middle_y)].append(i)
+            cell[3] = [[cell[0] + half * (k & 1), cell[1] + half * (k >> 1), half, None, quarter]
+                       for k, quarter in enumerate(quarters)]
+            cell[4] = None
+            stack.extend((child, depth + 1) for child in cell[3])
+        return root
+
+    def query(self, left, top, right, bottom):
+        """
+        Find the points in a rectangle, including its top and left edges.
+
+        Returns:
+            list: Point indices
+        """
+        found = []
+        stack = [self.root]
+        while stack:
+            cell_left, cell_top, size, children, points = stack.pop()
+            if cell_left >= right or cell_top >= bottom or cell_left + size <= left or cell_top + size <= top:
+                continue
+            if children is not None:
+                stack.extend(children)
+            elif cell_left >= left and cell_top >= top and cell_left + size <= right and cell_top + size <= bottom:
+                found.extend(points)
+            else:
+                found.extend(i for i in points
+                             if left <= self.xs[i] < right and top <= self.ys[i] < bottom)
+        return found
+
+
+class TopologyTiles:
+    """Level-of-detail tiles over a laid-out topology"""
+
+    def __init__(self, vis_nodes, vis_edges, version=0, capacity=TILE_CAPACITY, cache_size=TILE_CACHE_SIZE):
+        """
+        Index a topology for tiling.
+
+        Args:
+            vis_nodes (list): Compact vis.js nodes with 'x' and 'y' (see create_vis_network_data())
+            vis_edges (list): Compact vis.js edges
+            version (int): Topology version, echoed in every tile
+            capacity (int): Most nodes a tile shows before summarizing the rest
+            cache_size (int): Tiles kept in memory
+        """
+        self.version = version
+        self.capacity = capacity
+        self.cache_size = cache_size
+        self.nodes = vis_nodes
+        self.edges = vis_edges
+        self.edge_ids = link_keys(vis_edges, 'from', 'to')
+        self.index = {node['id']: i for i, node in enumerate(vis_nodes)}
+        self.xs = array('d', (node.get('x', 0) for node in vis_nodes))
+        self.ys = array('d', (node.get('y', 0) for node in vis_nodes))
+
+        count = len(vis_nodes)
+        self.incident = [[] for _ in range(count)]
+        degree = array('i', bytes(4 * count))
+        for k, edge in enumerate(vis_edges):
+            source, target = self.index.get(edge['from']), self.index.get(edge['to'])
+            if source is None or target is None or source == target:
+                continue
+            self.incident[source].append(k)
+            self.incident[target].append(k)
+            degree[source] += 1
+            degree[target] += 1
+
+        # A square around every node, padded so the far edge is inside the half-open tiles
+        if count:
+            self.extent = (min(self.xs), min(self.ys), max(self.xs), max(self.ys))
+        else:
+            self.extent = (0, 0, 0, 0)
+        left, top, right, bottom = self.extent
+        self.bounds = (left, top, max(right - left, bottom - top, 1) * 1.001 + 1)
+        self.tree = QuadTree(self.xs, self.ys, self.bounds)
+
+        order = sorted(range(count), key=lambda i: (self._importance(vis_nodes[i]), -degree[i], i))
+        self.max_zoom, self.min_zoom = self._levels(order)
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_topology(cls, topology_data, network_name=None, version=0, **kwargs):
+        """
+        Lay out a topology and index it for tiling.
+
+        Args:
+            topology_data (dict): Network topology data with nodes and links
+            network_name (str, optional): Name the layout is cached under
+            version (int): Topology version
+            **kwargs: Passed to TopologyTiles()
+
+        Returns:
+            TopologyTiles: The tiles
+        """
+        positions = get_topology_layout(topology_data, network_name or topology_data.get('network_name'))
+        vis_data = create_vis_network_data(topology_data, positions)
+        return cls(vis_data['nodes'], vis_data['edges'], version, **kwargs)
+
+    @staticmethod
+    def _importance(vis_node):
+        if vis_node.get('count'):
+            return TYPE_IMPORTANCE['client_cluster']
+        return TYPE_IMPORTANCE.get(vis_node.get('group'), DEFAULT_TYPE_IMPORTANCE)
+
+    def _cell(self, i, zoom):
+        left, top, size = self.bounds
+        cells = 1 << zoom
+        return (min(cells - 1, int((self.xs[i] - left) / size * cells)),
+                min(cells - 1, int((self.ys[i] - top) / size * cells)))
+
+    def _levels(self, order):
+        """Zoom level at which each node becomes visible, and the deepest level needed"""
+        left, top, size = self.bounds
+        # Positions as fractions of the square, so a node's tile is a multiply away
+        fx = [(self.xs[i] - left) / size for i in order]
+        fy = [(self.ys[i] - top) / size for i in order]
+        min_zoom = array('b', [MAX_TILE_ZOOM]) * len(order)
+        for zoom in range(MAX_TILE_ZOOM + 1):
+            # The most important nodes of each tile are visible. Those of a tile are
+            # among the most important of its quarters too, so visibility only grows.
+            cells = 1 << zoom
+            counts = {}
+            crowded = False
+            for position, i in enumerate(order):
+                cell = (int(fx[position] * cells), int(fy[position] * cells))
+                seen = counts.get(cell, 0)
+                if seen < self.capacity:
+                    counts[cell] = seen + 1
+                    if min_zoom[i] > zoom:
+                        min_zoom[i] = zoom
+                else:
+                    crowded = True
+            if not crowded:
+                return zoom, min_zoom
+        return MAX_TILE_ZOOM, min_zoom
+
+    def meta(self):
+        """
+        Describe the tiling for the page.
+
+        Returns:
+            dict: ``{'version', 'bounds': [left, top, size], 'extent': [left, top,
+            right, bottom], 'maxZoom', 'tilePixels', 'nodes', 'edges'}``
+        """
+        return {'version': self.version, 'bounds': list(self.bounds), 'extent': list(self.extent),
+                'maxZoom': self.max_zoom, 'tilePixels': TILE_PIXELS, 'nodes': len(self.nodes),
+                'edges': len(self.edges)}
+
+    def _summary_id(self, zoom, cell):
+        return f"tile:{zoom}/{cell[0]}/{cell[1]}"
+
+    def _tile_key(self, zoom, x, y):
+        """Check a tile's coordinates, raising ValueError when there is no such tile"""
+        zoom, x, y = int(zoom), int(x), int(y)
+        if not 0 <= zoom <= self.max_zoom:
+            raise ValueError(f"Zoom level {zoom} is outside 0 to {self.max_zoom}")
+        cells = 1 << zoom
+        if not (0 <= x < cells and 0 <= y < cells):
+            raise ValueError(f"Tile {zoom}/{x}/{y} is outside the topology")
+        return zoom, x, y
+
+    def tile(self, zoom, x, y):
+        """
+        Build one tile.
+
+        Args:
+            zoom (int): Zoom level, 0 to max_zoom
+            x (int): Tile column, 0 to 2^zoom - 1
+            y (int): Tile row, 0 to 2^zoom - 1
+
+        Returns:
+            dict: Packed nodes and edges as written by _pack_vis_data(), with
+            edge IDs under edges['id'] and the tile's 'version', 'zoom', 'x' and 'y'
+
+        Raises:
+            ValueError: If there is no such tile
+        """
+        zoom, x, y = self._tile_key(zoom, x, y)
+        left, top, size = self.bounds
+        cells = 1 << zoom
+        step = size / cells
+        members = self.tree.query(left + x * step, top + y * step, left + (x + 1) * step, top + (y + 1) * step)
+        visible = [i for i in members if self.min_zoom[i] <= zoom]
+        hidden = [i for i in members if self.min_zoom[i] > zoom]
+        summary_id = self._summary_id(zoom, (x, y))
+
+        def represent(i):
+            return self.nodes[i]['id'] if self.min_zoom[i] <= zoom else self._summary_id(zoom, self._cell(i, zoom))
+
+        tile_nodes = [self.nodes[i] for i in visible]
+        if hidden:
+            tile_nodes.append(self._summary_node(summary_id, hidden))
+
+        tile_edges = []
+        edge_ids = []
+        seen = set()
+        for i in visible + hidden:
+            own = represent(i)
+            for k in self.incident[i]:
+                edge = self.edges[k]
+                other = self.index[edge['to'] if self.nodes[i]['id'] == edge['from'] else edge['from']]
+                other_id = represent(other)
+                if other_id == own:
+                    continue
+                if own == self.nodes[i]['id'] and other_id == self.nodes[other]['id']:
+                    edge_id = self.edge_ids[k]
+                else:
+                    # Rerouted to a summary node; one edge per pair of ends
+                    a, b = str(own), str(other_id)
+                    edge_id = f"{a}|{b}" if a <= b else f"{b}|{a}"
+                    edge = {'from': own, 'to': other_id, 'type': edge['type'], 'label': ''}
+                if edge_id in seen:
+                    continue
+                seen.add(edge_id)
+                tile_edges.append(edge)
+                edge_ids.append(edge_id)
+
+        packed = _pack_vis_data(tile_nodes, tile_edges)
+        packed['edges']['id'] = edge_ids
+        return dict(packed, version=self.version, zoom=zoom, x=x, y=y)
+
+    def _summary_node(self, summary_id, hidden):
+        """A node standing for a tile's hidden nodes, at their centroid"""
+        groups = {}
+        for i in hidden:
+            group = self.nodes[i].get('group', 'unknown')
+            groups[group] = groups.get(group, 0) + self.nodes[i].get('count', 1)
+        total = sum(groups.values())
+        types = ', '.join(f"{group} ({count})" for group, count in sorted(groups.items(), key=lambda item: -item[1]))
+        return {
+            'id': summary_id,
+            'label': f"+{total}",
+            'group': 'client' if set(groups) == {'client'} else 'unknown',
+            'icon': DEVICE_ICONS['client'],
+            'info': [str(total), types],
+            'size': 20 + min(30, round(4 * math.log2(total + 1))),
+            'summary': 1,
+            'x': round(sum(self.xs[i] for i in hidden) / len(hidden)),
+            'y': round(sum(self.ys[i] for i in hidden) / len(hidden))
+        }
+
+    def tile_gzip(self, zoom, x, y):
+        """
+        Get a tile as gzip-compressed JSON, from the cache when it was built before.
+
+        Returns:
+            bytes: The compressed tile
+
+        Raises:
+            ValueError: If there is no such tile
+        """
+        key = self._tile_key(zoom, x, y)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return cached
+        payload = gzip.compress(json.dumps(self.tile(*key), separators=(',', ':')).encode('utf-8'), 6)
+        with self._lock:
+            self._cache[key] = payload
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return payload
@@ -3,15 +3,44 @@ Network Topology Visualization Module
 
 This module provides functions to visualize Meraki network topology
 with different device types and connection types.
+
+Node positions are computed server-side by a hierarchical layout seeded by
+device role (appliances, then switches, then access points and other devices,
+with each device's clients in a grid beneath it). The coordinates are embedded
+in the page with physics disabled, so large topologies render immediately
+instead of stabilizing in the browser, and are cached per network.
+
+Pages stay small: nodes and edges go to a separate data file in a columnar,
+string-interned form, styles are defined once per group and connection type,
+and vis.js is served from a local vendored copy instead of a CDN. When it
+can't be vendored (e.g. offline on the first run) or the copy fails to load,
+pages fall back to the CDN.
+
+Re-rendering a network only ships what changed: update_topology_html() diffs
+the topology against the page's last snapshot and appends the delta to an
+updates script that open pages poll and apply in place.
 """
 
 import os
 import json
+import gzip
+import hashlib
 import logging
+import math
+import shutil
 import webbrowser
+from collections import deque
 from pathlib import Path
 import uuid
 
+from modules.meraki.topology_builder import (
+    DeviceIndex, LinkSet, attribute_client, device_type, link_layer_edges, neighbour_edges
+)
+from modules.meraki.topology_diff import (
+    VOLATILE_FIELDS, TopologySnapshot, content_hash, delta_size, diff_topology, summarize_delta
+)
+from modules.meraki.topology_graph import TopologyGraph
+
 # Device type to icon mapping
 DEVICE_ICONS = {
     'switch': 'router',
@@ -39,35 +68,379 @@ CONNECTION_STYLES = {
     'unknown': {'color': '#9E9E9E', 'width': 1, 'dashes': True, 'label': 'Unknown Connection', 'highlight': '#9E9E9E', 'arrow': False}
 }
 
-def generate_topology_html(topology_data, network_name=None, output_path=None):
+# Layout tiers by node type: lower tiers are placed closer to the top
+ROLE_TIERS = {
+    'security_appliance': 0,
+    'appliance': 0,
+    'gateway': 0,
+    'switch': 1,
+    'wireless': 2
+}
+DEFAULT_DEVICE_TIER = 2
+
+# Layout spacing in vis.js canvas units
+DEVICE_SPACING = 160
+LEVEL_SPACING = 220
+CLIENT_SPACING = 60
+CLIENT_OFFSET = 110  # from a device down to the first row of its clients
+
+# Networks with more clients than this are drawn with clients collapsed into clusters
+CLUSTER_THRESHOLD = 500
+
+# Precomputed layouts, one file per network
+LAYOUT_CACHE_DIR = Path(os.path.expanduser("~")) / ".meraki_clu" / "layouts"
+
+# Node icons are referenced by name under this URL
+ICON_BASE_URL = "https://img.icons8.com/material/48/"
+
+# Tooltip rows per kind of node, in the order of each node's 'info' values
+TOOLTIP_FIELDS = {
+    'device': ['Model', 'Type', 'IP', 'MAC', 'Status'],
+    'client': ['Type', 'IP', 'MAC', 'VLAN', 'Status', 'Connected to', 'Switchport'],
+    'cluster': ['Online', 'Client types', 'VLANs'],
+    'summary': ['Nodes', 'Types']
+}
+
+# Open pages poll for deltas this often
+UPDATE_POLL_INTERVAL_MS = 5000
+# A page is rewritten in full once its pending deltas exceed this many or
+# touch more than this fraction of its elements
+MAX_DELTA_CHAIN = 20
+MAX_DELTA_FRACTION = 0.25
+# Node fields that don't make a node count as changed in an open page
+VIEW_IGNORED_FIELDS = VOLATILE_FIELDS | {'x', 'y'}
+
+# vis.js is downloaded once into the vendor directory and copied next to each page
+VIS_VERSION = "4.21.0"
+VIS_CDN_URL = f"https://cdnjs.cloudflare.com/ajax/libs/vis/{VIS_VERSION}"
+VIS_VENDOR_DIR = Path(os.path.expanduser("~")) / ".meraki_clu" / "vendor" / f"vis-{VIS_VERSION}"
+VIS_ASSETS = ('vis.min.js', 'vis.min.css')
+# Navigation button images referenced by vis.min.css; the page works without them
+VIS_IMAGES = tuple(f"img/network/{name}.png" for name in (
+    'acceptDeleteIcon', 'addNodeIcon', 'backIcon', 'connectIcon', 'cross', 'cross2', 'deleteIcon',
+    'downArrow', 'editIcon', 'leftArrow', 'minus', 'plus', 'rightArrow', 'upArrow', 'zoomExtends'))
+
+_vis_download_failed = False
+
+def vendor_vis_assets(download=True):
     """
-    Generate an HTML file to visualize network topology
+    Make sure vis.js is in the local vendor directory, downloading it once if needed
+    
+    Args:
+        download (bool): Whether to download missing files from the CDN
+        
+    Returns:
+        bool: True if the vendored vis.js files are available
+    """
+    global _vis_download_failed
+    missing = [name for name in VIS_ASSETS + VIS_IMAGES if not (VIS_VENDOR_DIR / name).exists()]
+    if not missing:
+        return True
+    if download and not _vis_download_failed:
+        for name in missing:
+            try:
+                import requests
+                response = requests.get(f"{VIS_CDN_URL}/{name}", timeout=10)
+                response.raise_for_status()
+                if not response.content:
+                    raise ValueError("empty response")
+                target = VIS_VENDOR_DIR / name
+                os.makedirs(target.parent, exist_ok=True)
+                temporary = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+                temporary.write_bytes(response.content)
+                os.replace(temporary, target)
+            except Exception as e:
+                # Offline, so don't try the remaining files again in this process
+                _vis_download_failed = True
+                if name in VIS_ASSETS:
+                    logging.warning(f"Could not download {name} for offline use, using the CDN: {str(e)}")
+                else:
+                    logging.debug(f"Could not download {name}: {str(e)}")
+                break
+    return all((VIS_VENDOR_DIR / name).exists() for name in VIS_ASSETS)
+
+def _vis_asset_urls(output_dir):
+    """
+    Copy the vendored vis.js next to a page
+    
+    Returns:
+        tuple: (script URL, stylesheet URL) relative to the page, or the CDN
+        URLs when vis.js isn't vendored
+    """
+    if not vendor_vis_assets():
+        return f"{VIS_CDN_URL}/vis.min.js", f"{VIS_CDN_URL}/vis.min.css"
+    target_dir = Path(output_dir) / "vendor" / f"vis-{VIS_VERSION}"
+    try:
+        for source in VIS_VENDOR_DIR.rglob('*'):
+            target = target_dir / source.relative_to(VIS_VENDOR_DIR)
+            if source.is_file() and (not target.exists() or target.stat().st_size != source.stat().st_size):
+                os.makedirs(target.parent, exist_ok=True)
+                shutil.copyfile(source, target)
+    except OSError as e:
+        logging.warning(f"Could not copy vis.js next to the page, using the CDN: {str(e)}")
+        return f"{VIS_CDN_URL}/vis.min.js", f"{VIS_CDN_URL}/vis.min.css"
+    relative = f"vendor/vis-{VIS_VERSION}"
+    return f"{relative}/vis.min.js", f"{relative}/vis.min.css"
+
+def compute_topology_layout(topology_data):
+    """
+    Compute node coordinates with a hierarchical layout seeded by device role
+    
+    Security appliances are the roots. Other devices hang below the device they
+    are linked to, found by a breadth-first walk over device-to-device links,
+    and each device's clients are placed in a grid beneath it. Sibling subtrees
+    get disjoint horizontal ranges, so nothing overlaps. Runs in linear time in
+    the number of nodes and links.
     
     Args:
         topology_data (dict): Network topology data with nodes and links
-        network_name (str, optional): Name of the network. If None, will use from topology_data.
-        output_path (str, optional): Path to save the HTML file. Defaults to None.
         
     Returns:
-        str: Path to the generated HTML file
+        dict: Node ID to (x, y) coordinates
+    """
+    nodes = {node['id']: node for node in topology_data.get('nodes', [])}
+    devices = [node_id for node_id, node in nodes.items() if node.get('type') != 'client']
+    tier = {node_id: ROLE_TIERS.get(nodes[node_id].get('type'), DEFAULT_DEVICE_TIER) for node_id in devices}
+    
+    device_neighbours = {node_id: [] for node_id in devices}
+    client_parent = {}
+    for link in topology_data.get('links', []):
+        source, target = link.get('source'), link.get('target')
+        if source not in nodes or target not in nodes:
+            continue
+        if source in device_neighbours and target in device_neighbours:
+            device_neighbours[source].append(target)
+            device_neighbours[target].append(source)
+        elif source in device_neighbours:
+            client_parent.setdefault(target, source)
+        elif target in device_neighbours:
+            client_parent.setdefault(source, target)
+    
+    def order(node_id):
+        return (tier[node_id], str(nodes[node_id].get('label', node_id)), str(node_id))
+    
+    # Spanning forest over the devices, rooted at the highest tier present
+    children = {node_id: [] for node_id in devices}
+    roots = []
+    visited = set()
+    for start in sorted(devices, key=order):
+        if start in visited:
+            continue
+        roots.append(start)
+        visited.add(start)
+        queue = deque([start])
+        while queue:
+            current = queue.popleft()
+            for neighbour in sorted(device_neighbours[current], key=order):
+                if neighbour not in visited:
+                    visited.add(neighbour)
+                    children[current].append(neighbour)
+                    queue.append(neighbour)
+    
+    # Clients grouped under their device; unattributed ones under a virtual root
+    clients = {node_id: [] for node_id in devices}
+    orphans = []
+    for node_id, node in nodes.items():
+        if node.get('type') == 'client':
+            parent = client_parent.get(node_id)
+            (clients[parent] if parent is not None else orphans).append(node_id)
+    orphan_root = None
+    if orphans:
+        orphan_root = object()
+        clients[orphan_root] = orphans
+        children[orphan_root] = []
+        roots.append(orphan_root)
+    
+    def grid(count):
+        if not count:
+            return 0, 0
+        columns = max(1, math.ceil(math.sqrt(count * 2)))
+        return columns, math.ceil(count / columns)
+    
+    # Subtree widths, bottom-up without recursion
+    width = {}
+    stack = [(root, False) for root in reversed(roots)]
+    while stack:
+        current, expanded = stack.pop()
+        if not expanded:
+            stack.append((current, True))
+            stack.extend((child, False) for child in reversed(children[current]))
+            continue
+        columns, _ = grid(len(clients[current]))
+        own = max(DEVICE_SPACING, columns * CLIENT_SPACING)
+        width[current] = max(own, sum(width[child] for child in children[current]))
+    
+    # Coordinates, top-down
+    positions = {}
+    left = 0
+    for root in roots:
+        stack = [(root, left, 0)]
+        while stack:
+            current, x0, y = stack.pop()
+            center = x0 + width[current] / 2
+            if current is not orphan_root:
+                positions[current] = (round(center), round(y))
+            columns, rows = grid(len(clients[current]))
+            block_left = center - (columns - 1) * CLIENT_SPACING / 2
+            for i, client_id in enumerate(clients[current]):
+                row, column = divmod(i, columns)
+                positions[client_id] = (round(block_left + column * CLIENT_SPACING),
+                                        round(y + CLIENT_OFFSET + row * CLIENT_SPACING))
+            child_y = y + LEVEL_SPACING + (CLIENT_OFFSET + rows * CLIENT_SPACING if rows else 0)
+            child_left = center - sum(width[child] for child in children[current]) / 2
+            for child in children[current]:
+                stack.append((child, child_left, child_y))
+                child_left += width[child]
+        left += width[root]
+    return positions
+
+def _layout_signature(topology_data):
+    digest = hashlib.sha256()
+    for node in sorted(topology_data.get('nodes', []), key=lambda node: str(node['id'])):
+        digest.update(f"{node['id']}|{node.get('type')}\n".encode('utf-8'))
+    for link in sorted((str(link.get('source')), str(link.get('target'))) for link in topology_data.get('links', [])):
+        digest.update(f"{link[0]}>{link[1]}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+def _layout_cache_path(key):
+    """Cache file for a network; the hash keeps keys that sanitize alike apart"""
+    safe = ''.join(c if c.isalnum() or c in '-_' else '_' for c in key)[:80]
+    return LAYOUT_CACHE_DIR / f"{safe}_{hashlib.blake2b(key.encode('utf-8'), digest_size=4).hexdigest()}.json"
+
+def get_topology_layout(topology_data, network_name=None, use_cache=True):
     """
-    # Use network name from topology data if not provided
-    if network_name is None and 'network_name' in topology_data:
-        network_name = topology_data['network_name']
-    elif network_name is None:
-        network_name = "Unknown Network"
+    Get node coordinates for a topology, reusing the cached layout when the
+    network's nodes and links are unchanged
+    
+    Layouts are cached per network ID, or per network name for topologies
+    without a 'network_id'.
+    
+    Args:
+        topology_data (dict): Network topology data with nodes and links
+        network_name (str, optional): Name the layout is cached under when the
+            topology has no network ID
+        use_cache (bool): Whether to read and write the layout cache
         
+    Returns:
+        dict: Node ID to (x, y) coordinates
+    """
+    network_name = network_name or topology_data.get('network_name') or "Unknown Network"
+    network_id = topology_data.get('network_id')
+    cache_path = _layout_cache_path(f"id:{network_id}" if network_id else f"name:{network_name}")
+    signature = _layout_signature(topology_data)
+    if use_cache:
+        try:
+            with open(cache_path) as f:
+                cached = json.load(f)
+            if cached.get('signature') == signature:
+                logging.debug(f"Using cached layout for {network_name}")
+                positions = cached['positions']
+                return {node['id']: tuple(positions[str(node['id'])]) for node in topology_data.get('nodes', [])
+                        if str(node['id']) in positions}
+        except (OSError, ValueError, KeyError):
+            pass
+    
+    positions = compute_topology_layout(topology_data)
+    if use_cache:
+        # Written atomically, as server threads and render workers lay out networks concurrently
+        temporary = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.{uuid.uuid4().hex[:8]}.tmp")
+        try:
+            os.makedirs(LAYOUT_CACHE_DIR, exist_ok=True)
+            with open(temporary, 'w') as f:
+                json.dump({'signature': signature,
+                           'positions': {str(node_id): xy for node_id, xy in positions.items()}}, f)
+            os.replace(temporary, cache_path)
+        except OSError as e:
+            logging.warning(f"Could not cache topology layout: {str(e)}")
+            try:
+                os.remove(temporary)
+            except OSError:
+                pass
+    return positions
+
+def _topology_output_path(topology_data, network_name, output_path):
+    """Resolve the network name and page path the way generate_topology_html() does"""
+    if network_name is None:
+        network_name = topology_data.get('network_name') or "Unknown Network"
     if not output_path:
         # Create a directory for topology visualizations if it doesn't exist
         output_dir = Path(os.path.expanduser("~")) / "meraki_visualizations"
         os.makedirs(output_dir, exist_ok=True)
         output_path = output_dir / f"{network_name.replace(' ', '_')}_topology.html"
+    return network_name, Path(output_path)
+
+def _resolve_cluster_mode(topology_data, cluster_by):
+    if cluster_by == 'auto':
+        client_count = sum(1 for node in topology_data.get('nodes', []) if node.get('type') == 'client')
+        return 'port' if client_count > CLUSTER_THRESHOLD else None
+    return cluster_by
+
+def generate_topology_html(topology_data, network_name=None, output_path=None, cluster_by='auto',
+                           compress=False, live_url=None, tiles_url=None):
+    """
+    Generate an HTML file to visualize network topology
+    
+    The page only holds the legend and the drawing code. Nodes and edges are
+    written to a ``<name>_data.js`` script next to it in a compact form: styles
+    are defined once per group and connection type, and tooltip values are
+    interned in a shared string table. vis.js is loaded from a local vendor
+    copy when available (see vendor_vis_assets()).
+    
+    With clustering, clients are drawn as one node per cluster and each
+    cluster's members are written to a script file in a ``<name>_clusters``
+    directory next to the page, loaded when the cluster is double-clicked.
+    
+    The page's state (see update_topology_html()) is reset, and pages already
+    open on it reload themselves.
+    
+    Args:
+        topology_data (dict or TopologyGraph): Network topology data with nodes and links
+        network_name (str, optional): Name of the network. If None, will use from topology_data.
+        output_path (str, optional): Path to save the HTML file. Defaults to None.
+        cluster_by (str, optional): 'device', 'port' or 'vlan' to collapse clients
+            (see cluster_clients()), None to draw every client, or 'auto' to
+            cluster by port above CLUSTER_THRESHOLD clients
+        compress (bool): Also write the data as ``<name>_data.json.gz``, which
+            the page fetches instead of the script when served over HTTP
+        live_url (str, optional): Server-Sent Events URL pushing the page's
+            updates (see api.topology_server); the page polls its updates
+            script when it is not served over HTTP or this isn't set
+        tiles_url (str, optional): URL of the topology's tiles (see
+            utilities.topology_tiles); when served over HTTP the page only
+            fetches the tiles in view instead of the whole data file
+        
+    Returns:
+        str: Path to the generated HTML file
+    """
+    if isinstance(topology_data, TopologyGraph):
+        topology_data = topology_data.to_topology()
+    network_name, output_path = _topology_output_path(topology_data, network_name, output_path)
+    cluster_by = _resolve_cluster_mode(topology_data, cluster_by)
+    previous_state = _load_page_state(output_path)
+    version = previous_state['version'] + 1 if previous_state else 0
+    clusters = {}
+    if cluster_by:
+        topology_data, members = cluster_clients(topology_data, cluster_by)
+        clusters = _vis_clusters(members)
+    
+    # Lay the nodes out here so the browser doesn't have to run physics
+    positions = get_topology_layout(topology_data, network_name)
     
     # Convert topology data to vis.js format
-    vis_data = create_vis_network_data(topology_data)
+    vis_data = create_vis_network_data(topology_data, positions)
+    cluster_hashes = _write_cluster_files(vis_data['nodes'], clusters, output_path,
+                                          previous_state['cluster_files'] if previous_state else None)
     vis_nodes = vis_data['nodes']
     vis_edges = vis_data['edges']
     connection_types = vis_data['connection_types']
+    data_script, data_gzip = _write_topology_data(vis_nodes, vis_edges, output_path, compress, version)
+    snapshot = TopologySnapshot.from_topology({'nodes': vis_nodes, 'links': vis_edges}, version, 'from', 'to',
+                                              VIEW_IGNORED_FIELDS)
+    state = {'version': version, 'cluster_by': cluster_by, 'compress': compress, 'live_url': live_url,
+             'tiles_url': tiles_url, 'snapshot': snapshot.to_dict(), 'cluster_files': cluster_hashes, 'deltas': []}
+    updates_script = _write_topology_updates(state, output_path)
+    _save_page_state(output_path, state)
+    vis_js, vis_css = _vis_asset_urls(output_path.parent)
     
     # Generate HTML with vis.js
     html_content = f"""<!DOCTYPE html>
@@ -75,8 +448,9 @@ def generate_topology_html(topology_data, network_name=None, output_path=None):
 <head>
     <title>Network Topology: {network_name}</title>
     <meta charset="utf-8">
-    <script src="https://cdnjs.cloudflare.com/ajax/libs/vis/4.21.0/vis.min.js"></script>
-    <link href="https://cdnjs.cloudflare.com/ajax/libs/vis/4.21.0/vis.min.css" rel="stylesheet" type="text/css">
+    <script src="{vis_js}"></script>
+    <script>window.vis || document.write('<script src="{VIS_CDN_URL}/vis.min.js"><\\/script>');</script>
+    <link href="{vis_css}" rel="stylesheet" type="text/css" onerror="this.onerror = null; this.href = '{VIS_CDN_URL}/vis.min.css';">
     <style type="text/css">
         body, html {{
             height: 100%;
@@ -273,9 +647,9 @@ def generate_topology_html(topology_data, network_name=None, output_path=None):
     for node in vis_nodes:
         group = node.get('group', 'Unknown')
         if group in device_count:
-            device_count[group] += 1
+            device_count[group] += node.get('count', 1)
         else:
-            device_count[group] = 1
+            device_count[group] = node.get('count', 1)
     
     html_content += """
                 </div>
@@ -307,25 +681,89 @@ def generate_topology_html(topology_data, network_name=None, output_path=None):
     <script type="text/javascript">
         // Create a network
         var container = document.getElementById('topology-network');
+        var nodes, edges, network;
         
-        // Parse the JSON data
-        var nodes = new vis.DataSet("""
-    
-    # Convert nodes and edges to JSON
-    html_content += json.dumps(vis_nodes)
-    
-    html_content += """);
-        var edges = new vis.DataSet("""
-    
-    html_content += json.dumps(vis_edges)
-    
-    html_content += """);
-        
-        // Provide the data in the vis format
-        var data = {
-            nodes: nodes,
-            edges: edges
-        };
+        // Nodes and edges are stored compactly; styles come from their group and type
+        var iconBaseUrl = """ + json.dumps(ICON_BASE_URL) + """;
+        var tooltipFields = """ + json.dumps(TOOLTIP_FIELDS) + """;
+        var edgeStyles = """ + json.dumps(CONNECTION_STYLES) + """;
+        function unpackRows(columns, strings, interned) {
+            var keys = Object.keys(columns);
+            var count = keys.length ? columns[keys[0]].length : 0;
+            var rows = [];
+            for (var i = 0; i < count; i++) {
+                var row = {};
+                for (var k = 0; k < keys.length; k++) {
+                    var value = columns[keys[k]][i];
+                    if (value !== null) {
+                        row[keys[k]] = interned[keys[k]] ? strings[value] : value;
+                    }
+                }
+                rows.push(row);
+            }
+            return rows;
+        }
+        function visNode(node, strings) {
+            var kind = node.summary ? 'summary' : (node.count ? 'cluster' : (node.group === 'client' ? 'client' : 'device'));
+            var title = '<b>' + node.label + '</b>';
+            (node.info || []).forEach(function(value, i) {
+                if (value !== null) {
+                    title += '<br><b>' + tooltipFields[kind][i] + ':</b> ' + strings[value];
+                }
+            });
+            if (node.lastSeen) {
+                title += '<br><b>Last Seen:</b> ' + node.lastSeen;
+            }
+            if (kind === 'cluster') {
+                title += '<br><i>Double-click to expand</i>';
+            } else if (kind === 'summary') {
+                title += '<br><i>Zoom in to see them</i>';
+            }
+            node.title = title;
+            node.image = iconBaseUrl + node.icon + '.png';
+            node.size = node.size || (node.group === 'client' ? 20 : 30);
+            node.font = {size: node.group === 'client' ? 12 : 14};
+            delete node.info;
+            delete node.icon;
+            return node;
+        }
+        function visEdge(edge) {
+            var style = edgeStyles[edge.type] || edgeStyles.unknown;
+            edge.label = edge.label || '';
+            edge.title = edge.label;
+            edge.color = {color: style.color, highlight: style.highlight};
+            edge.width = style.width;
+            edge.dashes = style.dashes;
+            edge.arrows = {to: {enabled: style.arrow}};
+            edge.font = {size: 10, align: 'middle'};
+            return edge;
+        }
+        function unpackTopology(data) {
+            var nodes = unpackRows(data.nodes, data.strings, {group: true, icon: true});
+            nodes.forEach(function(node, i) {
+                node.id = data.ids[i];
+                visNode(node, data.strings);
+            });
+            var edges = unpackRows(data.edges, data.strings, {type: true, label: true});
+            edges.forEach(function(edge) {
+                edge.from = data.ids[edge.from];
+                edge.to = data.ids[edge.to];
+                visEdge(edge);
+            });
+            return {nodes: nodes, edges: edges};
+        }
+        // Edge IDs match the link keys the server diffs against (see link_keys())
+        function edgeKeys(edgeList) {
+            var seen = {};
+            edgeList.forEach(function(edge) {
+                var a = String(edge.from), b = String(edge.to);
+                var key = a <= b ? a + '|' + b : b + '|' + a;
+                var count = seen[key] || 0;
+                seen[key] = count + 1;
+                edge.id = count ? key + '#' + count : key;
+            });
+            return edgeList;
+        }
         
         // Options for the network visualization
         var options = {
@@ -345,6 +783,7 @@ def generate_topology_html(topology_data, network_name=None, output_path=None):
                 }
             },
             edges: {
+                smooth: """ + ('false' if positions else 'true') + """,
                 font: {
                     color: '#ffffff',
                     strokeWidth: 3,
@@ -359,8 +798,11 @@ def generate_topology_html(topology_data, network_name=None, output_path=None):
                     y: 5
                 }
             },
+            layout: {
+                improvedLayout: false
+            },
             physics: {
-                enabled: true,
+                enabled: """ + ('false' if positions else 'true') + """,
                 barnesHut: {
                     gravitationalConstant: -3000,
                     centralGravity: 0.3,
@@ -434,21 +876,333 @@ def generate_topology_html(topology_data, network_name=None, output_path=None):
             }
         };
         
-        // Initialize the network
-        var network = new vis.Network(container, data, options);
+        function drawTopology(data) {
+            data = unpackTopology(data);
+            nodes = new vis.DataSet(data.nodes);
+            edges = new vis.DataSet(edgeKeys(data.edges));
+            network = new vis.Network(container, {nodes: nodes, edges: edges}, options);
+            
+            // Add event listeners
+            network.on("stabilizationProgress", function(params) {
+                // Update loading bar
+                console.log("Stabilization progress:", params.iterations, "/", params.total);
+            });
+            
+            network.on("stabilizationIterationsDone", function() {
+                console.log("Stabilization complete");
+            });
+            
+            network.on("doubleClick", function(params) {
+                if (!params.nodes.length) {
+                    return;
+                }
+                var node = nodes.get(params.nodes[0]);
+                if (node.clusterFile) {
+                    expandCluster(node.id);
+                } else if (node.cluster) {
+                    collapseCluster(node.cluster);
+                }
+            });
+            
+            // Initial fit
+            if (!tilesUrl) {
+                setTimeout(fitNetwork, 1000);
+            }
+        }
+        
+        // Load the data: the gzip'd JSON when served over HTTP, else the script file
+        var topologyVersion = null;
+        var tilesUrl = """ + json.dumps(tiles_url) + """;
+        function topologyData(data) {
+            topologyVersion = data.version;
+            drawTopology(data);
+            followUpdates();
+        }
+        function followUpdates() {
+            var liveUrl = """ + json.dumps(live_url) + """;
+            if (liveUrl && location.protocol.indexOf('http') === 0 && window.EventSource) {
+                // Served live: the server pushes each update as it happens
+                new EventSource(liveUrl).onmessage = function(event) {
+                    topologyUpdates(JSON.parse(event.data));
+                };
+                return;
+            }
+            loadUpdates();
+            setInterval(loadUpdates, """ + str(UPDATE_POLL_INTERVAL_MS) + """);
+        }
+        function loadDataScript() {
+            var script = document.createElement('script');
+            script.src = """ + json.dumps(data_script) + """;
+            document.body.appendChild(script);
+        }
+        (function loadTopology() {
+            if (tilesUrl && location.protocol.indexOf('http') === 0) {
+                loadTileMeta(true);
+                return;
+            }
+            var compressed = """ + json.dumps(data_gzip) + """;
+            if (!compressed || location.protocol.indexOf('http') !== 0 || !window.DecompressionStream) {
+                loadDataScript();
+                return;
+            }
+            fetch(compressed).then(function(response) {
+                if (!response.ok) {
+                    throw new Error(response.statusText);
+                }
+                return new Response(response.body.pipeThrough(new DecompressionStream('gzip'))).json();
+            }).then(topologyData, loadDataScript);
+        })();
         
-        // Add event listeners
-        network.on("stabilizationProgress", function(params) {
-            // Update loading bar
-            console.log("Stabilization progress:", params.iterations, "/", params.total);
-        });
+        // Changes since the data file was written are polled from the updates script
+        var updatesScript = null;
+        function loadUpdates() {
+            if (updatesScript) {
+                updatesScript.parentNode.removeChild(updatesScript);
+            }
+            updatesScript = document.createElement('script');
+            updatesScript.src = """ + json.dumps(updates_script) + """ + '?t=' + Date.now();
+            document.body.appendChild(updatesScript);
+        }
+        function topologyUpdates(update) {
+            if (!network || update.version === topologyVersion) {
+                return;
+            }
+            if (tileMeta) {
+                // Tiles are built per version, so the visible ones are fetched again
+                loadTileMeta(false);
+                return;
+            }
+            update.deltas.forEach(function(delta) {
+                if (delta.base === topologyVersion) {
+                    applyDelta(delta);
+                    topologyVersion = delta.version;
+                }
+            });
+            if (topologyVersion !== update.version) {
+                // The page was rewritten from scratch
+                location.reload();
+            }
+        }
+        function applyDelta(delta) {
+            var data = unpackTopology(delta);
+            var touched = {};
+            delta.removedNodes.concat(delta.clusters).forEach(function(id) { touched[id] = true; });
+            data.nodes.forEach(function(node) { touched[node.id] = true; });
+            delta.removedEdges.forEach(function(id) { touched[id] = true; });
+            data.edges.forEach(function(edge) { touched[edge.id] = true; });
+            
+            // Clusters whose members or edges changed are collapsed and reloaded on the next expand
+            Object.keys(expandedClusters).forEach(function(clusterId) {
+                var expanded = expandedClusters[clusterId];
+                if (touched[clusterId] || expanded.edges.some(function(edge) { return touched[edge.id]; })) {
+                    collapseCluster(clusterId);
+                }
+            });
+            delta.removedNodes.concat(delta.clusters).forEach(function(id) { delete clusterData[id]; });
+            edges.remove(delta.removedEdges);
+            nodes.remove(delta.removedNodes);
+            
+            // New nodes go next to a node they link to; existing ones keep their place
+            var linked = {};
+            data.edges.forEach(function(edge) {
+                (linked[edge.from] = linked[edge.from] || []).push(edge.to);
+                (linked[edge.to] = linked[edge.to] || []).push(edge.from);
+            });
+            var placed = {};
+            var children = {};
+            data.nodes.forEach(function(node) {
+                if (nodes.get(node.id)) {
+                    return;
+                }
+                (linked[node.id] || []).some(function(id) {
+                    var center = placed[id] || (nodes.get(id) && network.getPositions([id])[id]);
+                    if (!center) {
+                        return false;
+                    }
+                    var k = children[id] = (children[id] || 0) + 1;
+                    node.x = center.x + ((k - 1) % 5 - 2) * 60;
+                    node.y = center.y + 80 + Math.floor((k - 1) / 5) * 60;
+                    placed[node.id] = {x: node.x, y: node.y};
+                    return true;
+                });
+            });
+            nodes.update(data.nodes);
+            edges.update(data.edges);
+        }
         
-        network.on("stabilizationIterationsDone", function() {
-            console.log("Stabilization complete");
-        });
+        // Tiled pages only fetch the tiles covering the viewport, at a level of detail for the zoom
+        var tileMeta = null;
+        var tileZoom = null;
+        var loadedTiles = {};
+        var tileEdgeRefs = {};
+        var viewportTimer = null;
+        var maxLoadedTiles = 64;
+        function loadTileMeta(first) {
+            fetch(tilesUrl).then(function(response) {
+                return response.json();
+            }).then(function(meta) {
+                tileMeta = meta;
+                topologyVersion = meta.version;
+                if (first) {
+                    drawTopology({strings: [], ids: [], nodes: {}, edges: {from: [], to: [], type: [], label: []}});
+                    network.on('dragEnd', scheduleViewport);
+                    network.on('zoom', scheduleViewport);
+                    followUpdates();
+                    fitNetwork();
+                    return;
+                }
+                clearTiles();
+                loadViewport();
+            });
+        }
+        function scheduleViewport() {
+            clearTimeout(viewportTimer);
+            viewportTimer = setTimeout(loadViewport, 150);
+        }
+        function clearTiles() {
+            loadedTiles = {};
+            tileEdgeRefs = {};
+            tileZoom = null;
+            nodes.clear();
+            edges.clear();
+        }
+        function loadViewport() {
+            var bounds = tileMeta.bounds;
+            var scale = network.getScale();
+            var center = network.getViewPosition();
+            var zoom = Math.round(Math.log2(bounds[2] * scale / tileMeta.tilePixels));
+            zoom = Math.max(0, Math.min(tileMeta.maxZoom, zoom));
+            if (zoom !== tileZoom) {
+                clearTiles();
+                tileZoom = zoom;
+            }
+            var cells = 1 << zoom;
+            var step = bounds[2] / cells;
+            function span(low, high, origin) {
+                return [Math.max(0, Math.floor((low - origin) / step)), Math.min(cells - 1, Math.floor((high - origin) / step))];
+            }
+            var halfWidth = container.clientWidth / scale / 2;
+            var halfHeight = container.clientHeight / scale / 2;
+            var columns = span(center.x - halfWidth, center.x + halfWidth, bounds[0]);
+            var rows = span(center.y - halfHeight, center.y + halfHeight, bounds[1]);
+            var wanted = {};
+            for (var x = columns[0]; x <= columns[1]; x++) {
+                for (var y = rows[0]; y <= rows[1]; y++) {
+                    var key = zoom + '/' + x + '/' + y;
+                    wanted[key] = true;
+                    if (!loadedTiles[key]) {
+                        loadTile(key);
+                    }
+                }
+            }
+            var keys = Object.keys(loadedTiles);
+            if (keys.length > maxLoadedTiles) {
+                keys.forEach(function(key) {
+                    if (!wanted[key]) {
+                        dropTile(key);
+                    }
+                });
+            }
+        }
+        function loadTile(key) {
+            var tile = loadedTiles[key] = {nodes: [], edges: []};
+            fetch(tilesUrl + '/' + key + '?v=' + topologyVersion).then(function(response) {
+                if (!response.ok) {
+                    throw new Error(response.statusText);
+                }
+                return response.json();
+            }).then(function(data) {
+                if (loadedTiles[key] !== tile || data.version !== topologyVersion) {
+                    return;
+                }
+                data = unpackTopology(data);
+                tile.nodes = data.nodes.map(function(node) { return node.id; });
+                tile.edges = data.edges.map(function(edge) { return edge.id; });
+                tile.edges.forEach(function(id) { tileEdgeRefs[id] = (tileEdgeRefs[id] || 0) + 1; });
+                nodes.update(data.nodes);
+                edges.update(data.edges);
+            }).catch(function() {
+                if (loadedTiles[key] === tile) {
+                    delete loadedTiles[key];
+                }
+            });
+        }
+        function dropTile(key) {
+            var tile = loadedTiles[key];
+            delete loadedTiles[key];
+            nodes.remove(tile.nodes);
+            // Edges between two tiles stay until both are dropped
+            edges.remove(tile.edges.filter(function(id) {
+                if (--tileEdgeRefs[id]) {
+                    return false;
+                }
+                delete tileEdgeRefs[id];
+                return true;
+            }));
+        }
         
+        // Client clusters: members are loaded from a side file on double-click
+        var clusterData = {};
+        var expandedClusters = {};
+        function topologyCluster(data) {
+            var unpacked = unpackTopology(data);
+            clusterData[data.id] = unpacked;
+            expandCluster(data.id);
+        }
+        function expandCluster(clusterId) {
+            var cluster = nodes.get(clusterId);
+            if (!cluster || expandedClusters[clusterId]) {
+                return;
+            }
+            var data = clusterData[clusterId];
+            if (!data) {
+                var script = document.createElement('script');
+                script.src = cluster.clusterFile + '?v=' + topologyVersion;
+                document.body.appendChild(script);
+                return;
+            }
+            var center = network.getPositions([clusterId])[clusterId];
+            var columns = Math.ceil(Math.sqrt(data.nodes.length));
+            var clusterEdges = edges.get({filter: function(edge) { return edge.to === clusterId || edge.from === clusterId; }});
+            data.nodes.forEach(function(node, i) {
+                node.cluster = clusterId;
+                node.x = center.x + ((i % columns) - (columns - 1) / 2) * 60;
+                node.y = center.y + Math.floor(i / columns) * 60;
+            });
+            data.edges.forEach(function(edge, i) {
+                edge.id = clusterId + '#' + i;
+            });
+            expandedClusters[clusterId] = {node: cluster, edges: clusterEdges};
+            edges.remove(clusterEdges.map(function(edge) { return edge.id; }));
+            nodes.remove(clusterId);
+            nodes.add(data.nodes);
+            edges.add(data.edges);
+        }
+        function collapseCluster(clusterId) {
+            var expanded = expandedClusters[clusterId];
+            if (!expanded) {
+                return;
+            }
+            var data = clusterData[clusterId];
+            edges.remove(data.edges.map(function(edge) { return edge.id; }));
+            nodes.remove(data.nodes.map(function(node) { return node.id; }));
+            nodes.add(expanded.node);
+            edges.add(expanded.edges);
+            delete expandedClusters[clusterId];
+        }
         // Control functions
         function fitNetwork() {
+            if (tileMeta) {
+                var extent = tileMeta.extent;
+                var width = Math.max(extent[2] - extent[0], 1);
+                var height = Math.max(extent[3] - extent[1], 1);
+                network.moveTo({
+                    position: {x: (extent[0] + extent[2]) / 2, y: (extent[1] + extent[3]) / 2},
+                    scale: 0.9 * Math.min(container.clientWidth / width, container.clientHeight / height)
+                });
+                loadViewport();
+                return;
+            }
             network.fit({
                 animation: {
                     duration: 1000,
@@ -457,7 +1211,7 @@ def generate_topology_html(topology_data, network_name=None, output_path=None):
             });
         }
         
-        var physicsEnabled = true;
+        var physicsEnabled = """ + ('false' if positions else 'true') + """;
         function togglePhysics() {
             physicsEnabled = !physicsEnabled;
             network.setOptions({physics: {enabled: physicsEnabled}});
@@ -496,9 +1250,7 @@ def generate_topology_html(topology_data, network_name=None, output_path=None):
                 }
             });
         }
-        
-        // Initial fit
-        setTimeout(fitNetwork, 1000);
+
     </script>
 </body>
 </html>
@@ -511,6 +1263,232 @@ def generate_topology_html(topology_data, network_name=None, output_path=None):
     logging.info(f"Network topology visualization saved to {output_path}")
     return str(output_path)
 
+def _write_topology_data(vis_nodes, vis_edges, output_path, compress=False, version=0):
+    """
+    Write the page's nodes and edges next to it
+    
+    The script file calls topologyData() when loaded, which works when the page
+    is opened straight from disk. The gzip'd JSON is for pages served over HTTP.
+    
+    Returns:
+        tuple: (script file name, gzip file name or None), relative to the page
+    """
+    output_path = Path(output_path)
+    payload = json.dumps(dict(_pack_vis_data(vis_nodes, vis_edges), version=version), separators=(',', ':'))
+    script_name = f"{output_path.stem}_data.js"
+    with open(output_path.parent / script_name, 'w') as f:
+        f.write(f"topologyData({payload});\n")
+    gzip_name = None
+    if compress:
+        gzip_name = f"{output_path.stem}_data.json.gz"
+        with gzip.open(output_path.parent / gzip_name, 'wt', encoding='utf-8', compresslevel=6) as f:
+            f.write(payload)
+    else:
+        stale = output_path.parent / f"{output_path.stem}_data.json.gz"
+        if stale.exists():
+            stale.unlink()
+    return script_name, gzip_name
+
+def _cluster_file_name(cluster_id):
+    """A file name for a cluster that stays the same between runs"""
+    return f"{hashlib.blake2b(str(cluster_id).encode('utf-8'), digest_size=8).hexdigest()}.js"
+
+def _write_cluster_files(vis_nodes, clusters, output_path, previous=None):
+    """
+    Write each cluster's members to a script file next to the page
+    
+    The files call topologyCluster() when loaded, so they also work when the page
+    is opened straight from disk, where fetching JSON is blocked. A cluster's file
+    is only rewritten when its content changed since the hashes in ``previous``.
+    
+    Args:
+        vis_nodes (list): vis.js nodes; cluster nodes get their 'clusterFile'
+        clusters (dict): Cluster ID to its member nodes and edges
+        output_path (Path): Path of the page
+        previous (dict, optional): Cluster ID to content hash from the last run
+    
+    Returns:
+        dict: Cluster ID to the content hash of its members
+    """
+    output_path = Path(output_path)
+    cluster_dir = output_path.parent / f"{output_path.stem}_clusters"
+    previous = previous or {}
+    hashes = {}
+    files = {}
+    if clusters:
+        os.makedirs(cluster_dir, exist_ok=True)
+    for cluster_id, members in clusters.items():
+        file_name = _cluster_file_name(cluster_id)
+        files[cluster_id] = f"{cluster_dir.name}/{file_name}"
+        digest = hashes[cluster_id] = content_hash(members, VIEW_IGNORED_FIELDS)
+        if previous.get(cluster_id) == digest and (cluster_dir / file_name).exists():
+            continue
+        packed = _pack_vis_data(members['nodes'], members['edges'])
+        with open(cluster_dir / file_name, 'w') as f:
+            f.write(f"topologyCluster({json.dumps(dict(packed, id=cluster_id), separators=(',', ':'))});\n")
+    if cluster_dir.is_dir():
+        current = {_cluster_file_name(cluster_id) for cluster_id in clusters}
+        for old_file in cluster_dir.glob('*.js'):
+            if old_file.name not in current:
+                old_file.unlink()
+    for vis_node in vis_nodes:
+        if vis_node['id'] in files:
+            vis_node['clusterFile'] = files[vis_node['id']]
+    return hashes
+
+def _page_state_path(output_path):
+    output_path = Path(output_path)
+    return output_path.parent / f"{output_path.stem}_state.json"
+
+def _load_page_state(output_path):
+    """The state update_topology_html() keeps next to a page, or None if there is none"""
+    try:
+        with open(_page_state_path(output_path)) as f:
+            state = json.load(f)
+        return state if isinstance(state, dict) and 'version' in state and 'snapshot' in state else None
+    except (OSError, ValueError) as e:
+        logging.debug(f"No usable topology page state for {output_path}: {str(e)}")
+        return None
+
+def _save_page_state(output_path, state):
+    path = _page_state_path(output_path)
+    temporary = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(temporary, 'w') as f:
+        json.dump(state, f, separators=(',', ':'))
+    os.replace(temporary, path)
+
+def _write_topology_updates(state, output_path):
+    """
+    Write the deltas since the page's data file to the script open pages poll
+    
+    Returns:
+        str: Script file name, relative to the page
+    """
+    output_path = Path(output_path)
+    script_name = f"{output_path.stem}_updates.js"
+    payload = json.dumps({'version': state['version'], 'deltas': state['deltas']}, separators=(',', ':'))
+    # Pages may poll while the file is written, so it's swapped in whole
+    temporary = output_path.parent / f"{script_name}.{os.getpid()}.tmp"
+    with open(temporary, 'w') as f:
+        f.write(f"topologyUpdates({payload});\n")
+    os.replace(temporary, output_path.parent / script_name)
+    return script_name
+
+def topology_page_updates(output_path):
+    """
+    Get the updates an open topology page applies to catch up
+    
+    Args:
+        output_path (str): Path of a page written by generate_topology_html()
+    
+    Returns:
+        dict: ``{'version': current version, 'deltas': [...]}`` as in the page's
+        updates script, or None if the page has no state
+    """
+    state = _load_page_state(output_path)
+    if not state:
+        return None
+    return {'version': state['version'], 'deltas': state['deltas']}
+
+def _pack_delta(delta, clusters):
+    """
+    Pack a diff_topology() delta of vis.js nodes and edges like _pack_vis_data()
+    
+    Nodes that are added or changed are sent without positions, so open pages keep
+    theirs. Edges carry their link key as 'id'.
+    """
+    upserts = [{key: value for key, value in node.items() if key not in ('x', 'y')}
+               for node in delta['nodes']['added'] + delta['nodes']['changed']]
+    links = delta['links']['added'] + delta['links']['changed']
+    packed = _pack_vis_data(upserts, links)
+    packed['edges']['id'] = [link['key'] for link in links]
+    return dict(packed, base=delta['base'], version=delta['version'], removedNodes=delta['nodes']['removed'],
+                removedEdges=delta['links']['removed'], clusters=clusters)
+
+def update_topology_html(topology_data, network_name=None, output_path=None, cluster_by='auto', compress=False,
+                         live_url=None, tiles_url=None):
+    """
+    Bring a topology page up to date with as little work as possible
+    
+    The new topology is diffed against the snapshot kept in the page's
+    ``<name>_state.json``, and only the nodes and edges that were added, changed
+    or removed are appended to ``<name>_updates.js``. Pages open on it poll that
+    file and apply the changes in place, keeping the view, positions and expanded
+    clusters that weren't touched. Cluster files are only rewritten when their
+    members changed.
+    
+    The page is written from scratch with generate_topology_html() when there is
+    no page yet, the cluster mode changed, or the pending deltas grew past
+    MAX_DELTA_CHAIN or MAX_DELTA_FRACTION of the page.
+    
+    Args:
+        topology_data (dict or TopologyGraph): Network topology data with nodes and links
+        network_name (str, optional): Name of the network. If None, will use from topology_data.
+        output_path (str, optional): Path of the HTML file
+        cluster_by (str, optional): As for generate_topology_html()
+        compress (bool): As for generate_topology_html()
+        live_url (str, optional): As for generate_topology_html()
+        tiles_url (str, optional): As for generate_topology_html()
+    
+    Returns:
+        tuple: (path to the HTML file, summary of the changes) where the summary
+        counts the added, changed and removed nodes and links and says whether
+        the page was 'rewritten'. The summary is None when a new page was written.
+    """
+    if isinstance(topology_data, TopologyGraph):
+        topology_data = topology_data.to_topology()
+    network_name, output_path = _topology_output_path(topology_data, network_name, output_path)
+    cluster_by = _resolve_cluster_mode(topology_data, cluster_by)
+    state = _load_page_state(output_path)
+    if (not state or not output_path.exists() or state.get('cluster_by') != cluster_by
+            or state.get('compress') != compress or state.get('live_url') != live_url
+            or state.get('tiles_url') != tiles_url):
+        return generate_topology_html(topology_data, network_name, output_path, cluster_by, compress, live_url,
+                                      tiles_url), None
+    
+    clusters = {}
+    view_data = topology_data
+    if cluster_by:
+        view_data, members = cluster_clients(topology_data, cluster_by)
+        clusters = _vis_clusters(members)
+    vis_data = create_vis_network_data(view_data)
+    vis_nodes = vis_data['nodes']
+    vis_edges = vis_data['edges']
+    previous_clusters = state['cluster_files']
+    cluster_hashes = {cluster_id: content_hash(members, VIEW_IGNORED_FIELDS)
+                      for cluster_id, members in clusters.items()}
+    changed_clusters = [cluster_id for cluster_id, digest in cluster_hashes.items()
+                        if previous_clusters.get(cluster_id) not in (None, digest)]
+    # Cluster nodes only carry their file name once the files are written, and the snapshot includes it
+    for vis_node in vis_nodes:
+        if vis_node['id'] in clusters:
+            vis_node['clusterFile'] = f"{output_path.stem}_clusters/{_cluster_file_name(vis_node['id'])}"
+    delta, snapshot = diff_topology(TopologySnapshot.from_dict(state['snapshot']),
+                                    {'nodes': vis_nodes, 'links': vis_edges}, 'from', 'to', VIEW_IGNORED_FIELDS)
+    summary = summarize_delta(delta)
+    summary['clusters'] = len(changed_clusters)
+    summary['rewritten'] = False
+    changes = delta_size(delta)
+    if not changes and not changed_clusters:
+        return str(output_path), summary
+    
+    pending = state.get('pending_changes', 0) + changes
+    if (len(state['deltas']) >= MAX_DELTA_CHAIN
+            or pending > MAX_DELTA_FRACTION * max(1, len(vis_nodes) + len(vis_edges))):
+        generate_topology_html(topology_data, network_name, output_path, cluster_by, compress, live_url, tiles_url)
+        summary['rewritten'] = True
+        return str(output_path), summary
+    
+    _write_cluster_files(vis_nodes, clusters, output_path, previous_clusters)
+    state['deltas'].append(_pack_delta(delta, changed_clusters))
+    state.update(version=snapshot.version, snapshot=snapshot.to_dict(), cluster_files=cluster_hashes,
+                 pending_changes=pending)
+    _write_topology_updates(state, output_path)
+    _save_page_state(output_path, state)
+    logging.info(f"Network topology visualization {output_path} updated to version {snapshot.version}: "
+                 f"{changes} changes, {len(changed_clusters)} clusters")
+    return str(output_path), summary
+
 def open_topology_visualization(html_path):
     """
     Open the topology visualization in the default web browser
@@ -528,36 +1506,48 @@ def open_topology_visualization(html_path):
         logging.error(f"Error opening topology visualization: {str(e)}")
         return False
 
-def visualize_network_topology(topology_data, network_name=None):
+def visualize_network_topology(topology_data, network_name=None, incremental=True):
     """
     Generate and open a network topology visualization
     
     Args:
         topology_data (dict): Network topology data with nodes and links
         network_name (str, optional): Name of the network. If None, will use from topology_data.
+        incremental (bool): Update the network's existing page in place (see
+            update_topology_html()) instead of writing it from scratch
         
     Returns:
         str: Path to the generated HTML file or None if failed
     """
     try:
-        html_path = generate_topology_html(topology_data, network_name)
+        if incremental:
+            html_path, changes = update_topology_html(topology_data, network_name)
+            if changes:
+                logging.info(f"Topology changes: {changes}")
+        else:
+            html_path = generate_topology_html(topology_data, network_name)
         open_topology_visualization(html_path)
         return html_path
     except Exception as e:
         logging.error(f"Error visualizing network topology: {str(e)}")
         return None
 
-def build_topology_from_api_data(devices, clients, links=None):
+def build_topology_from_api_data(devices, clients, links=None, as_graph=False):
     """
     Build a network topology from Meraki API data
     
+    Devices are indexed by serial, MAC and name first, so clients and links are
+    attributed in a single pass (see modules.meraki.topology_builder).
+    
     Args:
         devices (list): List of network devices
         clients (list): List of network clients
-        links (list, optional): List of topology links. If None, will build manually.
+        links (dict or list, optional): linkLayer response or list of topology links.
+            If None, links are derived from CDP/LLDP neighbours on switch ports.
+        as_graph (bool): Return a TopologyGraph instead of the dict
         
     Returns:
-        dict: Network topology data with nodes and links
+        dict: Network topology data with nodes and links, or a TopologyGraph
     """
     topology = {
         'nodes': [],
@@ -565,16 +1555,15 @@ def build_topology_from_api_data(devices, clients, links=None):
     }
     
     # Process devices
-    device_map = {}
+    index = DeviceIndex()
     for device in devices:
         device_id = device.get('serial', device.get('mac', str(uuid.uuid4())))
-        device_map[device_id] = device
         
         # Create node for device
         node = {
             'id': device_id,
             'label': device.get('name', device.get('mac', 'Unknown')),
-            'type': device.get('type', 'unknown'),
+            'type': device_type(device.get('model')),
             'model': device.get('model', 'Unknown'),
             'ip': device.get('lanIp', device.get('ip', 'Unknown')),
             'mac': device.get('mac', 'Unknown'),
@@ -587,12 +1576,19 @@ def build_topology_from_api_data(devices, clients, links=None):
             node['ports'] = device['ports']
         
         topology['nodes'].append(node)
+        index.add(device_id, device, node['type'])
+    
+    # Links between devices, from the API or else from CDP/LLDP neighbours
+    device_links = LinkSet()
+    for source, target, link_type, interface in link_layer_edges(links, index):
+        device_links.add(source, target, link_type, interface=interface)
+    if not device_links.links:
+        for source, target, link_type, interface in neighbour_edges(devices, index):
+            device_links.add(source, target, link_type, interface=interface)
     
     # Process clients
-    client_map = {}
     for client in clients:
         client_id = client.get('id', client.get('mac', str(uuid.uuid4())))
-        client_map[client_id] = client
         
         # Create node for client
         node = {
@@ -612,204 +1608,277 @@ def build_topology_from_api_data(devices, clients, links=None):
         
         topology['nodes'].append(node)
         
-        # Create link to connected device if available
-        if client.get('recentDeviceSerial'):
-            device_id = client.get('recentDeviceSerial')
-            if device_id in device_map:
-                # Determine connection type
-                connection_type = 'wired'
-                if client.get('ssid'):
-                    connection_type = 'wireless'
-                
-                # Create a descriptive interface label
-                interface_label = 'Unknown'
-                if client.get('switchport'):
-                    port_info = f"Port {client.get('switchport')}"
-                    if client.get('switchportDesc'):
-                        port_info += f" ({client.get('switchportDesc')})"
-                    interface_label = port_info
-                elif client.get('vlan'):
-                    interface_label = f"VLAN {client.get('vlan')}"
-                
-                link = {
-                    'source': client_id,
-                    'target': device_id,
-                    'type': connection_type,
-                    'interface': interface_label
-                }
-                topology['links'].append(link)
-    
-    # Process API-provided links if available
-    if links:
-        for link in links:
-            source = link.get('source', link.get('sourceSerial', link.get('sourceMac')))
-            target = link.get('target', link.get('targetSerial', link.get('targetMac')))
-            
-            # Skip if source or target is not in our device map
-            if not (source in device_map or source in client_map) or not (target in device_map or target in client_map):
-                continue
-            
-            link_type = 'unknown'
-            if 'linkType' in link:
-                link_type = link['linkType'].lower()
-            
-            interface_label = 'Unknown'
-            if 'sourcePort' in link:
-                interface_label = f"Port {link['sourcePort']}"
-            
-            topology_link = {
-                'source': source,
-                'target': target,
-                'type': link_type,
+        # Create link from the device the client is connected to, as build_network_topology() does
+        attribution = attribute_client(client, index)
+        if attribution:
+            device_id, connection_type, interface_label = attribution
+            topology['links'].append({
+                'source': device_id,
+                'target': client_id,
+                'type': connection_type,
                 'interface': interface_label
-            }
-            topology['links'].append(topology_link)
-    
-    # If no links were provided, try to infer connections between devices
-    elif not topology['links']:
-        # Create connections between switches based on MAC address tables
-        for device_id, device in device_map.items():
-            if device.get('type') == 'switch' and 'ports' in device:
-                for port_number, port_data in device.get('ports', {}).items():
-                    if 'cdp' in port_data and port_data['cdp'].get('deviceId'):
-                        # Find target device by name
-                        target_name = port_data['cdp'].get('deviceId')
-                        target_id = None
-                        for d_id, d in device_map.items():
-                            if d.get('name') == target_name:
-                                target_id = d_id
-                                break
-                        
-                        if target_id:
-                            link = {
-                                'source': device_id,
-                                'target': target_id,
-                                'type': 'switch',
-                                'interface': f"Port {port_number}"
-                            }
-                            topology['links'].append(link)
-    
-    return topology
-
-def create_vis_network_data(topology_data):
+            })
+    
+    topology['links'].extend(device_links.links)
+    return TopologyGraph.from_topology(topology) if as_graph else topology
+
+def cluster_clients(topology_data, cluster_by='port'):
     """
-    Create visualization data for network topology
+    Collapse clients into one cluster node per device, switch port/SSID or VLAN
     
     Args:
         topology_data (dict): Network topology data with nodes and links
+        cluster_by (str): 'device' for one cluster per switch or AP, 'port' for
+            one per switch port or SSID, or 'vlan' for one per VLAN on each device
         
     Returns:
-        dict: Visualization data for network topology
+        tuple: (topology with cluster nodes in place of clients,
+        {cluster ID: {'nodes': member client nodes, 'links': their links}})
     """
-    vis_nodes = []
-    vis_edges = []
+    if cluster_by not in ('device', 'port', 'vlan'):
+        raise ValueError(f"Unknown cluster mode: {cluster_by}")
+    nodes = topology_data.get('nodes', [])
+    client_ids = {node['id'] for node in nodes if node.get('type') == 'client'}
     
-    # Process nodes
-    for node in topology_data.get('nodes', []):
-        node_type = node.get('type', 'unknown')
-        
-        # Determine icon, shape, and size based on node type
-        icon = DEVICE_ICONS.get(node_type, 'device_unknown')
-        shape = 'circularImage'
-        size = 30
-        font_size = 14
-        
-        # For client devices, use client type icon if available
-        if node_type == 'client':
+    # The link from each client to its device
+    client_links = {}
+    other_links = []
+    for link in topology_data.get('links', []):
+        if link.get('target') in client_ids:
+            client_links.setdefault(link['target'], (link['source'], link))
+        elif link.get('source') in client_ids:
+            client_links.setdefault(link['source'], (link['target'], link))
+        else:
+            other_links.append(link)
+    
+    clusters = {}
+    aggregated_nodes = []
+    for node in nodes:
+        if node['id'] not in client_ids:
+            aggregated_nodes.append(node)
+            continue
+        parent, link = client_links.get(node['id'], (None, {}))
+        if cluster_by == 'device':
+            key = ''
+        elif cluster_by == 'port':
+            key = link.get('interface') or node.get('switchport') or ''
+        else:
+            key = f"VLAN {node.get('vlan')}" if node.get('vlan') not in (None, 'Unknown') else 'No VLAN'
+        cluster_id = f"cluster:{parent if parent is not None else 'unattached'}:{key}"
+        cluster = clusters.get(cluster_id)
+        if cluster is None:
+            cluster = clusters[cluster_id] = {'parent': parent, 'key': key, 'type': link.get('type', 'unknown'),
+                                              'nodes': [], 'links': []}
+        cluster['nodes'].append(node)
+        if link:
+            cluster['links'].append(link)
+    
+    aggregated_links = list(other_links)
+    for cluster_id, cluster in clusters.items():
+        members = cluster['nodes']
+        online = sum(1 for node in members if str(node.get('status', '')).lower() == 'online')
+        client_types = {}
+        vlans = set()
+        for node in members:
             client_type = node.get('client_type', 'unknown')
-            if client_type in DEVICE_ICONS:
-                icon = DEVICE_ICONS[client_type]
-            size = 20
-            font_size = 12
-        
-        # Create detailed title content for hover tooltip
-        if node_type == 'client':
-            title_content = f"""<b>{node.get('label', 'Unknown')}</b><br>
-<b>Type:</b> {node.get('client_type', 'Unknown')}<br>
-<b>IP:</b> {node.get('ip', 'Unknown')}<br>
-<b>MAC:</b> {node.get('mac', 'Unknown')}<br>
-<b>VLAN:</b> {node.get('vlan', 'Unknown')}<br>
-<b>Status:</b> {node.get('status', 'Unknown')}<br>
-<b>Connected to:</b> {node.get('connected_device', 'Unknown')}"""
-            
-            # Add switchport information if available
-            if node.get('switchport'):
-                port_info = f"{node.get('switchport', 'Unknown')}"
-                if node.get('switchportDesc'):
-                    port_info += f" ({node.get('switchportDesc')})"
-                title_content += f"""<br>
-<b>Switchport:</b> {port_info}"""
-            
-            # Add last seen information
-            if node.get('last_seen'):
-                title_content += f"<br><b>Last Seen:</b> {node.get('last_seen', 'Unknown')}"
+            client_types[client_type] = client_types.get(client_type, 0) + 1
+            if node.get('vlan') not in (None, 'Unknown'):
+                vlans.add(str(node['vlan']))
+        aggregated_nodes.append({
+            'id': cluster_id,
+            'label': f"{len(members)} clients" + (f" ({cluster['key']})" if cluster['key'] else ''),
+            'type': 'client_cluster',
+            'count': len(members),
+            'online': online,
+            'client_types': dict(sorted(client_types.items(), key=lambda item: -item[1])),
+            'vlans': sorted(vlans),
+            'interface': cluster['key']
+        })
+        if cluster['parent'] is not None:
+            aggregated_links.append({'source': cluster['parent'], 'target': cluster_id, 'type': cluster['type'],
+                                     'status': 'active', 'interface': cluster['key'] or f"{len(members)} clients"})
+    
+    aggregated = dict(topology_data, nodes=aggregated_nodes, links=aggregated_links)
+    return aggregated, {cluster_id: {'nodes': cluster['nodes'], 'links': cluster['links']}
+                        for cluster_id, cluster in clusters.items()}
+
+def _vis_cluster_node(node, positions=None):
+    """Convert a client cluster node to a compact vis.js node (see _vis_node())"""
+    client_types = ', '.join(f"{name} ({count})" for name, count in list(node['client_types'].items())[:3])
+    vlans = ', '.join(node['vlans'][:5]) + (' ...' if len(node['vlans']) > 5 else '')
+    vis_node = {
+        'id': node['id'],
+        'label': node['label'],
+        'group': 'client',
+        'icon': DEVICE_ICONS['client'],
+        'info': [f"{node['online']} of {node['count']}", client_types or 'Unknown', vlans or 'Unknown'],
+        'size': 20 + min(30, round(4 * math.log2(node['count'] + 1))),
+        'count': node['count']
+    }
+    if positions and node['id'] in positions:
+        vis_node['x'], vis_node['y'] = positions[node['id']]
+    return vis_node
+
+def _vis_node(node, positions=None):
+    """
+    Convert a topology node to a compact vis.js node
+    
+    Image, size and font follow from the group and icon, and the tooltip from
+    the 'info' values in TOOLTIP_FIELDS order; the page expands both.
+    """
+    node_type = node.get('type', 'unknown')
+    icon = DEVICE_ICONS.get(node_type, 'device_unknown')
+    
+    if node_type == 'client':
+        client_type = node.get('client_type', 'unknown')
+        if client_type in DEVICE_ICONS:
+            icon = DEVICE_ICONS[client_type]
+        switchport = None
+        if node.get('switchport'):
+            switchport = f"{node['switchport']}"
+            if node.get('switchportDesc'):
+                switchport += f" ({node['switchportDesc']})"
+        info = [node.get('client_type', 'Unknown'), node.get('ip', 'Unknown'), node.get('mac', 'Unknown'),
+                node.get('vlan', 'Unknown'), node.get('status', 'Unknown'),
+                node.get('connected_device', 'Unknown'), switchport]
+    else:
+        info = [node.get('model', 'Unknown'), node_type, node.get('ip', 'Unknown'), node.get('mac', 'Unknown'),
+                node.get('status', 'Unknown')]
+    
+    vis_node = {
+        'id': node['id'],
+        'label': node.get('label', node['id']),
+        'group': node_type,
+        'icon': icon,
+        'info': info
+    }
+    if node_type == 'client' and node.get('last_seen'):
+        # Kept out of 'info' so a new last-seen time alone isn't a change to push to open pages
+        vis_node['lastSeen'] = str(node['last_seen'])
+    if positions and node['id'] in positions:
+        vis_node['x'], vis_node['y'] = positions[node['id']]
+    return vis_node
+
+def _vis_edge(link):
+    """Convert a topology link to a compact vis.js edge, styled by type in the page"""
+    link_type = link.get('type', 'unknown')
+    
+    # Create a descriptive label based on the connection type
+    label = ""
+    if link_type == "uplink":
+        label = "Internet Connection"
+    elif link_type in ("switch", "wired"):
+        label = f"{link.get('interface', 'unknown')}"
+    elif link_type == "wireless":
+        label = "Wireless Connection"
+    
+    return {
+        'from': link['source'],
+        'to': link['target'],
+        'type': link_type if link_type in CONNECTION_STYLES else 'unknown',
+        'label': label
+    }
+
+def _pack_vis_data(vis_nodes, vis_edges):
+    """
+    Pack compact vis.js nodes and edges into columns for the page's data files
+    
+    Each node and edge property is stored as one list instead of repeating the
+    property names per element. Node IDs are listed once in 'ids' and edges
+    refer to their ends by position in it. Group, icon and connection type
+    names, tooltip values and edge labels are interned in 'strings', since
+    thousands of clients share the same VLANs, statuses, devices and ports.
+    
+    Returns:
+        dict: {'strings': [...], 'ids': [...], 'nodes': {property: [...]},
+        'edges': {property: [...]}}
+    """
+    strings = []
+    string_index = {}
+    
+    def intern(value):
+        if value is None or value == '':
+            return None
+        value = str(value)
+        position = string_index.get(value)
+        if position is None:
+            position = string_index[value] = len(strings)
+            strings.append(value)
+        return position
+    
+    ids = [node['id'] for node in vis_nodes]
+    id_index = {node_id: i for i, node_id in enumerate(ids)}
+    
+    def endpoint(node_id):
+        # Edges of a cluster file also end at the cluster's device, listed after the nodes
+        position = id_index.get(node_id)
+        if position is None:
+            position = id_index[node_id] = len(ids)
+            ids.append(node_id)
+        return position
+    
+    keys = {}
+    for node in vis_nodes:
+        keys.update(dict.fromkeys(node))
+    keys.pop('id', None)
+    nodes = {}
+    for key in keys:
+        if key == 'info':
+            nodes[key] = [[intern(value) for value in node.get('info', [])] for node in vis_nodes]
+        elif key in ('group', 'icon'):
+            nodes[key] = [intern(node.get(key)) for node in vis_nodes]
         else:
-            title_content = f"""<b>{node.get('label', 'Unknown')}</b><br>
-<b>Model:</b> {node.get('model', 'Unknown')}<br>
-<b>Type:</b> {node_type}<br>
-<b>IP:</b> {node.get('ip', 'Unknown')}<br>
-<b>MAC:</b> {node.get('mac', 'Unknown')}<br>
-<b>Status:</b> {node.get('status', 'Unknown')}"""
+            nodes[key] = [node.get(key) for node in vis_nodes]
+    edges = {
+        'from': [endpoint(edge['from']) for edge in vis_edges],
+        'to': [endpoint(edge['to']) for edge in vis_edges],
+        'type': [intern(edge['type']) for edge in vis_edges],
+        'label': [intern(edge['label']) for edge in vis_edges]
+    }
+    return {'strings': strings, 'ids': ids, 'nodes': nodes, 'edges': edges}
+
+def _vis_clusters(members):
+    """Convert cluster_clients() members to vis.js nodes and edges"""
+    return {cluster_id: {'nodes': [_vis_node(node) for node in cluster['nodes']],
+                         'edges': [_vis_edge(link) for link in cluster['links']]}
+            for cluster_id, cluster in members.items()}
+
+def create_vis_network_data(topology_data, positions=None, cluster_by=None):
+    """
+    Create visualization data for network topology
+    
+    Args:
+        topology_data (dict): Network topology data with nodes and links
+        positions (dict, optional): Node ID to precomputed (x, y) coordinates
+        cluster_by (str, optional): Collapse clients into cluster nodes per
+            'device', 'port' or 'vlan' (see cluster_clients()). Member nodes are
+            returned separately so they can be loaded when a cluster is expanded.
         
-        vis_node = {
-            'id': node['id'],
-            'label': node.get('label', node['id']),
-            'title': title_content,
-            'shape': shape,
-            'image': f"https://img.icons8.com/material/48/{icon}.png",
-            'group': node_type,
-            'size': size,
-            'font': {
-                'size': font_size
-            }
-        }
-        vis_nodes.append(vis_node)
+    Returns:
+        dict: Visualization data for network topology, with 'clusters' mapping
+        cluster IDs to their member nodes and edges when clustering
+    """
+    clusters = {}
+    if cluster_by:
+        topology_data, members = cluster_clients(topology_data, cluster_by)
+        clusters = _vis_clusters(members)
+    
+    vis_nodes = []
+    for node in topology_data.get('nodes', []):
+        if node.get('type') == 'client_cluster':
+            vis_nodes.append(_vis_cluster_node(node, positions))
+        else:
+            vis_nodes.append(_vis_node(node, positions))
     
-    # Process links
     connection_types = set()
+    vis_edges = []
     for link in topology_data.get('links', []):
-        link_type = link.get('type', 'unknown')
-        connection_types.add(link_type)
-        style = CONNECTION_STYLES.get(link_type, CONNECTION_STYLES['unknown'])
-        
-        # Create a descriptive label based on the connection type
-        label = ""
-        if link_type == "uplink":
-            label = "Internet Connection"
-        elif link_type == "switch":
-            label = f"{link.get('interface', 'unknown')}"
-        elif link_type == "wireless":
-            label = "Wireless Connection"
-        elif link_type == "wired":
-            # For wired connections, show port and VLAN if available
-            interface_info = link.get('interface', 'unknown')
-            label = interface_info
-        
-        vis_edge = {
-            'from': link['source'],
-            'to': link['target'],
-            'label': label,
-            'title': label,
-            'color': {
-                'color': style['color'],
-                'highlight': style['highlight']
-            },
-            'width': style['width'],
-            'dashes': style['dashes'],
-            'arrows': {
-                'to': {
-                    'enabled': style['arrow']
-                }
-            },
-            'font': {
-                'size': 10,
-                'align': 'middle'
-            }
-        }
-        vis_edges.append(vis_edge)
+        connection_types.add(link.get('type', 'unknown'))
+        vis_edges.append(_vis_edge(link))
     
     return {
         'nodes': vis_nodes,
         'edges': vis_edges,
-        'connection_types': connection_types
+        'connection_types': connection_types,
+        'clusters': clusters
     }